@@ -9,6 +9,8 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
+
 from backend.services.kb_service_factory import get_admin_service
 from backend.services.session_manager import get_session_manager
 from backend.api.streaming_utils import (
@@ -78,8 +80,6 @@ async def query(req: QueryRequest):
             turn_count = None
             real_sdk_session_id = None
 
-            from claude_agent_sdk import AssistantMessage, TextBlock, ResultMessage
-
             # Stream Admin Agent responses (connection pool handles concurrency at service layer)
             async for message in admin_service.query(req.message, sdk_session_id=sdk_session_id):
                 if isinstance(message, AssistantMessage):
@@ -117,7 +117,7 @@ async def query(req: QueryRequest):
             else:
                 session = session_manager.create_session(user_id=None)
 
-            logger.info(f"Processing query for session {session.session_id}: {req.message[:50]}... (legacy mode)")
+            logger.info("Processing query for session %s: %.50s... (legacy mode)", session.session_id, req.message)
 
             # Ensure Admin Service is initialized
             if not admin_service.is_initialized:
@@ -125,8 +125,6 @@ async def query(req: QueryRequest):
 
             # Send user message directly to Admin Agent (old mode: no resume)
             response_parts = []
-            from claude_agent_sdk import AssistantMessage, TextBlock
-
             async for message in admin_service.query(req.message, sdk_session_id=None):
                 if isinstance(message, AssistantMessage):
                     for block in message.content:
@@ -195,8 +193,6 @@ async def query_stream(
                 Important: extract real SDK session ID from ResultMessage and save
                 """
                 try:
-                    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
-
                     # Send session status information
                     yield sse_session_event(sdk_session_id, is_new=is_new_session)
 
@@ -264,8 +260,6 @@ async def query_stream(
             async def event_generator():
                 """SSE event generator (based on session_id, legacy mode without resume)"""
                 try:
-                    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
-
                     # Send session ID
                     yield sse_session_event(session.session_id)
 
@@ -5,8 +5,16 @@ Extracts common SSE processing logic from query.py and user.py
 import asyncio
 import json
 import logging
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
 from typing import AsyncGenerator, Callable, Optional, Any
 from fastapi.responses import StreamingResponse
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
+
+from backend.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +26,22 @@ SSE_HEADERS = {
 }
 
 
-def format_sse_event(data: dict) -> str:
+def format_sse_event(data: dict) -> bytes:
     """
     Format SSE event
 
+    Frames are encoded to UTF-8 bytes here (orjson when available), so
+    StreamingResponse sends them without another str -> bytes pass.
+
     Args:
         data: Data dictionary to send
 
     Returns:
-        SSE formatted string
+        SSE formatted bytes
     """
-    return f"data: {json.dumps(data)}\n\n"
+    if orjson is not None:
+        return b"data: " + orjson.dumps(data) + b"\n\n"
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
 
 def create_sse_response(generator: AsyncGenerator) -> StreamingResponse:
@@ -40,9 +53,24 @@ def create_sse_response(generator: AsyncGenerator) -> StreamingResponse:
 
     Returns:
         StreamingResponse object
+
+    Raises:
+        TypeError: If generator is a sync iterator. Starlette would iterate a
+                   sync generator in the threadpool (one thread hop per chunk),
+                   so SSE streams must stay async end-to-end.
     """
+    if not hasattr(generator, "__aiter__"):
+        raise TypeError(
+            f"SSE generator must be an async iterator, got {type(generator).__name__}"
+        )
+
+    settings = get_settings()
     return StreamingResponse(
-        _with_sse_heartbeat(generator),
+        _with_sse_heartbeat(
+            generator,
+            coalesce_size=settings.CLAUDE_STREAM_COALESCE_BYTES,
+            coalesce_seconds=settings.CLAUDE_STREAM_COALESCE_MS / 1000
+        ),
         media_type="text/event-stream",
         headers=SSE_HEADERS
     )
@@ -50,39 +78,78 @@ def create_sse_response(generator: AsyncGenerator) -> StreamingResponse:
 
 async def _with_sse_heartbeat(
     generator: AsyncGenerator,
-    interval_seconds: float = 15.0
-) -> AsyncGenerator[str, None]:
+    interval_seconds: float = 15.0,
+    coalesce_size: int = 0,
+    coalesce_seconds: float = 0.0
+) -> AsyncGenerator[bytes, None]:
     """
     Wrap an SSE generator with periodic heartbeat comments.
 
     Motivation: Some proxies/load balancers close idle HTTP connections if no data
     is sent for a while (e.g. long model latency before first token). SSE comments
     (lines starting with ':') keep the connection alive and are ignored by browsers.
+
+    Events that arrive in a burst are coalesced into one chunk (several SSE events
+    per write) until coalesce_size bytes are buffered or coalesce_seconds have
+    passed since the first buffered event. This means fewer send() calls for the
+    same bytes. Coalescing is disabled when either limit is <= 0.
     """
+    coalesce = coalesce_size > 0 and coalesce_seconds > 0
+    loop = asyncio.get_running_loop()
+    buffer: list[bytes] = []
+    buffered_size = 0
+    flush_at = 0.0
+
     agen = generator.__aiter__()
     pending = asyncio.create_task(agen.__anext__())
 
     try:
         while True:
-            done, _ = await asyncio.wait({pending}, timeout=interval_seconds)
+            timeout = max(flush_at - loop.time(), 0) if buffer else interval_seconds
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
             if not done:
-                yield ":\n\n"
+                if buffer:
+                    yield b"".join(buffer)
+                    buffer.clear()
+                    buffered_size = 0
+                else:
+                    yield b":\n\n"
                 continue
 
             try:
                 item = pending.result()
             except StopAsyncIteration:
                 break
+            except Exception:
+                # Frames produced before the error still reach the client
+                if buffer:
+                    yield b"".join(buffer)
+                raise
+
+            if not coalesce:
+                yield item
+                pending = asyncio.create_task(agen.__anext__())
+                continue
 
-            yield item
+            if not buffer:
+                flush_at = loop.time() + coalesce_seconds
+            buffer.append(item)
+            buffered_size += len(item)
+            if buffered_size >= coalesce_size:
+                yield b"".join(buffer)
+                buffer.clear()
+                buffered_size = 0
             pending = asyncio.create_task(agen.__anext__())
 
+        if buffer:
+            yield b"".join(buffer)
+
     finally:
         if not pending.done():
             pending.cancel()
 
 
-def sse_session_event(session_id: Optional[str], is_new: bool = False) -> str:
+def sse_session_event(session_id: Optional[str], is_new: bool = False) -> bytes:
     """
     Generate session state SSE event
 
@@ -100,7 +167,7 @@ def sse_session_event(session_id: Optional[str], is_new: bool = False) -> str:
     })
 
 
-def sse_message_event(content: str) -> str:
+def sse_message_event(content: str) -> bytes:
     """
     Generate message content SSE event
 
@@ -116,7 +183,7 @@ def sse_message_event(content: str) -> str:
     })
 
 
-def sse_tool_use_event(tool_id: str, tool_name: str, tool_input: dict) -> str:
+def sse_tool_use_event(tool_id: str, tool_name: str, tool_input: dict) -> bytes:
     """Generate tool use SSE event with full details"""
     sanitized_input = _sanitize_tool_input(tool_name, tool_input or {})
     return format_sse_event({
@@ -146,7 +213,7 @@ def _sanitize_tool_input(tool_name: str, tool_input: dict) -> dict:
     return result if result else {'_raw': str(tool_input)[:100]}
 
 
-def sse_done_event(duration_ms: Optional[int] = None) -> str:
+def sse_done_event(duration_ms: Optional[int] = None) -> bytes:
     """
     Generate completion SSE event
 
@@ -162,7 +229,7 @@ def sse_done_event(duration_ms: Optional[int] = None) -> str:
     return format_sse_event(data)
 
 
-def sse_error_event(message: str) -> str:
+def sse_error_event(message: str) -> bytes:
     """
     Generate error SSE event
 
@@ -181,7 +248,7 @@ def sse_error_event(message: str) -> str:
 async def process_agent_messages(
     message_generator: AsyncGenerator,
     content_filter: Optional[Callable[[str], tuple[str, Any]]] = None
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Process Agent messages and convert to SSE events
 
@@ -190,10 +257,8 @@ async def process_agent_messages(
         content_filter: Optional content filter function (content) -> (filtered_content, metadata)
 
     Yields:
-        SSE formatted event strings
+        SSE formatted event bytes
     """
-    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
-
     async for msg in message_generator:
         if isinstance(msg, AssistantMessage):
             for block in msg.content:
@@ -10,6 +10,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
+
 from backend.services.kb_service_factory import get_user_service
 from backend.services.session_manager import get_session_manager
 from backend.api.streaming_utils import (
@@ -119,8 +121,6 @@ async def user_query_stream(
                 Important: extract real SDK session ID from ResultMessage and save
                 """
                 try:
-                    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
-
                     # Send session status information
                     yield sse_session_event(sdk_session_id, is_new=is_new_session)
 
@@ -187,8 +187,6 @@ async def user_query_stream(
             async def event_generator():
                 """SSE event generator (based on session_id, legacy mode without resume)"""
                 try:
-                    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock, ResultMessage
-
                     # Send session ID
                     yield sse_session_event(session.session_id)
 
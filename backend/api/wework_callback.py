@@ -178,7 +178,7 @@ async def process_wework_message(message_data: dict):
         return
 
     content = message_data.get('Content', '')
-    logger.info(f"Processing text message from {sender_userid}: {content[:50]}...")
+    logger.info("Processing text message from %s: %.50s...", sender_userid, content)
 
     try:
         # Step 1: User identity recognition (new)
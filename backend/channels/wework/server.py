@@ -15,9 +15,9 @@ import threading
 import sys
 from pathlib import Path
 
-# Set event loop policy (Windows compatibility)
-if sys.platform == 'win32':
-    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+# Set event loop policy (Windows compatibility, uvloop elsewhere)
+from backend.utils.event_loop import install_event_loop_policy
+install_event_loop_policy()
 
 # Load environment variables
 import os
@@ -207,7 +207,7 @@ async def process_message(request_data: dict):
     try:
         # Parse message
         channel_msg = await adapter.parse_message(request_data)
-        logger.info(f"Parsed message from {channel_msg.user.user_id}: {channel_msg.content[:50]}...")
+        logger.info("Parsed message from %s: %.50s...", channel_msg.user.user_id, channel_msg.content)
 
         # Only process text messages
         if channel_msg.msg_type != "text":
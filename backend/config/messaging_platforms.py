@@ -59,6 +59,34 @@ class MessagingPlatformConfig:
     env_vars: Dict[str, str] = field(default_factory=dict)
 
 
+@dataclass(frozen=True)
+class MessagingPlatformMeta:
+    """
+    Static identity of an implemented platform
+
+    Looking it up touches no PATH or environment, so a platform can be
+    registered without building its full MessagingPlatformConfig.
+
+    Attributes:
+        platform_type: Platform identifier
+        mcp_server_name: MCP server name (e.g., "wework")
+        redis_key_prefix: Redis key prefix for this platform (e.g., "wework")
+    """
+    platform_type: MessagingPlatformType
+    mcp_server_name: str
+    redis_key_prefix: str
+
+
+# Implemented platforms only; placeholders get an entry once their config exists
+PLATFORM_META_REGISTRY = {
+    MessagingPlatformType.WEWORK: MessagingPlatformMeta(
+        platform_type=MessagingPlatformType.WEWORK,
+        mcp_server_name="wework",
+        redis_key_prefix="wework",
+    ),
+}
+
+
 def get_wework_config() -> MessagingPlatformConfig:
     """
     Get WeChat Work (企业微信) platform configuration
@@ -101,12 +129,13 @@ def get_wework_config() -> MessagingPlatformConfig:
         "mcp__wework__wework_upload_media",
     ]
 
+    meta = PLATFORM_META_REGISTRY[MessagingPlatformType.WEWORK]
     return MessagingPlatformConfig(
         platform_type=MessagingPlatformType.WEWORK,
-        mcp_server_name="wework",
+        mcp_server_name=meta.mcp_server_name,
         mcp_config=mcp_config,
         tools=tools,
-        redis_key_prefix="wework",
+        redis_key_prefix=meta.redis_key_prefix,
         env_vars={
             "corp_id": "WEWORK_CORP_ID",
             "corp_secret": "WEWORK_CORP_SECRET",
@@ -177,11 +206,37 @@ def get_platform_config(platform: MessagingPlatformType) -> MessagingPlatformCon
     return config_func()
 
 
+def get_platform_meta(platform: MessagingPlatformType) -> MessagingPlatformMeta:
+    """
+    Get the static identity of a platform (without resolving its config)
+
+    Args:
+        platform: Platform type
+
+    Returns:
+        Platform metadata
+
+    Raises:
+        ValueError: If platform not supported
+        NotImplementedError: If platform is a placeholder (no integration yet)
+    """
+    if platform not in PLATFORM_CONFIG_REGISTRY:
+        raise ValueError(f"Unsupported platform: {platform}")
+
+    meta = PLATFORM_META_REGISTRY.get(platform)
+    if meta is None:
+        raise NotImplementedError(f"{platform.value} integration not yet implemented")
+    return meta
+
+
 __all__ = [
     "MessagingPlatformType",
     "MCPServerConfig",
     "MessagingPlatformConfig",
+    "MessagingPlatformMeta",
     "get_platform_config",
+    "get_platform_meta",
     "get_wework_config",
     "PLATFORM_CONFIG_REGISTRY",
+    "PLATFORM_META_REGISTRY",
 ]
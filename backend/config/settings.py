@@ -71,6 +71,14 @@ class Settings(BaseSettings):
     USER_CLIENT_POOL_SIZE: int = 3  # User service pool size (high-frequency queries)
     ADMIN_CLIENT_POOL_SIZE: int = 2     # Admin service pool size (low-frequency operations)
     CLIENT_POOL_MAX_WAIT: int = 30      # Maximum wait time to acquire client (seconds)
+    CLIENT_POOL_WARMUP: int = 0         # Clients to connect concurrently at startup to warm the CLI (0 = off)
+    CLAUDE_RETRY_CAP_SECONDS: float = 8.0   # Upper bound of a single retry backoff (seconds)
+    CLAUDE_RETRY_DEADLINE: float = 30.0     # Give up retrying once this much time has passed (seconds)
+    KB_SERVICE_LAZY_INIT: bool = False      # Initialize each KB service on its first query instead of at startup
+
+    # SSE streaming configuration
+    CLAUDE_STREAM_COALESCE_BYTES: int = 4096  # Flush a coalesced SSE frame at this size (0 disables)
+    CLAUDE_STREAM_COALESCE_MS: int = 10       # Max delay before flushing a coalesced SSE frame
 
     # Feishu (飞书) configuration
     FEISHU_APP_ID: Optional[str] = None
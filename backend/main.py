@@ -39,25 +39,42 @@ if os.getenv("CLAUDE_API_KEY"):
     print(f"✅ ANTHROPIC_API_KEY loaded (ends with: ...{os.getenv('CLAUDE_API_KEY')[-4:]})")
 
 # Now it's safe to import other modules
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from backend.config.settings import settings
-from backend.services.kb_service_factory import get_admin_service, get_user_service
+from backend.services.kb_service_factory import KBServiceFactory
+from backend.services.routing_session_manager import get_routing_session_manager
 from backend.services.session_manager import get_session_manager
 from backend.storage.redis_storage import RedisSessionStorage
 
 # Configure logging
+# File/console writes happen on a QueueListener thread, so log calls made
+# from coroutines only enqueue the record instead of blocking the event loop
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('logs/app.log'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_queue_handler = QueueHandler(_log_queue)
+# Only merge message + args here; the listener's handlers apply the full format
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
     level=settings.LOG_LEVEL,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[_queue_handler]
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
@@ -102,15 +119,9 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️  Redis storage initialization failed: {e}, will use in-memory storage")
         logger.info("✅ In-memory storage initialized successfully")
 
-    # Initialize Admin Service (dual Agent architecture)
-    admin_service = get_admin_service()
-    await admin_service.initialize()
-    logger.info("Admin Service initialized (kb_admin_agent.py)")
-
-    # Initialize User Service (dual Agent architecture)
-    user_service = get_user_service()
-    await user_service.initialize()
-    logger.info("User Service initialized (kb_qa_agent.py)")
+    # Initialize Admin and User Services concurrently (dual Agent architecture)
+    await KBServiceFactory.initialize_all()
+    logger.info("Admin Service (kb_admin_agent.py) and User Service (kb_qa_agent.py) initialized")
 
     # Start SessionManager cleanup task
     await session_manager.start_cleanup_task()
@@ -123,6 +134,9 @@ async def lifespan(app: FastAPI):
     # Cleanup on shutdown
     logger.info("Shutting down...")
     await session_manager.stop_cleanup_task()
+    # Drain buffered user session index writes
+    await get_routing_session_manager().flush()
+    await KBServiceFactory.shutdown_all()
     logger.info("Application shutdown complete")
 
 
@@ -10,7 +10,7 @@ Data structure design:
 
 from enum import Enum
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 
 
@@ -53,13 +53,26 @@ class SessionSummary(BaseModel):
     version: int = Field(default=0, description="Optimistic lock version number")
 
 
+# Fields the Session Router reads from a candidate Session (see the input
+# format in session_router_agent); storage internals are left out
+_ROUTER_VIEW_FIELDS = {
+    "session_id": True,
+    "status": True,
+    "summary": {"original_question", "latest_exchange", "key_points"},
+    "related_user_id": True,
+    "domain": True,
+    "created_at": True,
+    "last_active_at": True,
+}
+
+
 class Session(BaseModel):
     """
     Session complete data structure
 
     Redis storage:
     - session:{session_id} -> Session JSON
-    - user_sessions:{user_id} -> Set[session_id]
+    - user_sessions:{user_id}:as_user / :as_expert -> ZSet[session_id] (score: last_active_at)
     - session_history:{session_id} -> List[Message JSON]
 
     TTL strategy:
@@ -90,6 +103,15 @@ class Session(BaseModel):
     message_count: int = Field(default=0, description="Message count")
     tags: List[str] = Field(default_factory=list, description="Tags (Agent dynamically added)")
 
+    def to_router_view(self) -> Dict[str, Any]:
+        """
+        Compact, JSON-ready projection of the Session for the Router prompt
+
+        Drops storage fields (full_context_key, expires_at, summary version,
+        ...) and unset expert fields; datetimes become ISO strings.
+        """
+        return self.model_dump(mode="json", include=_ROUTER_VIEW_FIELDS, exclude_none=True)
+
 
 class SessionQueryResult(BaseModel):
     """
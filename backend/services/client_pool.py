@@ -17,6 +17,8 @@ Usage:
 
 import asyncio
 import logging
+import time
+from collections import deque
 from typing import Optional, Callable
 from contextlib import asynccontextmanager
 
@@ -34,6 +36,14 @@ class SDKClientPool:
     - Create new client for each request (avoid cross-task issues)
     - Dynamically resume user session via resume parameter
     - Support concurrency, each request gets exclusive use of a Client
+
+    Lock scope:
+    - The semaphore is the only synchronization point on the acquire path;
+      when a slot is free it is taken without allocating a waiter future
+    - connect()/disconnect() and the whole query run outside of any pool lock,
+      so a slow connect never blocks other acquirers (no head-of-line blocking)
+    - Statistics counters are updated without awaiting, which is atomic on a
+      single event loop and needs no asyncio.Lock
     """
 
     def __init__(
@@ -58,10 +68,14 @@ class SDKClientPool:
         # Use semaphore to control concurrency
         self._semaphore = asyncio.Semaphore(pool_size)
 
-        # Statistics
+        # Statistics (only mutated between awaits, no lock needed)
         self._active_count = 0
         self._total_requests = 0
-        self._lock = asyncio.Lock()
+        self._waiting_count = 0
+        self._peak_waiting_count = 0
+        self._timeout_count = 0
+        # Recent acquire wait times (ms), bounded window for percentiles
+        self._wait_samples_ms: deque = deque(maxlen=1024)
 
         # Is pool initialized
         self.is_initialized = True  # Using semaphore, no initialization needed
@@ -73,6 +87,41 @@ class SDKClientPool:
         logger.info(f"SDKClientPool ready (max_concurrency={self.pool_size})")
         self.is_initialized = True
 
+    async def warmup(self, count: int) -> int:
+        """
+        Connect and disconnect up to count clients concurrently
+
+        Clients cannot outlive the task that connected them, so nothing is
+        kept; this only pays the first-spawn cost (CLI start-up, cold OS page
+        cache) before real traffic arrives. Not counted in request stats.
+
+        Args:
+            count: Number of clients to warm (capped at pool_size)
+
+        Returns:
+            Number of clients that connected successfully
+        """
+        count = min(count, self.pool_size)
+
+        async def _warm_one():
+            async with self._semaphore:
+                client = ClaudeSDKClient(options=self.options_factory(None))
+                try:
+                    await client.connect()
+                finally:
+                    try:
+                        await client.disconnect()
+                    except Exception as e:
+                        logger.warning("Error disconnecting warmup client: %s", e)
+
+        results = await asyncio.gather(*(_warm_one() for _ in range(count)), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            logger.warning("Pool warmup: %d/%d clients failed: %s", len(failures), count, failures[0])
+
+        logger.info(f"SDKClientPool warmed {count - len(failures)}/{count} clients")
+        return count - len(failures)
+
     async def shutdown(self):
         """Shutdown connection pool"""
         logger.info("SDKClientPool shutdown complete")
@@ -89,19 +138,31 @@ class SDKClientPool:
         Args:
             session_id: Session ID to resume (optional)
         """
-        # Wait for semaphore (with timeout)
-        try:
-            acquired = await asyncio.wait_for(
-                self._semaphore.acquire(),
-                timeout=self.max_wait_time
-            )
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout waiting for available client slot (waited {self.max_wait_time}s)")
-            raise
+        if not self._semaphore.locked():
+            # Fast path: free slot and no queued waiters, acquire() completes
+            # without creating a waiter future or a wait_for() task
+            await self._semaphore.acquire()
+            self._wait_samples_ms.append(0.0)
+        else:
+            # Slow path: wait for semaphore (with timeout)
+            self._waiting_count += 1
+            self._peak_waiting_count = max(self._peak_waiting_count, self._waiting_count)
+            wait_start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(),
+                    timeout=self.max_wait_time
+                )
+            except asyncio.TimeoutError:
+                self._timeout_count += 1
+                logger.error(f"Timeout waiting for available client slot (waited {self.max_wait_time}s)")
+                raise
+            finally:
+                self._waiting_count -= 1
+            self._wait_samples_ms.append((time.perf_counter() - wait_start) * 1000)
 
-        async with self._lock:
-            self._active_count += 1
-            self._total_requests += 1
+        self._active_count += 1
+        self._total_requests += 1
 
         client = None
         disconnected = False
@@ -130,7 +191,7 @@ class SDKClientPool:
                 client = ClaudeSDKClient(options=options)
                 await client.connect()
 
-            logger.debug(f"Client connected (session={session_id or 'new'}, active={self._active_count})")
+            logger.debug("Client connected (session=%s, active=%d)", session_id or 'new', self._active_count)
 
             yield client
 
@@ -149,27 +210,52 @@ class SDKClientPool:
             if client and not disconnected:
                 try:
                     await client.disconnect()
-                    logger.debug(f"Client disconnected (session={session_id or 'new'})")
+                    logger.debug("Client disconnected (session=%s)", session_id or 'new')
                 except Exception as e:
                     logger.warning("Error disconnecting client: %s", e)
 
             # Release semaphore (must execute)
             self._semaphore.release()
-            logger.debug(f"Semaphore released (session={session_id or 'new'})")
+            logger.debug("Semaphore released (session=%s)", session_id or 'new')
 
-            async with self._lock:
-                self._active_count -= 1
+            self._active_count -= 1
 
     def get_stats(self) -> dict:
-        """Get connection pool statistics"""
+        """
+        Get connection pool statistics
+
+        Besides occupancy, reports queue pressure (waiting/peak_waiting/
+        acquire_timeouts) and acquire wait percentiles over the most recent
+        requests, for sizing *_CLIENT_POOL_SIZE and CLIENT_POOL_MAX_WAIT.
+        """
         return {
             "max_concurrency": self.pool_size,
             "active_clients": self._active_count,
             "available_slots": self.pool_size - self._active_count,
             "total_requests": self._total_requests,
+            "waiting": self._waiting_count,
+            "peak_waiting": self._peak_waiting_count,
+            "acquire_timeouts": self._timeout_count,
+            "acquire_wait_ms": self._wait_percentiles(),
             "is_initialized": self.is_initialized
         }
 
+    def _wait_percentiles(self) -> dict:
+        """Acquire wait time percentiles (ms) over the recent sample window"""
+        samples = sorted(self._wait_samples_ms)
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def percentile(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+
+        return {
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(samples[-1], 3)
+        }
+
 
 # Singleton manager
 class PoolManager:
@@ -201,6 +287,27 @@ class PoolManager:
         logger.info(f"Registered pool '{name}' (max_concurrency={pool_size})")
         return pool
 
+    @classmethod
+    def get_or_create(
+        cls,
+        key: str,
+        pool_size: int,
+        options_factory: Callable[[Optional[str]], ClaudeAgentOptions],
+        max_wait_time: float = 30.0
+    ) -> SDKClientPool:
+        """
+        Get the pool registered under key, creating it on first use
+
+        Services whose options are identical derive the same key and share
+        one pool (one concurrency budget) instead of each creating their own.
+        """
+        pool = cls._pools.get(key)
+        if pool is not None:
+            logger.info(f"Reusing pool '{key}' (max_concurrency={pool.pool_size})")
+            return pool
+
+        return cls.register_pool(key, pool_size, options_factory, max_wait_time)
+
     @classmethod
     def get_pool(cls, name: str) -> Optional[SDKClientPool]:
         """Get connection pool"""
@@ -208,9 +315,10 @@ class PoolManager:
 
     @classmethod
     async def initialize_all(cls):
-        """Initialize all connection pools"""
+        """Initialize all connection pools (concurrently)"""
         logger.info(f"Initializing {len(cls._pools)} pools...")
-        for name, pool in cls._pools.items():
+
+        async def _initialize(name: str, pool: SDKClientPool):
             try:
                 await pool.initialize()
                 logger.info(f"✅ Pool '{name}' initialized")
@@ -218,6 +326,8 @@ class PoolManager:
                 logger.error(f"❌ Failed to initialize pool '{name}': {e}")
                 raise
 
+        await asyncio.gather(*(_initialize(name, pool) for name, pool in cls._pools.items()))
+
     @classmethod
     async def shutdown_all(cls):
         """Shutdown all connection pools"""
@@ -12,12 +12,21 @@ Concurrency support: Use SDKClientPool to achieve true multi-user concurrency
 
 import logging
 import os
+import sys
+import shutil
 import asyncio
+import threading
 import json
-from typing import AsyncIterator, Optional, Callable
+import functools
+import hashlib
+import random
+from dataclasses import replace
+from types import MappingProxyType
+from typing import AsyncIterator, Optional, Callable, Mapping
 from pathlib import Path
 
 from claude_agent_sdk import (
+    AgentDefinition,
     ClaudeSDKClient,
     ClaudeAgentOptions,
     Message,
@@ -30,7 +39,7 @@ from claude_agent_sdk import (
 from backend.agents.kb_qa_agent import get_user_agent_definition
 from backend.agents.kb_admin_agent import get_admin_agent_definition
 from backend.config.settings import get_settings
-from backend.config.run_mode import get_run_mode, get_im_channel, is_standalone
+from backend.config.run_mode import get_run_mode, get_im_channel
 from backend.tools.image_read import image_read_handler
 from backend.services.client_pool import SDKClientPool, get_pool_manager
 
@@ -51,7 +60,7 @@ async def _run_claude_print_json(
     *,
     prompt: str,
     cwd: str,
-    env: dict[str, str],
+    env: Mapping[str, str],
     allowed_tools: list[str],
     append_system_prompt: str,
     resume: Optional[str],
@@ -203,351 +212,210 @@ def _is_transient_upstream_error(exc: Exception) -> bool:
     return any(marker in msg for marker in transient_markers)
 
 
-class KBUserService:
-    """
-    User-side Knowledge Base Service
+def _retry_backoff_seconds(attempt: int, cap_seconds: float) -> float:
+    """Capped exponential backoff (0.5s base) with jitter to spread retry bursts"""
+    backoff = min(cap_seconds, 0.5 * (2 ** (attempt - 1)))
+    return backoff * random.uniform(0.5, 1.5)
 
-    Responsibilities:
-    - Knowledge query (6-stage retrieval)
-    - Satisfaction feedback
-    - Domain expert routing
-    - Asynchronous multi-turn conversation management
 
-    Features:
-    - Lightweight (no document conversion)
-    - WeChat Work MCP integration
+# Tools shared by User and Admin agents
+_COMMON_TOOLS = (
+    "Read",
+    "Grep",
+    "Glob",
+    "Write",
+    "Bash",  # Document conversion via smart_convert.py, Python scripts
+    "Skill",  # Enable Claude Code Skills
+    # Image Vision MCP tool
+    "mcp__image_vision__image_read",
+)
 
-    Concurrency support:
-    - Use SDKClientPool for true concurrency
-    - Each request gets exclusive use of a Client
-    - Resume user session via resume parameter
-    """
+# Channel-specific MCP tools (prefixed with mcp__{channel}__ in IM mode)
+_IM_TOOL_NAMES = (
+    "send_text_message",
+    "send_markdown_message",
+    "send_image_message",
+    "send_file_message",
+    "upload_media",
+)
 
-    def __init__(self):
-        """Initialize user-side service"""
-        self.settings = get_settings()
-        self.client_pool: Optional[SDKClientPool] = None
-        self.is_initialized = False
-        self._use_print_json = _should_use_claude_print_json(self.settings.ANTHROPIC_BASE_URL)
+# Agent definitions are pure functions of their parameters, render each prompt once
+_get_user_agent_definition = functools.lru_cache(maxsize=8)(get_user_agent_definition)
+_get_admin_agent_definition = functools.lru_cache(maxsize=8)(get_admin_agent_definition)
 
-        # Cache MCP servers configuration (set in initialize)
-        self._mcp_servers = None
-        self._env_vars = None
-        self._user_agent_def = None
-
-        logger.info("KBUserService instance created")
-
-    def _get_allowed_tools(self) -> list:
-        """Get allowed tools list based on run mode"""
-        tools = [
-            "Read",
-            "Grep",
-            "Glob",
-            "Write",
-            "Bash",
-            "Skill",  # Enable Claude Code Skills
-            # Image Vision MCP tool
-            "mcp__image_vision__image_read",
-        ]
-
-        # Add channel-specific tools in IM mode
-        im_channel = get_im_channel()
-        if im_channel:
-            tools.extend([
-                f"mcp__{im_channel}__send_text_message",
-                f"mcp__{im_channel}__send_markdown_message",
-                f"mcp__{im_channel}__send_image_message",
-                f"mcp__{im_channel}__send_file_message",
-                f"mcp__{im_channel}__upload_media",
-            ])
-
-        return tools
-
-    def _get_im_mcp_command(self, channel: str) -> str:
-        """Get IM MCP command path"""
-        import sys
-        import shutil
-
-        mcp_name = f"{channel}-mcp"
-        mcp_path = shutil.which(mcp_name)
-        if not mcp_path:
-            venv_path = Path(sys.executable).parent / mcp_name
-            if venv_path.exists():
-                mcp_path = str(venv_path)
-            else:
-                logger.warning(f"{mcp_name} not found in PATH or venv, using '{mcp_name}' (may fail)")
-                mcp_path = mcp_name
 
-        return mcp_path
+def _build_allowed_tools(im_channel: Optional[str]) -> list:
+    """Get allowed tools list based on run mode"""
+    tools = list(_COMMON_TOOLS)
 
-    def _create_options(self, sdk_session_id: Optional[str] = None) -> ClaudeAgentOptions:
-        """
-        Create ClaudeAgentOptions (Options Factory)
+    # Add channel-specific tools in IM mode
+    if im_channel:
+        tools.extend(f"mcp__{im_channel}__{name}" for name in _IM_TOOL_NAMES)
 
-        Args:
-            sdk_session_id: Real session ID returned by SDK (optional)
-                           - None: New session, don't set resume
-                           - str: Existing session, set resume to restore session
+    return tools
 
-        Returns:
-            Configured ClaudeAgentOptions
-        """
-        kb_path = Path(self.settings.KB_ROOT_PATH)
-
-        options = ClaudeAgentOptions(
-            system_prompt={
-                "type": "preset",
-                "preset": "claude_code",
-                "append": f"\n\n{self._user_agent_def.prompt}"
-            },
-            agents=None,  # Single Agent architecture
-            mcp_servers=self._mcp_servers,
-            allowed_tools=self._get_allowed_tools(),
-            cwd=str(kb_path),  # Knowledge base directory as Agent working directory
-            permission_mode="acceptEdits",
-            env=self._env_vars,
-            setting_sources=["project"],  # Enable project-level Skills, load from .claude/skills/
-            # Disable extended thinking (third-party API proxy incompatible with thinking mode)
-            max_thinking_tokens=0
-        )
 
-        # If SDK session ID provided, set resume parameter to restore session
-        if sdk_session_id:
-            options.resume = sdk_session_id
-            logger.debug(f"Setting resume to SDK session: {sdk_session_id}")
+def _build_system_prompt(agent_prompt: str) -> dict:
+    """Build preset system prompt with the agent prompt appended"""
+    return {
+        "type": "preset",
+        "preset": "claude_code",
+        "append": f"\n\n{agent_prompt}"
+    }
 
-        return options
 
-    async def initialize(self):
-        """Initialize User Agent connection pool"""
-        if self.is_initialized:
-            logger.warning("User service already initialized")
-            return
+# KB_ROOT_PATH values already checked/created in this process (shared by services)
+_ensured_paths: set[str] = set()
 
-        try:
-            # Check authentication
-            if not self.settings.CLAUDE_API_KEY and not self.settings.ANTHROPIC_AUTH_TOKEN:
-                raise ValueError("Missing authentication: CLAUDE_API_KEY or ANTHROPIC_AUTH_TOKEN")
 
-            # Knowledge base path
-            kb_path = Path(self.settings.KB_ROOT_PATH)
-            if not kb_path.exists():
-                kb_path.mkdir(parents=True, exist_ok=True)
+async def _ensure_kb_path(kb_path: Path) -> None:
+    """Create the knowledge base directory once per process (off the event loop)"""
+    path_str = str(kb_path)
+    if path_str in _ensured_paths:
+        return
+    # stat/mkdir can block on slow filesystems (NFS, overlayfs)
+    await asyncio.to_thread(kb_path.mkdir, parents=True, exist_ok=True)
+    _ensured_paths.add(path_str)
 
-            # Prepare environment variables (cached for _create_options)
-            self._env_vars = {
-                "KB_ROOT_PATH": str(kb_path),
-            }
 
-            if self.settings.CLAUDE_API_KEY:
-                self._env_vars["ANTHROPIC_API_KEY"] = self.settings.CLAUDE_API_KEY
-            else:
-                self._env_vars["ANTHROPIC_AUTH_TOKEN"] = self.settings.ANTHROPIC_AUTH_TOKEN
-                if self.settings.ANTHROPIC_BASE_URL:
-                    self._env_vars["ANTHROPIC_BASE_URL"] = self.settings.ANTHROPIC_BASE_URL
+@functools.lru_cache(maxsize=1)
+def _get_image_vision_server():
+    """Create the SDK MCP server for image_read tool (shared by all services)"""
+    return create_sdk_mcp_server(
+        name="image_vision",
+        version="1.0.0",
+        tools=[image_read_handler]
+    )
 
-            # Get User Agent definition (cached for _create_options)
-            run_mode = get_run_mode()
-            self._user_agent_def = get_user_agent_definition(
-                small_file_threshold_kb=self.settings.SMALL_FILE_KB_THRESHOLD,
-                faq_max_entries=self.settings.FAQ_MAX_ENTRIES,
-                run_mode=run_mode.value
-            )
-            logger.info(f"User Agent definition created with run_mode={run_mode.value}")
 
-            # Configure MCP servers (cached for _create_options)
-            # Create SDK MCP server for image_read tool
-            image_vision_server = create_sdk_mcp_server(
-                name="image_vision",
-                version="1.0.0",
-                tools=[image_read_handler]
-            )
+@functools.lru_cache(maxsize=8)
+def _resolve_im_mcp_command(channel: str) -> str:
+    """Get IM MCP command path (PATH lookup and venv probe run once per channel)"""
+    mcp_name = f"{channel}-mcp"
+    mcp_path = shutil.which(mcp_name)
+    if not mcp_path:
+        venv_path = Path(sys.executable).parent / mcp_name
+        if venv_path.exists():
+            mcp_path = str(venv_path)
+        else:
+            logger.warning(f"{mcp_name} not found in PATH or venv, using '{mcp_name}' (may fail)")
+            mcp_path = mcp_name
 
-            self._mcp_servers = {
-                "image_vision": image_vision_server
-            }
+    return mcp_path
 
-            if self._use_print_json:
-                # Avoid initializing streaming SDK clients; use `claude -p --output-format json` per request.
-                self.is_initialized = True
-                logger.warning(
-                    "User service running in non-interactive Claude Code mode (print+json). "
-                    "Streaming and SDK MCP servers are disabled in this mode."
-                )
-                return
 
-            # Add corresponding channel's MCP server in IM mode
-            im_channel = get_im_channel()
-            if im_channel:
-                mcp_path = self._get_im_mcp_command(im_channel)
-                logger.info(f"Using {im_channel}-mcp at: {mcp_path}")
-
-                # Get environment variables for the corresponding channel
-                channel_upper = im_channel.upper()
-                self._mcp_servers[im_channel] = {
-                    "type": "stdio",
-                    "command": mcp_path,
-                    "args": [],
-                    "env": {
-                        f"{channel_upper}_CORP_ID": os.getenv(f"{channel_upper}_CORP_ID", ""),
-                        f"{channel_upper}_CORP_SECRET": os.getenv(f"{channel_upper}_CORP_SECRET", ""),
-                        f"{channel_upper}_AGENT_ID": os.getenv(f"{channel_upper}_AGENT_ID", ""),
-                    }
-                }
-            else:
-                logger.info("Standalone mode: No IM MCP server loaded")
+@functools.lru_cache(maxsize=1)
+def _resolve_claude_cli_path() -> Optional[str]:
+    """
+    Resolve Claude Code CLI path once
 
-            # Create connection pool
-            pool_size = self.settings.USER_CLIENT_POOL_SIZE
-            max_wait = self.settings.CLIENT_POOL_MAX_WAIT
+    Passed as ClaudeAgentOptions.cli_path so the SDK skips its PATH walk and
+    install-location probes on every client connect. None lets the SDK search
+    (and raise its CLINotFoundError) as before.
+    """
+    return shutil.which("claude")
 
-            self.client_pool = SDKClientPool(
-                pool_size=pool_size,
-                options_factory=self._create_options,
-                max_wait_time=float(max_wait)
-            )
 
-            # Initialize connection pool
-            logger.info(f"Initializing User client pool (size={pool_size})...")
-            await self.client_pool.initialize()
+_cli_health_checked = False
 
-            self.is_initialized = True
-            logger.info("✅ User service initialized successfully")
-            logger.info(f"   Pool size: {pool_size}")
-            logger.info(f"   MCP Servers: {list(self._mcp_servers.keys())}")
 
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize user service: {e}")
-            raise
+async def _check_claude_cli_health(cli_path: Optional[str]) -> None:
+    """
+    One-off Claude Code CLI health check at service startup
 
-    async def query(
-        self,
-        user_message: str,
-        sdk_session_id: Optional[str] = None,
-        user_id: Optional[str] = None
-    ) -> AsyncIterator[Message]:
-        """
-        Process user query (using connection pool to support concurrency)
+    The SDK spawns `claude -v` before every connect() (up to 2s per request).
+    Run the check once here; when it succeeds, the per-connect check is
+    disabled via CLAUDE_AGENT_SDK_SKIP_VERSION_CHECK.
+    """
+    global _cli_health_checked
+    if _cli_health_checked or not cli_path:
+        return
+    _cli_health_checked = True
 
-        Args:
-            user_message: User message
-            sdk_session_id: SDK session ID (for resume to restore session)
-                           - None: New session
-                           - str: Existing session, restore context
-            user_id: User WeChat Work UserID (optional)
+    proc = None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            cli_path,
+            "-v",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout_b, _ = await asyncio.wait_for(proc.communicate(), timeout=5)
+    except Exception as e:
+        logger.warning(f"Claude Code CLI health check failed ({cli_path}): {e}")
+        if proc and proc.returncode is None:
+            proc.kill()
+        return
 
-        Yields:
-            Message stream (includes ResultMessage with real session_id)
-        """
-        if not self.is_initialized:
-            await self.initialize()
+    if proc.returncode != 0:
+        logger.warning(f"Claude Code CLI health check failed ({cli_path}): exit code {proc.returncode}")
+        return
 
-        logger.info(f"User query from {user_id or 'unknown'}: {user_message[:100]}...")
+    version = (stdout_b or b"").decode("utf-8", errors="replace").strip()
+    logger.info(f"Claude Code CLI: {cli_path} ({version or 'unknown version'})")
+    os.environ.setdefault("CLAUDE_AGENT_SDK_SKIP_VERSION_CHECK", "1")
 
-        if self._use_print_json:
-            kb_path = Path(self.settings.KB_ROOT_PATH)
-            assistant, result = await _run_claude_print_json(
-                prompt=user_message,
-                cwd=str(kb_path),
-                env=self._env_vars or {},
-                allowed_tools=self._get_allowed_tools(),
-                append_system_prompt=f"\n\n{self._user_agent_def.prompt}",
-                resume=sdk_session_id,
-            )
-            yield assistant
-            yield result
-            return
 
-        max_attempts = 2
-        for attempt in range(1, max_attempts + 1):
-            message_count = 0
-            try:
-                # Acquire client from pool (supports session resume)
-                is_resume = sdk_session_id is not None
-                logger.info(
-                    f"📤 Acquiring client from pool (resume={is_resume}, sdk_session={sdk_session_id or 'new'})..."
-                )
-                async with self.client_pool.acquire(session_id=sdk_session_id) as client:
-                    logger.info("✅ Client acquired, sending query...")
+@functools.lru_cache(maxsize=8)
+def _get_im_mcp_env(channel: str) -> Mapping[str, str]:
+    """
+    Get environment variables for the channel's MCP server
 
-                    # Send query (no longer pass session_id, controlled by ClaudeAgentOptions.resume)
-                    await client.query(user_message)
-                    logger.info("✅ Query sent successfully, waiting for response...")
+    Read once per process (values are fixed after startup); missing values
+    are reported here instead of silently passing "" on every pool client.
+    Returned read-only since the cached mapping is shared by all callers.
+    """
+    channel_upper = channel.upper()
+    keys = (
+        f"{channel_upper}_CORP_ID",
+        f"{channel_upper}_CORP_SECRET",
+        f"{channel_upper}_AGENT_ID",
+    )
+    environ = os.environ
+    env = {key: environ.get(key, "") for key in keys}
 
-                    # Receive response
-                    logger.info("🔄 Starting to receive response stream...")
-                    async for message in client.receive_response():
-                        message_count += 1
-                        logger.debug(f"📨 Received message {message_count}: type={type(message).__name__}")
-                        yield message
+    missing = [key for key, value in env.items() if not value]
+    if missing:
+        logger.warning(f"{channel}-mcp environment variables not set: {', '.join(missing)}")
 
-                logger.info(f"✅ Response stream completed, total messages: {message_count}")
-                logger.info("✅ Client released")
+    return MappingProxyType(env)
 
-                if message_count == 0:
-                    logger.error("❌ No response from Claude API")
-                    logger.error(f"   SDK Session: {sdk_session_id or 'new'}")
-                    logger.error(f"   User ID: {user_id}")
-                    logger.error("   This may indicate:")
-                    logger.error("   - API account insufficient balance")
-                    logger.error("   - API rate limit exceeded")
-                    logger.error("   - Network timeout")
-                else:
-                    logger.info(f"✅ Received {message_count} messages from Claude API")
 
-                return
+def _build_mcp_servers(im_channel: Optional[str]) -> dict:
+    """
+    Build MCP servers configuration
 
-            except asyncio.CancelledError:
-                raise
-            except Exception as e:
-                is_last = attempt >= max_attempts
-                should_retry = (not is_last) and (message_count == 0) and _is_transient_upstream_error(e)
-
-                logger.error("❌ Claude API call failed")
-                logger.error(f"   Error type: {type(e).__name__}")
-                logger.error(f"   Error message: {str(e)}")
-                logger.error(f"   SDK Session: {sdk_session_id or 'new'}")
-                logger.error(f"   User ID: {user_id}")
-                logger.error(f"   Attempt: {attempt}/{max_attempts}")
-                logger.error("   This may indicate:")
-                logger.error("   - Invalid API key or token")
-                logger.error("   - API account insufficent balance (欠费)")
-                logger.error("   - Exceeded rate limits")
-                logger.error("   - API service unavailable")
-                logger.error("   - Transient network issues")
-                logger.error("   Stack:", exc_info=True)
-
-                if should_retry:
-                    backoff_seconds = 0.5 * (2 ** (attempt - 1))
-                    logger.warning(
-                        "⚠️  Transient upstream error before any response; retrying in %.1fs (attempt %d/%d)",
-                        backoff_seconds,
-                        attempt + 1,
-                        max_attempts
-                    )
-                    await asyncio.sleep(backoff_seconds)
-                    continue
-                raise
+    Args:
+        im_channel: IM channel name (None in standalone mode)
 
-    def get_pool_stats(self) -> dict:
-        """Get connection pool statistics"""
-        if self.client_pool:
-            return self.client_pool.get_stats()
-        return {"status": "not_initialized"}
+    Returns:
+        New dict per call; the image_vision server instance is shared
+    """
+    mcp_servers = {
+        "image_vision": _get_image_vision_server()
+    }
 
+    # Add corresponding channel's MCP server in IM mode
+    if im_channel:
+        mcp_servers[im_channel] = {
+            "type": "stdio",
+            "command": _resolve_im_mcp_command(im_channel),
+            "args": [],
+            # Plain dict: the SDK serializes MCP configs to JSON for the CLI
+            "env": dict(_get_im_mcp_env(im_channel))
+        }
 
-class KBAdminService:
-    """
-    Admin-side Knowledge Base Service
+    return mcp_servers
 
-    Responsibilities:
-    - Document ingestion (5-stage processing)
-    - Knowledge base management
-    - Batch employee notifications
 
-    Features:
-    - Full functionality (smart_convert.py document conversion + wework MCP)
-    - SSE streaming response support
+class _BaseKBService:
+    """
+    Shared implementation of the User and Admin knowledge base services
+
+    Both services run the same pipeline (options factory, MCP servers,
+    SDKClientPool, retrying query loop); they only differ in the agent
+    definition and the pool size setting. Subclasses set those as class
+    attributes.
 
     Concurrency support:
     - Use SDKClientPool for true concurrency
@@ -555,67 +423,77 @@ class KBAdminService:
     - Resume user session via resume parameter
     """
 
+    # Overridden by subclasses
+    _agent_def_getter: Callable[..., AgentDefinition]
+    _pool_size_setting_name: str
+    _service_name: str
+
     def __init__(self):
-        """Initialize admin-side service"""
+        """Initialize service"""
         self.settings = get_settings()
         self.client_pool: Optional[SDKClientPool] = None
         self.is_initialized = False
         self._use_print_json = _should_use_claude_print_json(self.settings.ANTHROPIC_BASE_URL)
+        self._init_lock = asyncio.Lock()
 
         # Cache configuration (set in initialize)
+        self._kb_path_str: Optional[str] = None
         self._mcp_servers = None
         self._env_vars = None
-        self._admin_agent_def = None
-
-        logger.info("KBAdminService instance created")
-
-    def _get_allowed_tools(self) -> list:
-        """Get allowed tools list based on run mode"""
-        tools = [
-            "Read",
-            "Write",
-            "Grep",
-            "Glob",
-            "Bash",  # Document conversion via smart_convert.py
-            "Skill",  # Enable Claude Code Skills
-            # Image Vision MCP tool
-            "mcp__image_vision__image_read",
-        ]
-
-        # Add channel-specific tools in IM mode
-        im_channel = get_im_channel()
-        if im_channel:
-            tools.extend([
-                f"mcp__{im_channel}__send_text_message",
-                f"mcp__{im_channel}__send_markdown_message",
-                f"mcp__{im_channel}__send_image_message",
-                f"mcp__{im_channel}__send_file_message",
-                f"mcp__{im_channel}__upload_media",
-            ])
-
-        return tools
-
-    def _get_im_mcp_command(self, channel: str) -> str:
-        """Get IM MCP command path"""
-        import sys
-        import shutil
-
-        mcp_name = f"{channel}-mcp"
-        mcp_path = shutil.which(mcp_name)
-        if not mcp_path:
-            venv_path = Path(sys.executable).parent / mcp_name
-            if venv_path.exists():
-                mcp_path = str(venv_path)
-            else:
-                logger.warning(f"{mcp_name} not found in PATH or venv, using '{mcp_name}' (may fail)")
-                mcp_path = mcp_name
+        self._agent_def = None
+        self._system_prompt = None
+        self._allowed_tools: tuple[str, ...] = ()
+        self._im_mcp_path: Optional[str] = None
+        self._options_template: Optional[ClaudeAgentOptions] = None
+        self._transient_retries = 0
+
+        logger.info(f"{type(self).__name__} instance created")
+
+    def _get_allowed_tools(self) -> tuple[str, ...]:
+        """Get allowed tools (computed once in initialize, fixed per run mode)"""
+        return self._allowed_tools
+
+    def _build_options(self) -> ClaudeAgentOptions:
+        """Build the ClaudeAgentOptions template shared by all pool clients"""
+        return ClaudeAgentOptions(
+            system_prompt=self._system_prompt,
+            agents=None,  # Single Agent architecture
+            mcp_servers=self._mcp_servers,
+            allowed_tools=list(self._get_allowed_tools()),
+            cwd=self._kb_path_str,  # Knowledge base directory as Agent working directory
+            permission_mode="acceptEdits",
+            cli_path=_resolve_claude_cli_path(),
+            env=self._env_vars,
+            setting_sources=["project"],  # Enable project-level Skills, load from .claude/skills/
+            # Disable extended thinking (third-party API proxy incompatible with thinking mode)
+            max_thinking_tokens=0
+        )
 
-        return mcp_path
+    def _pool_key(self) -> str:
+        """
+        Pool registry key derived from everything that shapes a client
+
+        Two services only share a pool when prompt, tools, MCP servers, env
+        and working directory all match (e.g. a service re-created in the
+        same process); User and Admin differ in prompt and stay separate.
+        """
+        signature = repr((
+            self._system_prompt["append"],
+            self._allowed_tools,
+            sorted(self._mcp_servers),
+            sorted(self._env_vars.items()),
+            self._kb_path_str,
+        ))
+        digest = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        return f"{self._service_name.lower()}:{digest}"
 
     def _create_options(self, sdk_session_id: Optional[str] = None) -> ClaudeAgentOptions:
         """
         Create ClaudeAgentOptions (Options Factory)
 
+        New sessions share the template built once in initialize() (clients
+        only read their options); resumed sessions get a copy with resume set.
+
         Args:
             sdk_session_id: Real session ID returned by SDK (optional)
                            - None: New session, don't set resume
@@ -624,38 +502,24 @@ class KBAdminService:
         Returns:
             Configured ClaudeAgentOptions
         """
-        kb_path = Path(self.settings.KB_ROOT_PATH)
-
-        options = ClaudeAgentOptions(
-            system_prompt={
-                "type": "preset",
-                "preset": "claude_code",
-                "append": f"\n\n{self._admin_agent_def.prompt}"
-            },
-            agents=None,  # Single Agent architecture
-            mcp_servers=self._mcp_servers,
-            allowed_tools=self._get_allowed_tools(),
-            cwd=str(kb_path),  # Knowledge base directory as Agent working directory
-            permission_mode="acceptEdits",
-            env=self._env_vars,
-            setting_sources=["project"],  # Enable project-level Skills, load from .claude/skills/
-            # Disable extended thinking (third-party API proxy incompatible with thinking mode)
-            max_thinking_tokens=0
-        )
+        if not sdk_session_id:
+            return self._options_template
 
-        # If SDK session ID provided, set resume parameter to restore session
-        if sdk_session_id:
-            options.resume = sdk_session_id
-            logger.debug(f"Setting resume to SDK session: {sdk_session_id}")
-
-        return options
+        # SDK session ID provided, set resume parameter to restore session
+        logger.debug(f"Setting resume to SDK session: {sdk_session_id}")
+        return replace(self._options_template, resume=sdk_session_id)
 
     async def initialize(self):
-        """Initialize Admin Agent connection pool"""
-        if self.is_initialized:
-            logger.warning("Admin service already initialized")
-            return
+        """Initialize Agent connection pool (concurrent callers initialize once)"""
+        async with self._init_lock:
+            if self.is_initialized:
+                logger.warning(f"{self._service_name} service already initialized")
+                return
+
+            await self._initialize()
 
+    async def _initialize(self):
+        """Build agent definition, MCP servers, options template and pool (holds _init_lock)"""
         try:
             # Check authentication
             if not self.settings.CLAUDE_API_KEY and not self.settings.ANTHROPIC_AUTH_TOKEN:
@@ -663,125 +527,128 @@ class KBAdminService:
 
             # Knowledge base path
             kb_path = Path(self.settings.KB_ROOT_PATH)
-            if not kb_path.exists():
-                kb_path.mkdir(parents=True, exist_ok=True)
+            await _ensure_kb_path(kb_path)
+            self._kb_path_str = str(kb_path)
 
             # Prepare environment variables (cached for _create_options)
-            self._env_vars = {
-                "KB_ROOT_PATH": str(kb_path),
+            env_vars = {
+                "KB_ROOT_PATH": self._kb_path_str,
             }
 
             if self.settings.CLAUDE_API_KEY:
-                self._env_vars["ANTHROPIC_API_KEY"] = self.settings.CLAUDE_API_KEY
+                env_vars["ANTHROPIC_API_KEY"] = self.settings.CLAUDE_API_KEY
             else:
-                self._env_vars["ANTHROPIC_AUTH_TOKEN"] = self.settings.ANTHROPIC_AUTH_TOKEN
+                env_vars["ANTHROPIC_AUTH_TOKEN"] = self.settings.ANTHROPIC_AUTH_TOKEN
                 if self.settings.ANTHROPIC_BASE_URL:
-                    self._env_vars["ANTHROPIC_BASE_URL"] = self.settings.ANTHROPIC_BASE_URL
+                    env_vars["ANTHROPIC_BASE_URL"] = self.settings.ANTHROPIC_BASE_URL
 
-            # Get Admin Agent definition (cached for _create_options)
+            # Read-only: every client's options share this one mapping
+            self._env_vars = MappingProxyType(env_vars)
+
+            # Get Agent definition (cached for _create_options)
             run_mode = get_run_mode()
-            self._admin_agent_def = get_admin_agent_definition(
+            self._agent_def = self._agent_def_getter(
                 small_file_threshold_kb=self.settings.SMALL_FILE_KB_THRESHOLD,
                 faq_max_entries=self.settings.FAQ_MAX_ENTRIES,
                 run_mode=run_mode.value
             )
-            logger.info(f"Admin Agent definition created with run_mode={run_mode.value}")
-
-            # Configure MCP servers (cached for _create_options)
-            # Create SDK MCP server for image_read tool
-            image_vision_server = create_sdk_mcp_server(
-                name="image_vision",
-                version="1.0.0",
-                tools=[image_read_handler]
-            )
+            self._system_prompt = _build_system_prompt(self._agent_def.prompt)
+            logger.info(f"{self._service_name} Agent definition created with run_mode={run_mode.value}")
 
-            self._mcp_servers = {
-                "image_vision": image_vision_server
-            }
+            # Tool set is fixed per run mode (cached for _create_options)
+            im_channel = get_im_channel()
+            # Deduplicated, order preserved
+            self._allowed_tools = tuple(dict.fromkeys(_build_allowed_tools(im_channel)))
 
             if self._use_print_json:
+                # Configure MCP servers (cached for _create_options)
+                self._mcp_servers = _build_mcp_servers(None)
                 # Avoid initializing streaming SDK clients; use `claude -p --output-format json` per request.
                 self.is_initialized = True
                 logger.warning(
-                    "Admin service running in non-interactive Claude Code mode (print+json). "
+                    f"{self._service_name} service running in non-interactive Claude Code mode (print+json). "
                     "Streaming and SDK MCP servers are disabled in this mode."
                 )
                 return
 
+            # Configure MCP servers (cached for _create_options)
             # Add corresponding channel's MCP server in IM mode
-            im_channel = get_im_channel()
+            self._mcp_servers = _build_mcp_servers(im_channel)
             if im_channel:
-                mcp_path = self._get_im_mcp_command(im_channel)
-                logger.info(f"Using {im_channel}-mcp at: {mcp_path}")
-
-                # Get environment variables for the corresponding channel
-                channel_upper = im_channel.upper()
-                self._mcp_servers[im_channel] = {
-                    "type": "stdio",
-                    "command": mcp_path,
-                    "args": [],
-                    "env": {
-                        f"{channel_upper}_CORP_ID": os.getenv(f"{channel_upper}_CORP_ID", ""),
-                        f"{channel_upper}_CORP_SECRET": os.getenv(f"{channel_upper}_CORP_SECRET", ""),
-                        f"{channel_upper}_AGENT_ID": os.getenv(f"{channel_upper}_AGENT_ID", ""),
-                    }
-                }
+                self._im_mcp_path = self._mcp_servers[im_channel]["command"]
+                logger.info(f"Using {im_channel}-mcp at: {self._im_mcp_path}")
             else:
                 logger.info("Standalone mode: No IM MCP server loaded")
 
+            self._options_template = self._build_options()
+            await _check_claude_cli_health(self._options_template.cli_path)
+
             # Create connection pool
-            pool_size = self.settings.ADMIN_CLIENT_POOL_SIZE
+            pool_size = getattr(self.settings, self._pool_size_setting_name)
             max_wait = self.settings.CLIENT_POOL_MAX_WAIT
 
-            self.client_pool = SDKClientPool(
+            self.client_pool = get_pool_manager().get_or_create(
+                self._pool_key(),
                 pool_size=pool_size,
                 options_factory=self._create_options,
                 max_wait_time=float(max_wait)
             )
 
             # Initialize connection pool
-            logger.info(f"Initializing Admin client pool (size={pool_size})...")
+            logger.info(f"Initializing {self._service_name} client pool (size={pool_size})...")
             await self.client_pool.initialize()
 
+            warmup = self.settings.CLIENT_POOL_WARMUP
+            if warmup > 0:
+                await self.client_pool.warmup(warmup)
+
             self.is_initialized = True
-            logger.info("✅ Admin service initialized successfully")
+            logger.info(f"✅ {self._service_name} service initialized successfully")
             logger.info(f"   Pool size: {pool_size}")
             logger.info(f"   MCP Servers: {list(self._mcp_servers.keys())}")
 
         except Exception as e:
-            logger.error(f"❌ Failed to initialize admin service: {e}")
+            logger.error(f"❌ Failed to initialize {self._service_name.lower()} service: {e}")
             raise
 
     async def query(
         self,
         user_message: str,
-        sdk_session_id: Optional[str] = None
+        sdk_session_id: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> AsyncIterator[Message]:
         """
-        Process admin query (using connection pool to support concurrency)
+        Process query (using connection pool to support concurrency)
 
         Args:
             user_message: User message
             sdk_session_id: SDK session ID (for resume to restore session)
                            - None: New session
                            - str: Existing session, restore context
+            user_id: User IM UserID (optional)
 
         Yields:
             Message stream (includes ResultMessage with real session_id)
+
+        Note:
+            Consume with `async for` inside an async endpoint; never wrap this
+            iterator in a sync generator for StreamingResponse (runs in threadpool).
         """
+        # Double-checked: the lock is only touched until the first init completes
         if not self.is_initialized:
-            await self.initialize()
+            async with self._init_lock:
+                if not self.is_initialized:
+                    await self._initialize()
 
-        logger.info(f"Admin query: {user_message[:100]}...")
+        logger.info("%s query from %s: %.100s...", self._service_name, user_id or 'unknown', user_message)
 
         if self._use_print_json:
-            kb_path = Path(self.settings.KB_ROOT_PATH)
             assistant, result = await _run_claude_print_json(
                 prompt=user_message,
-                cwd=str(kb_path),
+                cwd=self._kb_path_str,
                 env=self._env_vars or {},
-                allowed_tools=self._get_allowed_tools(),
-                append_system_prompt=f"\n\n{self._admin_agent_def.prompt}",
+                allowed_tools=list(self._get_allowed_tools()),
+                append_system_prompt=self._system_prompt["append"],
                 resume=sdk_session_id,
             )
             yield assistant
@@ -789,36 +656,41 @@ class KBAdminService:
             return
 
         max_attempts = 2
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.settings.CLAUDE_RETRY_DEADLINE
         for attempt in range(1, max_attempts + 1):
             message_count = 0
             try:
                 # Acquire client from pool (supports session resume)
-                is_resume = sdk_session_id is not None
-                logger.info(
-                    f"📤 Acquiring client from pool (resume={is_resume}, sdk_session={sdk_session_id or 'new'})..."
-                )
                 async with self.client_pool.acquire(session_id=sdk_session_id) as client:
-                    logger.info("✅ Client acquired, sending query...")
-
                     # Send query (no longer pass session_id, controlled by ClaudeAgentOptions.resume)
                     await client.query(user_message)
 
                     # Receive response
+                    debug_enabled = logger.isEnabledFor(logging.DEBUG)
                     async for message in client.receive_response():
                         message_count += 1
+                        if debug_enabled:
+                            logger.debug("📨 Received message %d: type=%s", message_count, type(message).__name__)
                         yield message
-
-                logger.info("✅ Response completed, client released")
+                        # Drop our reference so the consumer's release frees the payload
+                        del message
 
                 if message_count == 0:
-                    logger.error("❌ No response from Claude API")
-                    logger.error(f"   SDK Session: {sdk_session_id or 'new'}")
-                    logger.error("   This may indicate:")
-                    logger.error("   - API account insufficient balance")
-                    logger.error("   - API rate limit exceeded")
-                    logger.error("   - Network timeout")
+                    logger.error(
+                        "❌ No response from Claude API (session=%s, user=%s); "
+                        "check API balance, rate limits or network",
+                        sdk_session_id or 'new',
+                        user_id
+                    )
                 else:
-                    logger.info(f"✅ Received {message_count} messages from Claude API")
+                    logger.info(
+                        "✅ %s query done: %d messages (session=%s, attempt=%d)",
+                        self._service_name,
+                        message_count,
+                        sdk_session_id or 'new',
+                        attempt
+                    )
 
                 return
 
@@ -826,40 +698,107 @@ class KBAdminService:
                 raise
             except Exception as e:
                 is_last = attempt >= max_attempts
-                should_retry = (not is_last) and (message_count == 0) and _is_transient_upstream_error(e)
-
-                logger.error("❌ Claude API call failed")
-                logger.error(f"   Error type: {type(e).__name__}")
-                logger.error(f"   Error message: {str(e)}")
-                logger.error(f"   SDK Session: {sdk_session_id or 'new'}")
-                logger.error(f"   Attempt: {attempt}/{max_attempts}")
-                logger.error("   This may indicate:")
-                logger.error("   - Invalid API key or token")
-                logger.error("   - API account insufficent balance (欠费)")
-                logger.error("   - Exceeded rate limits")
-                logger.error("   - API service unavailable")
-                logger.error("   - Transient network issues")
-                logger.error("   Stack:", exc_info=True)
-
-                if should_retry:
-                    backoff_seconds = 0.5 * (2 ** (attempt - 1))
-                    logger.warning(
-                        "⚠️  Transient upstream error before any response; retrying in %.1fs (attempt %d/%d)",
-                        backoff_seconds,
-                        attempt + 1,
-                        max_attempts
-                    )
-                    await asyncio.sleep(backoff_seconds)
-                    continue
-                raise
+                backoff_seconds = _retry_backoff_seconds(attempt, self.settings.CLAUDE_RETRY_CAP_SECONDS)
+                should_retry = (
+                    (not is_last)
+                    and (message_count == 0)
+                    and _is_transient_upstream_error(e)
+                    and loop.time() + backoff_seconds < deadline
+                )
+
+                logger.error(
+                    "❌ Claude API call failed type=%s session=%s user=%s attempt=%d/%d: %s",
+                    type(e).__name__,
+                    sdk_session_id or 'new',
+                    user_id,
+                    attempt,
+                    max_attempts,
+                    e,
+                    exc_info=True
+                )
+
+                if not should_retry:
+                    raise
+
+                self._transient_retries += 1
+                logger.warning(
+                    "⚠️  Transient upstream error before any response; retrying in %.1fs (attempt %d/%d)",
+                    backoff_seconds,
+                    attempt + 1,
+                    max_attempts
+                )
+
+            # Pool slot is already released here; sleeping outside the except
+            # block also avoids keeping the exception traceback alive
+            await asyncio.sleep(backoff_seconds)
+
+    async def close(self):
+        """
+        Release the client pool (idempotent); a later query re-initializes
+
+        Clients are connected per request and disconnected when released, so
+        there are no idle CLI subprocesses to ping or tear down here.
+        """
+        async with self._init_lock:
+            if self.client_pool is not None:
+                await self.client_pool.shutdown()
+                self.client_pool = None
+            self.is_initialized = False
 
     def get_pool_stats(self) -> dict:
-        """Get connection pool statistics"""
+        """Get connection pool statistics (plus transient-error retry count)"""
         if self.client_pool:
-            return self.client_pool.get_stats()
+            return {
+                **self.client_pool.get_stats(),
+                "transient_retries": self._transient_retries
+            }
         return {"status": "not_initialized"}
 
 
+class KBUserService(_BaseKBService):
+    """
+    User-side Knowledge Base Service
+
+    Responsibilities:
+    - Knowledge query (6-stage retrieval)
+    - Satisfaction feedback
+    - Domain expert routing
+    - Asynchronous multi-turn conversation management
+
+    Features:
+    - Lightweight (no document conversion)
+    - WeChat Work MCP integration
+    """
+
+    _agent_def_getter = staticmethod(_get_user_agent_definition)
+    _pool_size_setting_name = "USER_CLIENT_POOL_SIZE"
+    _service_name = "User"
+
+
+class KBAdminService(_BaseKBService):
+    """
+    Admin-side Knowledge Base Service
+
+    Responsibilities:
+    - Document ingestion (5-stage processing)
+    - Knowledge base management
+    - Batch employee notifications
+
+    Features:
+    - Full functionality (smart_convert.py document conversion + wework MCP)
+    - SSE streaming response support
+    """
+
+    _agent_def_getter = staticmethod(_get_admin_agent_definition)
+    _pool_size_setting_name = "ADMIN_CLIENT_POOL_SIZE"
+    _service_name = "Admin"
+
+
+# Guards singleton creation (services may be requested from several threads,
+# e.g. the Flask callback servers run one event loop per worker thread)
+_factory_lock = threading.Lock()
+
+
 class KBServiceFactory:
     """
     Knowledge Base Service Factory
@@ -870,6 +809,10 @@ class KBServiceFactory:
     Future evolution path:
     - Current: Single process, two Agent clients
     - Future: Can be changed to HTTP client, calling independent microservices
+
+    Event loop: services should run on uvloop for faster stream I/O. uvicorn
+    selects it automatically when installed (uvicorn[standard]); standalone
+    entrypoints call backend.utils.event_loop.install_event_loop_policy().
     """
 
     _user_service: Optional[KBUserService] = None
@@ -884,8 +827,10 @@ class KBServiceFactory:
             KBUserService instance
         """
         if cls._user_service is None:
-            cls._user_service = KBUserService()
-            logger.info("Created new User service instance")
+            with _factory_lock:
+                if cls._user_service is None:
+                    cls._user_service = KBUserService()
+                    logger.info("Created new User service instance")
 
         return cls._user_service
 
@@ -898,22 +843,41 @@ class KBServiceFactory:
             KBAdminService instance
         """
         if cls._admin_service is None:
-            cls._admin_service = KBAdminService()
-            logger.info("Created new Admin service instance")
+            with _factory_lock:
+                if cls._admin_service is None:
+                    cls._admin_service = KBAdminService()
+                    logger.info("Created new Admin service instance")
 
         return cls._admin_service
 
     @classmethod
     async def initialize_all(cls):
-        """Initialize all services"""
+        """
+        Initialize all services (independent, so run concurrently)
+
+        With KB_SERVICE_LAZY_INIT enabled this only creates the service
+        instances; each service initializes on its first query(), so a
+        service that is never used never builds its agent or pool.
+        """
         user = cls.get_user_service()
         admin = cls.get_admin_service()
 
-        await user.initialize()
-        await admin.initialize()
+        if get_settings().KB_SERVICE_LAZY_INIT:
+            logger.info("KB services will initialize on first query (KB_SERVICE_LAZY_INIT)")
+            return
+
+        await asyncio.gather(user.initialize(), admin.initialize())
 
         logger.info("✅ All KB services initialized")
 
+    @classmethod
+    async def shutdown_all(cls):
+        """Close all created services (on application shutdown)"""
+        services = [s for s in (cls._user_service, cls._admin_service) if s is not None]
+        await asyncio.gather(*(service.close() for service in services))
+
+        logger.info("✅ All KB services closed")
+
 
 # Convenience functions (backward compatibility)
 def get_user_service() -> KBUserService:
@@ -10,23 +10,32 @@ Design Pattern: Factory + Registry
 - Supports multi-tenancy with platform-specific Redis prefixes
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 from backend.config.messaging_platforms import (
     MessagingPlatformType,
     MessagingPlatformConfig,
+    MessagingPlatformMeta,
     get_platform_config,
+    get_platform_meta,
 )
 
 logger = logging.getLogger(__name__)
 
+# Resolved configs older than this are still served, but refreshed in the background
+_CONFIG_FRESH_SECONDS = 300.0
+
 
 class MessagingPlatformFactory:
     """
     Factory for managing messaging platform configurations
 
     Supports:
-    - Dynamic platform registration
+    - Dynamic platform registration (full config resolved lazily on first use,
+      then served stale-while-revalidate)
     - MCP server configuration retrieval
     - Tool list retrieval
     - Redis key prefix management for multi-tenancy
@@ -47,31 +56,47 @@ class MessagingPlatformFactory:
 
     def __init__(self):
         """Initialize factory with empty registry"""
-        self._registered_platforms: Dict[MessagingPlatformType, MessagingPlatformConfig] = {}
+        self._registered_meta: Dict[MessagingPlatformType, MessagingPlatformMeta] = {}
+        # Registration-ordered platforms, rebuilt only on (un)registration
+        self._platforms: Tuple[MessagingPlatformType, ...] = ()
+        # platform -> (config, resolved_at monotonic), stale-while-revalidate
+        self._config_cache: Dict[MessagingPlatformType, Tuple[MessagingPlatformConfig, float]] = {}
+        self._refreshing: set = set()
+        # Built results keyed by requested platforms (cleared on (un)registration)
+        self._mcp_cache: Dict[Tuple[MessagingPlatformType, ...], Dict[str, Dict]] = {}
+        self._tools_cache: Dict[Tuple[Tuple[MessagingPlatformType, ...], bool], List[str]] = {}
         logger.info("MessagingPlatformFactory initialized")
 
     def register_platform(self, platform: MessagingPlatformType) -> None:
         """
         Register a messaging platform
 
+        Only the platform's static metadata is stored; the full
+        configuration (MCP command lookup, env, tool list) is resolved on
+        first use.
+
         Args:
             platform: Platform type to register
 
         Raises:
-            ValueError: If platform not supported or already registered
+            ValueError: If platform not supported
+            NotImplementedError: If platform is a placeholder (no integration yet)
         """
-        if platform in self._registered_platforms:
+        if platform in self._registered_meta:
             logger.warning(f"Platform {platform.value} already registered, skipping")
             return
 
         try:
-            config = get_platform_config(platform)
-            self._registered_platforms[platform] = config
-            logger.info(f"Registered platform: {platform.value} (MCP: {config.mcp_server_name})")
+            meta = get_platform_meta(platform)
         except Exception as e:
             logger.error(f"Failed to register platform {platform.value}: {e}")
             raise
 
+        self._registered_meta[platform] = meta
+        self._platforms = tuple(self._registered_meta)
+        self._clear_built_caches()
+        logger.info(f"Registered platform: {platform.value} (MCP: {meta.mcp_server_name})")
+
     def unregister_platform(self, platform: MessagingPlatformType) -> None:
         """
         Unregister a messaging platform
@@ -79,10 +104,83 @@ class MessagingPlatformFactory:
         Args:
             platform: Platform type to unregister
         """
-        if platform in self._registered_platforms:
-            del self._registered_platforms[platform]
+        if platform in self._registered_meta:
+            del self._registered_meta[platform]
+            self._platforms = tuple(self._registered_meta)
+            self._config_cache.pop(platform, None)
+            self._clear_built_caches()
             logger.info(f"Unregistered platform: {platform.value}")
 
+    def _clear_built_caches(self) -> None:
+        """Drop memoized MCP server / tool list results"""
+        self._mcp_cache.clear()
+        self._tools_cache.clear()
+
+    def _resolve(self, platform: MessagingPlatformType) -> MessagingPlatformConfig:
+        """
+        Resolve (and cache) the full configuration of a registered platform
+
+        A cached config is returned immediately even when stale; a refresh
+        is scheduled and the stale value is kept if the refresh fails. Only
+        the very first resolution blocks.
+
+        Raises:
+            Exception: Whatever the platform's config function raises
+                       (e.g. NotImplementedError for placeholder platforms)
+        """
+        cached = self._config_cache.get(platform)
+        if cached is not None:
+            self._revalidate(platform)
+            return cached[0]
+
+        try:
+            config = get_platform_config(platform)
+        except Exception as e:
+            logger.error(f"Failed to resolve platform {platform.value}: {e}")
+            raise
+        self._config_cache[platform] = (config, time.monotonic())
+        return config
+
+    def _revalidate(self, platform: MessagingPlatformType) -> None:
+        """Schedule a refresh if the cached config of platform is stale"""
+        cached = self._config_cache.get(platform)
+        if (
+            cached is None
+            or time.monotonic() - cached[1] < _CONFIG_FRESH_SECONDS
+            or platform in self._refreshing
+        ):
+            return
+
+        self._refreshing.add(platform)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (sync caller): refresh inline
+            self._finish_refresh(platform, lambda: get_platform_config(platform))
+            return
+        # Only the lookup runs on the executor; the result is applied by a
+        # done callback, i.e. on the loop thread that also rebuilds the caches
+        future = loop.run_in_executor(None, get_platform_config, platform)
+        future.add_done_callback(lambda done: self._finish_refresh(platform, done.result))
+
+    def _finish_refresh(self, platform: MessagingPlatformType, resolve) -> None:
+        """
+        Store a re-resolved platform config, keeping the stale one on failure
+
+        Args:
+            platform: Platform being refreshed
+            resolve: Callable returning the new config (or raising)
+        """
+        try:
+            config = resolve()
+            if platform in self._registered_meta:
+                self._config_cache[platform] = (config, time.monotonic())
+                self._clear_built_caches()
+        except Exception as e:
+            logger.warning(f"Failed to refresh platform {platform.value}, serving stale config: {e}")
+        finally:
+            self._refreshing.discard(platform)
+
     def is_registered(self, platform: MessagingPlatformType) -> bool:
         """
         Check if a platform is registered
@@ -93,7 +191,7 @@ class MessagingPlatformFactory:
         Returns:
             True if platform is registered
         """
-        return platform in self._registered_platforms
+        return platform in self._registered_meta
 
     def get_config(self, platform: MessagingPlatformType) -> MessagingPlatformConfig:
         """
@@ -108,10 +206,10 @@ class MessagingPlatformFactory:
         Raises:
             ValueError: If platform not registered
         """
-        if platform not in self._registered_platforms:
+        if platform not in self._registered_meta:
             raise ValueError(f"Platform {platform.value} not registered")
 
-        return self._registered_platforms[platform]
+        return self._resolve(platform)
 
     def get_mcp_servers_config(
         self,
@@ -125,6 +223,7 @@ class MessagingPlatformFactory:
 
         Returns:
             MCP servers config dict for ClaudeAgentOptions.mcp_servers
+            (a new outer dict; the per-server dicts are shared, treat as read-only)
 
         Example:
             {
@@ -141,16 +240,20 @@ class MessagingPlatformFactory:
                 }
             }
         """
-        if platforms is None:
-            platforms = list(self._registered_platforms.keys())
+        key = self._platforms if platforms is None else tuple(platforms)
+        cached = self._mcp_cache.get(key)
+        if cached is not None:
+            for platform in key:
+                self._revalidate(platform)
+            return dict(cached)
 
         mcp_servers = {}
-        for platform in platforms:
-            if platform not in self._registered_platforms:
+        for platform in key:
+            if platform not in self._registered_meta:
                 logger.warning(f"Platform {platform.value} not registered, skipping")
                 continue
 
-            config = self._registered_platforms[platform]
+            config = self._resolve(platform)
             mcp_config = config.mcp_config
 
             mcp_servers[config.mcp_server_name] = {
@@ -160,7 +263,8 @@ class MessagingPlatformFactory:
                 "env": mcp_config.env,
             }
 
-        return mcp_servers
+        self._mcp_cache[key] = mcp_servers
+        return dict(mcp_servers)
 
     def get_tools(
         self,
@@ -185,6 +289,13 @@ class MessagingPlatformFactory:
                 ...
             ]
         """
+        platform_key = self._platforms if platforms is None else tuple(platforms)
+        cached = self._tools_cache.get((platform_key, include_base_tools))
+        if cached is not None:
+            for platform in platform_key:
+                self._revalidate(platform)
+            return list(cached)
+
         tools = []
 
         # Base tools
@@ -198,18 +309,15 @@ class MessagingPlatformFactory:
             ])
 
         # Platform-specific MCP tools
-        if platforms is None:
-            platforms = list(self._registered_platforms.keys())
-
-        for platform in platforms:
-            if platform not in self._registered_platforms:
+        for platform in platform_key:
+            if platform not in self._registered_meta:
                 logger.warning(f"Platform {platform.value} not registered, skipping")
                 continue
 
-            config = self._registered_platforms[platform]
-            tools.extend(config.tools)
+            tools.extend(self._resolve(platform).tools)
 
-        return tools
+        self._tools_cache[(platform_key, include_base_tools)] = tools
+        return list(tools)
 
     def get_redis_key_prefix(self, platform: MessagingPlatformType) -> str:
         """
@@ -225,23 +333,24 @@ class MessagingPlatformFactory:
             prefix = factory.get_redis_key_prefix(MessagingPlatformType.WEWORK)
             # Use as: f"{prefix}:conv_state:{user_id}"
         """
-        if platform not in self._registered_platforms:
+        if platform not in self._registered_meta:
             raise ValueError(f"Platform {platform.value} not registered")
 
-        return self._registered_platforms[platform].redis_key_prefix
+        return self._registered_meta[platform].redis_key_prefix
 
-    def get_all_registered_platforms(self) -> List[MessagingPlatformType]:
+    def get_all_registered_platforms(self) -> Tuple[MessagingPlatformType, ...]:
         """
-        Get list of all registered platforms
+        Get all registered platforms
 
         Returns:
-            List of registered platform types
+            Registered platform types in registration order (shared, immutable)
         """
-        return list(self._registered_platforms.keys())
+        return self._platforms
 
 
 # Singleton instance
 _messaging_platform_factory: Optional[MessagingPlatformFactory] = None
+_factory_lock = threading.Lock()
 
 
 def get_messaging_platform_factory() -> MessagingPlatformFactory:
@@ -254,7 +363,9 @@ def get_messaging_platform_factory() -> MessagingPlatformFactory:
     global _messaging_platform_factory
 
     if _messaging_platform_factory is None:
-        _messaging_platform_factory = MessagingPlatformFactory()
+        with _factory_lock:
+            if _messaging_platform_factory is None:
+                _messaging_platform_factory = MessagingPlatformFactory()
 
     return _messaging_platform_factory
 
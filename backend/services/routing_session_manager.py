@@ -13,12 +13,25 @@ Difference from existing session_manager.py:
 """
 
 import asyncio
+import hashlib
+import heapq
 import logging
 import json
-from typing import Optional, List, Dict
+import os
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
-import uuid
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from operator import attrgetter
+from pydantic import BaseModel
+from redis.exceptions import NoScriptError
 
 from backend.models.session import (
     Session,
@@ -31,15 +44,331 @@ from backend.models.session import (
 
 logger = logging.getLogger(__name__)
 
+_loads = orjson.loads if orjson is not None else json.loads
+
+_SESSION_FIELDS = frozenset(Session.model_fields)
+_SUMMARY_FIELDS = frozenset(SessionSummary.model_fields)
+
+
+def _dumps(value) -> str:
+    """Serialize a plain JSON value (history message, key points) for Redis"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _dump_model(model: BaseModel) -> str:
+    """Serialize a Session (or nested model) for Redis (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(model.model_dump(), default=str).decode()
+    return model.json()
+
+
+def _load_session(raw) -> Session:
+    """
+    Deserialize a Session written by _dump_model
+
+    Values in Redis were produced by this service, so validation is skipped
+    (model_construct) and only enums, datetimes and nested models are
+    re-hydrated. Anything not matching the current schema goes through
+    full pydantic validation instead.
+    """
+    try:
+        data = _loads(raw)
+        summary = data["summary"]
+        if data.keys() != _SESSION_FIELDS or summary.keys() != _SUMMARY_FIELDS:
+            raise ValueError("schema drift")
+
+        latest = summary["latest_exchange"]
+        if latest is not None:
+            latest = MessageSnapshot.model_construct(
+                content=latest["content"],
+                timestamp=datetime.fromisoformat(latest["timestamp"]),
+                role=latest["role"]
+            )
+
+        data["summary"] = SessionSummary.model_construct(
+            original_question=summary["original_question"],
+            latest_exchange=latest,
+            key_points=summary["key_points"],
+            last_updated=datetime.fromisoformat(summary["last_updated"]),
+            version=summary["version"]
+        )
+        data["role"] = SessionRole(data["role"])
+        data["status"] = SessionStatus(data["status"])
+        for field in ("created_at", "last_active_at", "expires_at"):
+            data[field] = datetime.fromisoformat(data[field])
+        return Session.model_construct(**data)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return Session.parse_raw(raw)
+
+
+@dataclass(slots=True)
+class _FastSession:
+    """
+    Slim memory-fallback record of a Session
+
+    No per-instance __dict__ or pydantic bookkeeping, and last_active_at is
+    mirrored as an epoch float so query sorting compares floats. Only the
+    Sessions a caller actually receives are turned back into models.
+    """
+    session_id: str
+    user_id: str
+    role: SessionRole
+    status: SessionStatus
+    summary: SessionSummary
+    full_context_key: str
+    related_user_id: Optional[str]
+    domain: Optional[str]
+    created_at: datetime
+    last_active_at: datetime
+    last_active_ts: float
+    expires_at: datetime
+    message_count: int
+    tags: List[str]
+
+    @classmethod
+    def from_session(cls, session: Session) -> "_FastSession":
+        return cls(
+            session_id=session.session_id,
+            user_id=session.user_id,
+            role=session.role,
+            status=session.status,
+            summary=session.summary.model_copy(deep=True),
+            full_context_key=session.full_context_key,
+            related_user_id=session.related_user_id,
+            domain=session.domain,
+            created_at=session.created_at,
+            last_active_at=session.last_active_at,
+            last_active_ts=session.last_active_at.timestamp(),
+            expires_at=session.expires_at,
+            message_count=session.message_count,
+            tags=list(session.tags)
+        )
+
+    def to_session(self) -> Session:
+        """Independent Session (callers may mutate it before saving)"""
+        return Session.model_construct(
+            session_id=self.session_id,
+            user_id=self.user_id,
+            role=self.role,
+            status=self.status,
+            summary=self.summary.model_copy(deep=True),
+            full_context_key=self.full_context_key,
+            related_user_id=self.related_user_id,
+            domain=self.domain,
+            created_at=self.created_at,
+            last_active_at=self.last_active_at,
+            expires_at=self.expires_at,
+            message_count=self.message_count,
+            tags=list(self.tags)
+        )
+
+
+# Server-side top-K for query_user_sessions. Each role keeps its own ZSET
+# scored by last_active_at, so the newest ids come straight from ZREVRANGE and
+# only the returned (at most 2 * max_per_role) Session JSON blobs are read.
+# Ids whose Session has expired out of Redis are dropped from the ZSET.
+# The status filter is a pattern match, no cjson.decode: a quote inside a
+# JSON string value is always escaped, so '"status":"expired"' can only match
+# the top-level field (whitespace allowed for blobs written by pydantic v1).
+# KEYS[1] = <prefix>user_sessions:{user_id}:as_user, KEYS[2] = <prefix>user_sessions:{user_id}:as_expert
+# KEYS[3] = user_sessions:user_id (legacy SET, pending migration if present)
+# ARGV[1] = include_expired ("1"/"0"), ARGV[2] = max_per_role, ARGV[3] = key prefix
+# Returns {as_user_json_list, as_expert_json_list, legacy_exists}, newest first.
+_QUERY_USER_SESSIONS_LUA = """
+local include_expired = ARGV[1] == '1'
+local max_per_role = tonumber(ARGV[2])
+local session_prefix = ARGV[3] .. 'session:'
+
+local function top_k(key)
+    local out, stale = {}, {}
+    local start = 0
+    while #out < max_per_role do
+        local ids = redis.call('ZREVRANGE', key, start, start + max_per_role - 1)
+        if #ids == 0 then
+            break
+        end
+        for _, sid in ipairs(ids) do
+            local raw = redis.call('GET', session_prefix .. sid)
+            if not raw then
+                table.insert(stale, sid)
+            elseif #out < max_per_role and (include_expired or not string.find(raw, '"status"%s*:%s*"expired"')) then
+                table.insert(out, raw)
+            end
+        end
+        start = start + max_per_role
+    end
+    for _, sid in ipairs(stale) do
+        redis.call('ZREM', key, sid)
+    end
+    return out
+end
+
+return {top_k(KEYS[1]), top_k(KEYS[2]), redis.call('EXISTS', KEYS[3])}
+"""
+
+
+# Read-modify-write of a Session summary in one round-trip (no client-side
+# GET, so no version conflict window). Mirrors the Python path of
+# update_session_summary. Only the Session key is touched: the caller does
+# not know the user (and so the role ZSET key) up front, so the script
+# returns them and the re-score goes through the buffered index writes.
+# The TTL is only reset on a status change; otherwise it is kept (KEEPTTL),
+# so Redis expiry follows expires_at instead of sliding with every message.
+# KEYS[1] = <prefix>session:session_id
+# ARGV[1] = new_message JSON or '', ARGV[2] = key_points JSON list,
+# ARGV[3] = new status or '', ARGV[4] = TTL (ACTIVE), ARGV[5] = TTL (RESOLVED),
+# ARGV[6] = now (ISO-8601)
+# Returns {new summary version, user_id, role}, or 0 if the Session does not exist.
+_RMW_UPDATE_SESSION_LUA = """
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return 0
+end
+
+local data = cjson.decode(raw)
+local summary = data.summary
+
+if ARGV[1] ~= '' then
+    summary.latest_exchange = cjson.decode(ARGV[1])
+end
+
+local points, seen = summary.key_points, {}
+for _, point in ipairs(points) do
+    seen[point] = true
+end
+for _, point in ipairs(cjson.decode(ARGV[2])) do
+    if not seen[point] then
+        table.insert(points, point)
+        seen[point] = true
+        if #points > 10 then
+            seen[table.remove(points, 1)] = nil
+        end
+    end
+end
+
+summary.last_updated = ARGV[6]
+summary.version = summary.version + 1
+data.last_active_at = ARGV[6]
+data.message_count = data.message_count + 1
+local previous_status = data.status
+if ARGV[3] ~= '' then
+    data.status = ARGV[3]
+end
+
+-- cjson cannot tell an empty array from an empty object; restore the lists
+local encoded = cjson.encode(data)
+encoded = string.gsub(encoded, '"key_points":{}', '"key_points":[]')
+encoded = string.gsub(encoded, '"tags":{}', '"tags":[]')
+if data.status ~= previous_status then
+    local ttl = tonumber(ARGV[4])
+    if data.status == 'resolved' then
+        ttl = tonumber(ARGV[5])
+    end
+    redis.call('SETEX', KEYS[1], ttl, encoded)
+else
+    redis.call('SET', KEYS[1], encoded, 'KEEPTTL')
+end
+
+return {summary.version, data.user_id, data.role}
+"""
+
+# Compare-and-swap of a whole Session on its summary version.
+# "version" only occurs as the summary field (quotes inside string values are
+# escaped), so it is matched directly instead of decoding the whole Session;
+# the pattern also accepts the ": " separators of blobs written by pydantic v1,
+# leaving cjson.decode only for malformed values.
+# KEYS[1] = <prefix>session:session_id
+# ARGV[1] = expected version, ARGV[2] = new Session JSON,
+# ARGV[3] = TTL (seconds), or 0 to keep the current one (no status change)
+# Returns 1 on success, 0 if the Session is gone, -1 on version conflict.
+_CAS_UPDATE_SESSION_LUA = """
+local key = KEYS[1]
+local expected_version = tonumber(ARGV[1])
+local new_value = ARGV[2]
+local ttl_seconds = tonumber(ARGV[3])
+
+local current = redis.call('GET', key)
+if not current then
+    return 0  -- Session was deleted
+end
+
+local current_version = tonumber(string.match(current, '"version"%s*:%s*(%d+)'))
+if current_version == nil then
+    current_version = cjson.decode(current).summary.version
+end
+
+if current_version == expected_version then
+    if ttl_seconds > 0 then
+        redis.call('SETEX', key, ttl_seconds, new_value)
+    else
+        redis.call('SET', key, new_value, 'KEEPTTL')
+    end
+    return 1  -- Success
+else
+    return -1  -- Version conflict
+end
+"""
+
+# Append to a Session's history in one round-trip. The 7-day TTL is a sliding
+# window, so it is only re-armed once less than 6 days remain (or the key has
+# none yet) instead of on every message; the list is capped at the newest
+# ARGV[4] entries.
+# KEYS[1] = <prefix>session_history:session_id
+# ARGV[1] = message JSON, ARGV[2] = TTL (seconds), ARGV[3] = refresh threshold (ms),
+# ARGV[4] = max length
+_APPEND_HISTORY_LUA = """
+redis.call('LPUSH', KEYS[1], ARGV[1])
+redis.call('LTRIM', KEYS[1], 0, tonumber(ARGV[4]) - 1)
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+_HISTORY_TTL_SECONDS = 7 * 86400
+_HISTORY_TTL_REFRESH_BELOW_MS = 6 * 86400 * 1000
+_HISTORY_MAX_LENGTH = 10_000
+
+_LUA_SCRIPTS = (
+    _QUERY_USER_SESSIONS_LUA,
+    _RMW_UPDATE_SESSION_LUA,
+    _CAS_UPDATE_SESSION_LUA,
+    _APPEND_HISTORY_LUA,
+)
+_SCRIPT_SHAS = {script: hashlib.sha1(script.encode()).hexdigest() for script in _LUA_SCRIPTS}
+
+# User index writes are buffered and sent as one pipeline after this delay,
+# or as soon as this many are pending
+_INDEX_FLUSH_DELAY_SECONDS = 0.02
+_INDEX_FLUSH_MAX_PENDING = 64
+_USER_SESSIONS_TTL_SECONDS = 30 * 86400
+
+# Number of lock stripes guarding the memory fallback (power of two)
+_MEMORY_LOCK_SHARDS = 16
+
+# Short-lived cache of raw Session JSON read by get_session, so back-to-back
+# reads of the same Session (router lookup then update, CAS retries) skip Redis
+_RECENT_SESSIONS_MAX = 256
+_RECENT_SESSIONS_TTL_SECONDS = 1.0
+
 
 class RoutingSessionManager:
     """
     Routing Session Manager (supports Redis optimistic lock and memory fallback)
 
-    Redis Key design:
-    - session:{session_id} -> Session JSON
-    - user_sessions:{user_id} -> Set[session_id]
-    - session_history:{session_id} -> List[Message JSON]
+    Redis Key design (all keys start with the configurable key_prefix):
+    - session:<session_id> -> Session JSON
+    - user_sessions:{<user_id>}:as_user -> ZSet[session_id] scored by last_active_at
+    - user_sessions:{<user_id>}:as_expert -> ZSet[session_id] scored by last_active_at
+    - user_sessions:<user_id> -> Set[session_id] (legacy, unprefixed, migrated on first query)
+    - session_history:<session_id> -> List[Message JSON]
+
+    The {<user_id>} hash tag keeps a user's two index ZSETs in one Redis
+    Cluster slot. The session read/update scripts also touch session keys in
+    other slots; on a cluster they fail with CROSSSLOT and the single-key
+    fallbacks (ZREVRANGE + per-session reads, GET + CAS) are used instead.
 
     Architecture notes:
     - Primary storage: Redis (persistent, distributed)
@@ -49,33 +378,56 @@ class RoutingSessionManager:
     def __init__(
         self,
         kb_root: Path,
-        redis_client=None  # RedisSessionStorage client
+        redis_client=None,  # RedisSessionStorage client
+        key_prefix: str = ""
     ):
         """
         Initialize Session manager
 
         Args:
             kb_root: Knowledge base root directory
-            redis_client: Redis client (optional, uses memory when None)
+            redis_client: Redis client (optional, uses memory when None).
+                Paired writes (index/history + EXPIRE) are sent as one
+                pipeline; install hiredis so the client uses the C reply parser.
+            key_prefix: Prefix for all Redis keys (tenant/platform namespace,
+                e.g. MessagingPlatformConfig.redis_key_prefix + ":")
         """
         self.kb_root = kb_root
         self.redis_client = redis_client
+        self.key_prefix = key_prefix
         self._using_fallback = redis_client is None
+        # Set once Redis is reachable and the scripts are loaded (stays False on memory fallback)
+        self.is_initialized = False
 
         # Memory fallback storage
-        self._memory_sessions: Dict[str, Session] = {}  # session_id -> Session
-        self._memory_user_sessions: Dict[str, List[str]] = {}  # user_id -> [session_ids]
+        self._memory_sessions: Dict[str, _FastSession] = {}  # session_id -> Session record
+        self._memory_user_sessions: Dict[str, set] = {}  # user_id -> {session_ids}
+        # Striped locks for memory-mode writes, picked by hash(key)
+        self._lock_shards = tuple(asyncio.Lock() for _ in range(_MEMORY_LOCK_SHARDS))
+
+        # Buffered user index writes: ZSET key -> {session_id: score}; Redis mode only
+        self._pending_index: Dict[str, Dict[str, float]] = {}
+        self._pending_count = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # session_id -> (read_at monotonic, raw JSON), LRU order; Redis mode only
+        self._recent: OrderedDict[str, Tuple[float, str]] = OrderedDict()
 
         logger.info(f"RoutingSessionManager initialized (fallback={self._using_fallback})")
 
     async def initialize(self) -> None:
-        """Initialize storage backend"""
+        """Initialize storage backend (no-op once Redis has been initialized)"""
+        if self.is_initialized:
+            return
+
         if self.redis_client:
             try:
                 # Test Redis connection
                 await self.redis_client.ping()
                 logger.info("✅ RoutingSessionManager Redis storage ready")
                 self._using_fallback = False
+                await self._load_scripts()
+                self.is_initialized = True
             except Exception as e:
                 logger.error(f"❌ Redis connection failed: {e}")
                 logger.warning("⚠️  Falling back to memory storage")
@@ -108,10 +460,12 @@ class RoutingSessionManager:
             Created Session object
         """
         if session_id is None:
-            session_id = f"sess_{uuid.uuid4().hex[:16]}"
+            session_id = f"sess_{os.urandom(8).hex()}"
+
+        now = datetime.now()
 
         # Calculate expiration time (ACTIVE defaults to 7 days)
-        expires_at = datetime.now() + timedelta(days=7)
+        expires_at = now + timedelta(days=7)
 
         session = Session(
             session_id=session_id,
@@ -122,24 +476,21 @@ class RoutingSessionManager:
                 original_question=original_question,
                 latest_exchange=None,
                 key_points=[],
-                last_updated=datetime.now(),
+                last_updated=now,
                 version=0
             ),
-            full_context_key=f"session_history:{session_id}",
+            full_context_key=self._history_key(session_id),
             related_user_id=related_user_id,
             domain=domain,
-            created_at=datetime.now(),
-            last_active_at=datetime.now(),
+            created_at=now,
+            last_active_at=now,
             expires_at=expires_at,
             message_count=0,
             tags=[]
         )
 
-        # Persist
-        await self._save_session(session, ttl_seconds=7 * 86400)
-
-        # Add to user Session set
-        await self._add_to_user_sessions(user_id, session_id)
+        # Persist and add to user Session index
+        await self._save_session_with_user_index(session, ttl_seconds=7 * 86400)
 
         logger.info(f"Created session {session_id} for user {user_id} (role={role.value})")
         return session
@@ -155,16 +506,24 @@ class RoutingSessionManager:
             Session object, None if not found
         """
         if self._using_fallback:
-            return self._memory_sessions.get(session_id)
+            return self._memory_get(session_id)
+
+        cached = self._recent.get(session_id)
+        if cached is not None:
+            if time.monotonic() - cached[0] < _RECENT_SESSIONS_TTL_SECONDS:
+                self._recent.move_to_end(session_id)
+                return _load_session(cached[1])
+            del self._recent[session_id]
 
         try:
-            session_json = await self.redis_client.get(f"session:{session_id}")
+            session_json = await self.redis_client.get(self._session_key(session_id))
             if session_json:
-                return Session.parse_raw(session_json)
+                self._remember(session_id, session_json)
+                return _load_session(session_json)
             return None
         except Exception as e:
             logger.error(f"Failed to get session {session_id}: {e}")
-            return self._memory_sessions.get(session_id)
+            raise
 
     async def query_user_sessions(
         self,
@@ -183,8 +542,15 @@ class RoutingSessionManager:
         Returns:
             SessionQueryResult (both as_user and as_expert in reverse chronological order)
         """
-        # Get all user session_ids
-        session_ids = await self._get_user_session_ids(user_id)
+        if not self._using_fallback:
+            await self.flush()
+            result = await self._query_user_sessions_server_side(user_id, include_expired, max_per_role)
+            if result is None:
+                result = await self._query_user_sessions_indexed(user_id, include_expired, max_per_role)
+            return result
+
+        # Memory mode: get all user session_ids and pick the newest in Python
+        session_ids = list(self._memory_user_sessions.get(user_id, ()))
 
         if not session_ids:
             return SessionQueryResult(
@@ -194,27 +560,96 @@ class RoutingSessionManager:
                 total_count=0
             )
 
-        # Batch get Session objects
+        # Look up the slim records; only the returned ones become Sessions
         sessions = []
-        for sid in session_ids:
-            session = await self.get_session(sid)
-            if session:
+        for record in map(self._memory_sessions.get, session_ids):
+            if record:
                 # Filter expired Sessions
-                if not include_expired and session.status == SessionStatus.EXPIRED:
+                if not include_expired and record.status == SessionStatus.EXPIRED:
                     continue
-                sessions.append(session)
+                sessions.append(record)
 
         # Classify by role
         as_user = [s for s in sessions if s.role in [SessionRole.USER, SessionRole.EXPERT_AS_USER]]
         as_expert = [s for s in sessions if s.role == SessionRole.EXPERT]
 
-        # Key: Sort by last_active_at in descending order (newest first)
-        as_user.sort(key=lambda s: s.last_active_at, reverse=True)
-        as_expert.sort(key=lambda s: s.last_active_at, reverse=True)
+        # Key: newest max_per_role by last_active_at, descending (no full sort)
+        by_last_active = attrgetter("last_active_ts")
+        as_user = [s.to_session() for s in heapq.nlargest(max_per_role, as_user, key=by_last_active)]
+        as_expert = [s.to_session() for s in heapq.nlargest(max_per_role, as_expert, key=by_last_active)]
+
+        return SessionQueryResult(
+            user_id=user_id,
+            as_user=as_user,
+            as_expert=as_expert,
+            total_count=len(as_user) + len(as_expert)
+        )
+
+    async def _query_user_sessions_server_side(
+        self,
+        user_id: str,
+        include_expired: bool,
+        max_per_role: int
+    ) -> Optional[SessionQueryResult]:
+        """
+        Read the newest Sessions per role from the ZSET index inside Redis (Lua)
+
+        Returns:
+            SessionQueryResult, or None if the script failed (caller falls
+            back to ZREVRANGE + MGET)
+        """
+        keys = [
+            self._user_sessions_key(user_id, SessionRole.USER),
+            self._user_sessions_key(user_id, SessionRole.EXPERT),
+            self._legacy_user_sessions_key(user_id),
+        ]
+        args = ["1" if include_expired else "0", max_per_role, self.key_prefix]
+        try:
+            as_user_raw, as_expert_raw, legacy_exists = await self._eval(
+                _QUERY_USER_SESSIONS_LUA, keys=keys, args=args
+            )
+            if legacy_exists:
+                await self._migrate_legacy_user_sessions(user_id)
+                as_user_raw, as_expert_raw, _ = await self._eval(
+                    _QUERY_USER_SESSIONS_LUA, keys=keys, args=args
+                )
+        except Exception as e:
+            logger.warning(f"Server-side session query failed for {user_id}: {e}, falling back to ZREVRANGE")
+            return None
+
+        as_user = [_load_session(raw) for raw in as_user_raw]
+        as_expert = [_load_session(raw) for raw in as_expert_raw]
+
+        return SessionQueryResult(
+            user_id=user_id,
+            as_user=as_user,
+            as_expert=as_expert,
+            total_count=len(as_user) + len(as_expert)
+        )
+
+    async def _query_user_sessions_indexed(
+        self,
+        user_id: str,
+        include_expired: bool,
+        max_per_role: int
+    ) -> SessionQueryResult:
+        """
+        Read the newest Sessions per role with ZREVRANGE + MGET (no Lua)
 
-        # Limit quantity
-        as_user = as_user[:max_per_role]
-        as_expert = as_expert[:max_per_role]
+        Only the top max_per_role ids of each role are fetched; the window
+        slides further only if some of them are expired or gone.
+        """
+        try:
+            await self._migrate_legacy_user_sessions(user_id)
+            as_user = await self._top_sessions(
+                self._user_sessions_key(user_id, SessionRole.USER), include_expired, max_per_role
+            )
+            as_expert = await self._top_sessions(
+                self._user_sessions_key(user_id, SessionRole.EXPERT), include_expired, max_per_role
+            )
+        except Exception as e:
+            logger.error(f"Failed to get user sessions for {user_id}: {e}")
+            as_user, as_expert = [], []
 
         return SessionQueryResult(
             user_id=user_id,
@@ -223,6 +658,29 @@ class RoutingSessionManager:
             total_count=len(as_user) + len(as_expert)
         )
 
+    async def _top_sessions(
+        self,
+        index_key: str,
+        include_expired: bool,
+        limit: int
+    ) -> List[Session]:
+        """Newest-first Sessions from one role ZSET, at most limit of them"""
+        sessions: List[Session] = []
+        start = 0
+        while len(sessions) < limit:
+            session_ids = await self.redis_client.zrevrange(index_key, start, start + limit - 1)
+            if not session_ids:
+                break
+            for session in await self._get_sessions_bulk(list(session_ids)):
+                if session is None:
+                    continue
+                if not include_expired and session.status == SessionStatus.EXPIRED:
+                    continue
+                sessions.append(session)
+            start += limit
+
+        return sessions[:limit]
+
     async def update_session_summary(
         self,
         session_id: str,
@@ -244,6 +702,15 @@ class RoutingSessionManager:
         Returns:
             Whether update was successful
         """
+        if not self._using_fallback:
+            new_version = await self._rmw_update_session(session_id, new_message, key_points, session_status)
+            if new_version == 0:
+                logger.error(f"Session {session_id} not found")
+                return False
+            if new_version is not None:
+                logger.info(f"Session {session_id} summary updated (-> v{new_version})")
+                return True
+
         for attempt in range(max_retries):
             try:
                 # 1. Read current Session (with version)
@@ -253,39 +720,42 @@ class RoutingSessionManager:
                     return False
 
                 current_version = session.summary.version
+                previous_status = session.status
 
                 # 2. Update summary
                 if new_message:
                     session.summary.latest_exchange = new_message
 
-                session.summary.last_updated = datetime.now()
+                now = datetime.now()
+                session.summary.last_updated = now
                 session.summary.version += 1
 
-                # 3. Append key points (deduplicate, max 10)
+                # 3. Append key points (deduplicate, max 10, oldest evicted)
                 if key_points:
-                    existing_points = set(session.summary.key_points)
+                    points = deque(session.summary.key_points, maxlen=10)
+                    existing_points = set(points)
                     for point in key_points:
                         if point not in existing_points:
-                            session.summary.key_points.append(point)
-                            if len(session.summary.key_points) > 10:
-                                session.summary.key_points.pop(0)  # Remove oldest
+                            if len(points) == points.maxlen:
+                                existing_points.discard(points[0])
+                            points.append(point)
+                            existing_points.add(point)
+                    session.summary.key_points = list(points)
 
                 # 4. Update other fields
-                session.last_active_at = datetime.now()
+                session.last_active_at = now
                 session.message_count += 1
 
                 if session_status:
                     session.status = session_status
-                    # When transitioning to RESOLVED, set 24h TTL
-                    if session_status == SessionStatus.RESOLVED:
-                        await self._transition_to_resolved(session)
-                        logger.info(f"Session {session_id} marked as RESOLVED (24h TTL)")
-                        return True
 
-                # 5. CAS update (Compare-And-Swap)
-                success = await self._cas_update_session(session, current_version)
+                # 5. CAS update (Compare-And-Swap); RESOLVED gets the 24h TTL there
+                success = await self._cas_update_session(
+                    session, current_version, reset_ttl=session.status != previous_status
+                )
 
                 if success:
+                    await self._add_to_user_sessions(session)
                     logger.info(f"Session {session_id} summary updated (v{current_version} -> v{session.summary.version})")
                     return True
                 else:
@@ -311,19 +781,35 @@ class RoutingSessionManager:
         """
         Append message to full history (no concurrency conflicts, uses LPUSH)
 
+        The TTL refresh and length cap run in the same script as the LPUSH;
+        if scripting fails, LPUSH + EXPIRE are sent as one pipeline.
+
         Args:
             session_id: Session ID
             message: Message dict {role, content, timestamp}
         """
-        history_key = f"session_history:{session_id}"
+        history_key = self._history_key(session_id)
 
         if self._using_fallback:
             # Memory mode does not implement full history yet
             return
 
+        message_json = _dumps(message)
         try:
-            await self.redis_client.lpush(history_key, json.dumps(message, default=str))
-            await self.redis_client.expire(history_key, 7 * 86400)  # 7 days expiry
+            await self._eval(
+                _APPEND_HISTORY_LUA,
+                keys=[history_key],
+                args=[message_json, _HISTORY_TTL_SECONDS, _HISTORY_TTL_REFRESH_BELOW_MS, _HISTORY_MAX_LENGTH]
+            )
+            return
+        except Exception as e:
+            logger.debug("History append script failed for %s: %s, using pipeline", session_id, e)
+
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.lpush(history_key, message_json)
+            pipe.expire(history_key, _HISTORY_TTL_SECONDS)  # 7 days expiry
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Failed to append message to history {session_id}: {e}")
 
@@ -342,70 +828,315 @@ class RoutingSessionManager:
         Returns:
             Message list
         """
-        history_key = f"session_history:{session_id}"
+        history_key = self._history_key(session_id)
 
         if self._using_fallback:
             return []
 
         try:
             messages = await self.redis_client.lrange(history_key, -limit, -1)
-            return [json.loads(msg) for msg in messages]
+            return [_loads(msg) for msg in messages]
         except Exception as e:
             logger.error(f"Failed to get session history {session_id}: {e}")
             return []
 
+    async def _load_scripts(self) -> None:
+        """SCRIPT LOAD all Lua scripts so the first calls can use EVALSHA"""
+        try:
+            for script in _LUA_SCRIPTS:
+                await self.redis_client.script_load(script)
+        except Exception as e:
+            logger.warning(f"Failed to preload Lua scripts: {e} (EVAL will load them on demand)")
+
+    async def _eval(self, script: str, keys: List[str], args: List):
+        """
+        Run a Lua script by SHA1 (EVALSHA), sending the source only on NOSCRIPT
+
+        Args:
+            script: One of the module-level Lua scripts
+            keys: KEYS for the script
+            args: ARGV for the script
+
+        Returns:
+            Script result
+        """
+        try:
+            return await self.redis_client.evalsha(_SCRIPT_SHAS[script], len(keys), *keys, *args)
+        except NoScriptError:
+            pass
+        # Not cached on this server (restart, failover, SCRIPT FLUSH): EVAL caches it again
+        return await self.redis_client.eval(script, len(keys), *keys, *args)
+
+    def _memory_get(self, session_id: str) -> Optional[Session]:
+        """Session from the memory fallback (a fresh copy), None if not found"""
+        record = self._memory_sessions.get(session_id)
+        return record.to_session() if record else None
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        """Lock stripe guarding memory-mode writes for key"""
+        return self._lock_shards[hash(key) & (_MEMORY_LOCK_SHARDS - 1)]
+
+    def _remember(self, session_id: str, session_json: str) -> None:
+        """Put raw Session JSON into the short-lived read cache"""
+        self._recent[session_id] = (time.monotonic(), session_json)
+        self._recent.move_to_end(session_id)
+        if len(self._recent) > _RECENT_SESSIONS_MAX:
+            self._recent.popitem(last=False)
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a Session from the short-lived read cache (call after writing it)"""
+        self._recent.pop(session_id, None)
+
     # ==================== Internal helper methods ====================
 
     async def _save_session(self, session: Session, ttl_seconds: int) -> None:
-        """Save Session to storage"""
-        session_key = f"session:{session.session_id}"
+        """
+        Save Session to storage
+
+        Redis errors propagate: writing a memory copy that Redis-mode reads
+        never consult would only hide the failure.
+        """
+        session_key = self._session_key(session.session_id)
+        self.invalidate(session.session_id)
 
         if self._using_fallback:
-            self._memory_sessions[session.session_id] = session
+            async with self._lock_for(session.session_id):
+                self._memory_sessions[session.session_id] = _FastSession.from_session(session)
             return
 
         try:
             await self.redis_client.setex(
                 session_key,
                 ttl_seconds,
-                session.json()
+                _dump_model(session)
             )
         except Exception as e:
             logger.error(f"Failed to save session {session.session_id}: {e}")
-            self._memory_sessions[session.session_id] = session
+            raise
 
-    async def _add_to_user_sessions(self, user_id: str, session_id: str) -> None:
-        """Add Session to user Session set"""
+    async def _save_session_with_user_index(self, session: Session, ttl_seconds: int) -> None:
+        """
+        Save Session and (re-)score it in the user's index in one round-trip
+
+        SETEX + ZADD + EXPIRE go out in one pipeline, together with any
+        buffered index writes. Falls back to _save_session +
+        _add_to_user_sessions in memory mode or if the pipeline fails.
+        """
         if self._using_fallback:
-            if user_id not in self._memory_user_sessions:
-                self._memory_user_sessions[user_id] = []
-            self._memory_user_sessions[user_id].append(session_id)
+            await self._save_session(session, ttl_seconds)
+            await self._add_to_user_sessions(session)
             return
 
+        self.invalidate(session.session_id)
+        user_sessions_key = self._user_sessions_key(session.user_id, session.role)
+        # An older buffered score for this Session must not be written after this one
+        self._pending_index.get(user_sessions_key, {}).pop(session.session_id, None)
+
+        pending: Dict[str, Dict[str, float]] = {}
         try:
-            user_sessions_key = f"user_sessions:{user_id}"
-            await self.redis_client.sadd(user_sessions_key, session_id)
-            await self.redis_client.expire(user_sessions_key, 30 * 86400)  # 30 days
+            pipe = self.redis_client.pipeline()
+            pipe.setex(self._session_key(session.session_id), ttl_seconds, _dump_model(session))
+            pipe.zadd(user_sessions_key, {session.session_id: session.last_active_at.timestamp()})
+            pipe.expire(user_sessions_key, _USER_SESSIONS_TTL_SECONDS)  # 30 days
+            pending = self._queue_pending_index(pipe)
+            await pipe.execute()
         except Exception as e:
-            logger.error(f"Failed to add session to user {user_id}: {e}")
+            logger.error(f"Failed to save session {session.session_id} with user index: {e}")
+            self._restore_pending_index(pending)
+            await self._save_session(session, ttl_seconds)
+            await self._add_to_user_sessions(session)
+
+    async def _get_sessions_bulk(self, session_ids: List[str]) -> List[Optional[Session]]:
+        """
+        Get multiple Sessions in one round-trip (MGET)
 
-    async def _get_user_session_ids(self, user_id: str) -> List[str]:
-        """Get all user session_ids"""
+        Args:
+            session_ids: Session IDs
+
+        Returns:
+            Sessions in the same order (None for missing ones)
+        """
         if self._using_fallback:
-            return self._memory_user_sessions.get(user_id, [])
+            return [self._memory_get(sid) for sid in session_ids]
 
         try:
-            user_sessions_key = f"user_sessions:{user_id}"
-            session_ids = await self.redis_client.smembers(user_sessions_key)
-            return list(session_ids) if session_ids else []
+            raw_sessions = await self.redis_client.mget(*[self._session_key(sid) for sid in session_ids])
         except Exception as e:
-            logger.error(f"Failed to get user sessions for {user_id}: {e}")
-            return []
+            logger.error(f"Failed to bulk get {len(session_ids)} sessions: {e}, falling back to per-session reads")
+            return [await self.get_session(sid) for sid in session_ids]
+
+        return [_load_session(raw) if raw else None for raw in raw_sessions]
+
+    def _session_key(self, session_id: str) -> str:
+        """Redis key of a Session JSON"""
+        return f"{self.key_prefix}session:{session_id}"
+
+    def _history_key(self, session_id: str) -> str:
+        """Redis key of a Session's full message history"""
+        return f"{self.key_prefix}session_history:{session_id}"
+
+    def _user_sessions_key(self, user_id: str, role: SessionRole) -> str:
+        """Per-role ZSET of a user's session_ids, scored by last_active_at"""
+        if role == SessionRole.EXPERT:
+            return f"{self.key_prefix}user_sessions:{{{user_id}}}:as_expert"
+        return f"{self.key_prefix}user_sessions:{{{user_id}}}:as_user"
+
+    @staticmethod
+    def _legacy_user_sessions_key(user_id: str) -> str:
+        """Pre-ZSET user index (plain SET, written before key prefixes existed)"""
+        return f"user_sessions:{user_id}"
+
+    async def _add_to_user_sessions(self, session: Session) -> None:
+        """
+        Add (or re-score) Session in the user's per-role index
+
+        In Redis mode the write is buffered and flushed with other pending
+        index writes in one pipeline (see flush()).
+        """
+        if self._using_fallback:
+            async with self._lock_for(session.user_id):
+                self._memory_user_sessions.setdefault(session.user_id, set()).add(session.session_id)
+            return
+
+        await self._queue_index_write(
+            self._user_sessions_key(session.user_id, session.role),
+            session.session_id,
+            session.last_active_at.timestamp()
+        )
+
+    async def _queue_index_write(self, user_sessions_key: str, session_id: str, score: float) -> None:
+        """Buffer one index write (a newer score replaces a pending one); Redis mode only"""
+        self._pending_index.setdefault(user_sessions_key, {})[session_id] = score
+        self._pending_count += 1
+
+        if self._pending_count >= _INDEX_FLUSH_MAX_PENDING:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Flush buffered index writes after a short delay"""
+        await asyncio.sleep(_INDEX_FLUSH_DELAY_SECONDS)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Write all buffered user index updates in one pipeline
+
+        Called before reads of the index; call on shutdown to drain the
+        buffer. If the pipeline fails, the entries go back into the buffer
+        for the next flush.
+        """
+        if not self._pending_index:
+            return
+
+        pending: Dict[str, Dict[str, float]] = {}
+        try:
+            pipe = self.redis_client.pipeline()
+            pending = self._queue_pending_index(pipe)
+            await pipe.execute()
+        except Exception as e:
+            self._restore_pending_index(pending)
+            logger.error(
+                f"Failed to write user session index entries: {e} "
+                f"({self._pending_count} kept for the next flush)"
+            )
+
+    def _queue_pending_index(self, pipe) -> Dict[str, Dict[str, float]]:
+        """
+        Move all buffered index writes onto pipe (one ZADD + one EXPIRE per key)
+
+        Returns:
+            The drained entries (index key -> {session_id: score})
+        """
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+
+        pending, self._pending_index, self._pending_count = self._pending_index, {}, 0
+        for user_sessions_key, scores in pending.items():
+            pipe.zadd(user_sessions_key, scores)
+            pipe.expire(user_sessions_key, _USER_SESSIONS_TTL_SECONDS)  # 30 days
+        return pending
+
+    def _restore_pending_index(self, pending: Dict[str, Dict[str, float]]) -> None:
+        """Put drained index writes back after a failed pipeline (newer buffered scores win)"""
+        for user_sessions_key, scores in pending.items():
+            bucket = self._pending_index.setdefault(user_sessions_key, {})
+            for session_id, score in scores.items():
+                if session_id not in bucket:
+                    bucket[session_id] = score
+                    self._pending_count += 1
+
+    async def _migrate_legacy_user_sessions(self, user_id: str) -> None:
+        """
+        Move a user's legacy user_sessions SET into the per-role ZSETs
+
+        Ids whose Session no longer exists are dropped. No-op once migrated.
+        """
+        legacy_key = self._legacy_user_sessions_key(user_id)
+        session_ids = await self.redis_client.smembers(legacy_key)
+        if not session_ids:
+            return
+
+        session_ids = list(session_ids)
+        for session in await self._get_sessions_bulk(session_ids):
+            if session:
+                await self._add_to_user_sessions(session)
+
+        await self.flush()
+        await self.redis_client.delete(legacy_key)
+        logger.info(f"Migrated {len(session_ids)} legacy user_sessions entries for {user_id}")
+
+    async def _rmw_update_session(
+        self,
+        session_id: str,
+        new_message: Optional[MessageSnapshot],
+        key_points: Optional[List[str]],
+        session_status: Optional[SessionStatus]
+    ) -> Optional[int]:
+        """
+        Apply a summary update inside Redis in one round-trip (Lua)
+
+        Returns:
+            New summary version, 0 if the Session does not exist, or None if
+            the script failed (caller falls back to GET + CAS)
+        """
+        now = datetime.now()
+        try:
+            result = await self._eval(
+                _RMW_UPDATE_SESSION_LUA,
+                keys=[self._session_key(session_id)],
+                args=[
+                    _dump_model(new_message) if new_message else "",
+                    _dumps(key_points or []),
+                    session_status.value if session_status else "",
+                    7 * 86400,  # ACTIVE / WAITING_EXPERT: 7 days
+                    24 * 3600,  # RESOLVED: 24 hours
+                    now.isoformat()
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Server-side update failed for session {session_id}: {e}, falling back to CAS")
+            return None
+        finally:
+            # A get_session that ran during the await may have cached the pre-update JSON
+            self.invalidate(session_id)
+
+        if not result:
+            return 0
+
+        version, user_id, role = result
+        await self._queue_index_write(
+            self._user_sessions_key(user_id, SessionRole(role)), session_id, now.timestamp()
+        )
+        return int(version)
 
     async def _cas_update_session(
         self,
         session: Session,
-        expected_version: int
+        expected_version: int,
+        reset_ttl: bool = True
     ) -> bool:
         """
         CAS update Session (Compare-And-Swap)
@@ -413,78 +1144,62 @@ class RoutingSessionManager:
         Args:
             session: Updated Session object
             expected_version: Expected version number
+            reset_ttl: Re-arm the TTL for the Session's status; False keeps
+                the current expiry (plain summary update, no status change)
 
         Returns:
             Whether update was successful
         """
         if self._using_fallback:
-            # Memory mode: direct update
-            self._memory_sessions[session.session_id] = session
-            return True
-
-        try:
-            # Lua script for CAS
-            lua_script = """
-            local key = KEYS[1]
-            local expected_version = tonumber(ARGV[1])
-            local new_value = ARGV[2]
-            local ttl_seconds = tonumber(ARGV[3])
-
-            local current = redis.call('GET', key)
-            if not current then
-                return 0  -- Session was deleted
-            end
-
-            local current_data = cjson.decode(current)
-            local current_version = current_data.summary.version
+            # Memory mode: compare-and-swap under the Session's lock stripe
+            async with self._lock_for(session.session_id):
+                current = self._memory_sessions.get(session.session_id)
+                if current is None:
+                    return False
+                if current.summary.version != expected_version:
+                    return False
+                self._memory_sessions[session.session_id] = _FastSession.from_session(session)
+                return True
 
-            if current_version == expected_version then
-                redis.call('SETEX', key, ttl_seconds, new_value)
-                return 1  -- Success
-            else
-                return -1  -- Version conflict
-            end
-            """
+        # Success or conflict, the cached copy is outdated either way; on
+        # success it is replaced by what was just written
+        self.invalidate(session.session_id)
 
-            # Calculate TTL
-            if session.status == SessionStatus.RESOLVED:
+        try:
+            # Calculate TTL (0 = keep the current one)
+            if not reset_ttl:
+                ttl_seconds = 0
+            elif session.status == SessionStatus.RESOLVED:
                 ttl_seconds = 24 * 3600  # 24 hours
             else:
                 ttl_seconds = 7 * 86400  # 7 days
 
-            session_key = f"session:{session.session_id}"
-            result = await self.redis_client.eval(
-                lua_script,
+            session_key = self._session_key(session.session_id)
+            session_json = _dump_model(session)
+            result = await self._eval(
+                _CAS_UPDATE_SESSION_LUA,
                 keys=[session_key],
-                args=[expected_version, session.json(), ttl_seconds]
+                args=[expected_version, session_json, ttl_seconds]
             )
 
-            return result == 1
+            if result == 1:
+                self._remember(session.session_id, session_json)
+                return True
+            return False
 
         except Exception as e:
             logger.error(f"CAS update failed for session {session.session_id}: {e}")
             return False
 
-    async def _transition_to_resolved(self, session: Session) -> None:
-        """
-        Mark Session as resolved (set 24h TTL)
-
-        Args:
-            session: Session object
-        """
-        session.status = SessionStatus.RESOLVED
-        session.last_active_at = datetime.now()
-
-        await self._save_session(session, ttl_seconds=24 * 3600)
-
-
 # Global singleton
 _routing_session_manager: Optional[RoutingSessionManager] = None
+_manager_lock = threading.Lock()
 
 
 def get_routing_session_manager(
     kb_root: Optional[Path] = None,
-    redis_client=None
+    redis_client=None,
+    key_prefix: str = ""
 ) -> RoutingSessionManager:
     """
     Get RoutingSessionManager singleton
@@ -492,6 +1207,7 @@ def get_routing_session_manager(
     Args:
         kb_root: Knowledge base root directory
         redis_client: Redis client
+        key_prefix: Prefix for all Redis keys (used on first call only)
 
     Returns:
         RoutingSessionManager instance
@@ -499,15 +1215,18 @@ def get_routing_session_manager(
     global _routing_session_manager
 
     if _routing_session_manager is None:
-        from backend.config.settings import settings
-
-        if kb_root is None:
-            kb_root = Path(settings.KB_ROOT_PATH)
-
-        _routing_session_manager = RoutingSessionManager(
-            kb_root=kb_root,
-            redis_client=redis_client
-        )
+        with _manager_lock:
+            if _routing_session_manager is None:
+                if kb_root is None:
+                    # Deferred: importing settings requires credentials
+                    from backend.config.settings import settings
+                    kb_root = Path(settings.KB_ROOT_PATH)
+
+                _routing_session_manager = RoutingSessionManager(
+                    kb_root=kb_root,
+                    redis_client=redis_client,
+                    key_prefix=key_prefix
+                )
 
     return _routing_session_manager
 
@@ -4,12 +4,15 @@ Responsible for managing user sessions, timeout control, and permission associat
 Supports Redis persistence and memory fallback
 """
 import asyncio
+import heapq
 import logging
+import os
 import time
-from typing import Dict, Optional
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
-import uuid
 
 from ..config.settings import get_settings
 from ..storage.base import SessionStorage, SessionRecord
@@ -18,11 +21,28 @@ from redis.exceptions import RedisError, ConnectionError as RedisConnectionError
 
 logger = logging.getLogger(__name__)
 
+# Write-through cache of storage session records (per process, LRU + TTL)
+_SESSION_CACHE_MAX = 10_000
+_SESSION_CACHE_TTL_SECONDS = 5.0
 
-@dataclass
+# Upper bound on user sessions kept in memory while Redis is unavailable (LRU)
+_FALLBACK_SESSIONS_MAX = 100_000
+
+
+def _format_timestamp(ts: float) -> str:
+    """Local-time ISO-8601 string (seconds precision) without building a datetime"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts))
+
+
+def _new_id() -> str:
+    """Random 128-bit session identifier (32 hex chars, no UUID object)"""
+    return os.urandom(16).hex()
+
+
+@dataclass(slots=True)
 class Session:
     """
-    Session data class (backward compatible)
+    Session data class (backward compatible, slotted: no per-instance __dict__)
 
     Attributes:
         session_id: Session unique identifier
@@ -72,8 +92,8 @@ class Session:
         return {
             "session_id": self.session_id,
             "user_id": self.user_id,
-            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
-            "last_active": datetime.fromtimestamp(self.last_active).isoformat(),
+            "created_at": _format_timestamp(self.created_at),
+            "last_active": _format_timestamp(self.last_active),
             "age_seconds": self.get_age(),
             "metadata": self.metadata
         }
@@ -102,34 +122,63 @@ class SessionManager:
             storage: Session storage backend (optional, defaults to memory)
         """
         self.settings = get_settings()
+
+        # Fallback flag
+        self._using_fallback = False
+        # Storage to use for user sessions: storage unless in fallback, else None
+        # (kept in sync by the storage setter and _set_fallback)
+        self._backend: Optional[SessionStorage] = None
         self.storage = storage
 
         # Original memory session storage (session_id -> Session)
         self.sessions: Dict[str, Session] = {}
 
+        # Reverse index for get_user_sessions (user_id -> {session_id})
+        self._sessions_by_user: Dict[str, Set[str]] = {}
+
+        # Expiry index: min-heap of (deadline, session_id), one entry per session.
+        # Activity is not pushed here (callers touch Session.last_active
+        # directly); a due entry is re-checked and re-pushed if still active.
+        self._expiry_heap: List[Tuple[float, str]] = []
+
         # New: User session memory cache (user_id -> claude_session_id)
-        # Used for Redis fallback scenario
-        self._user_sessions_memory: Dict[str, SessionRecord] = {}
+        # Used for Redis fallback scenario; LRU order, bounded by _FALLBACK_SESSIONS_MAX
+        self._user_sessions_memory: OrderedDict[str, SessionRecord] = OrderedDict()
 
-        # Fallback flag
-        self._using_fallback = False
+        # user_id -> (cached_at monotonic, SessionRecord), LRU order; storage mode only
+        self._session_cache: OrderedDict[str, Tuple[float, SessionRecord]] = OrderedDict()
 
         self.cleanup_task: Optional[asyncio.Task] = None
         self._cleanup_running = False
 
         logger.info("Session manager initialized (supports Redis persistence)")
 
+    @property
+    def storage(self) -> Optional[SessionStorage]:
+        """Session storage backend (None = memory only)"""
+        return self._storage
+
+    @storage.setter
+    def storage(self, storage: Optional[SessionStorage]) -> None:
+        self._storage = storage
+        self._set_fallback(self._using_fallback)
+
+    def _set_fallback(self, using_fallback: bool) -> None:
+        """Switch between storage and memory fallback for user sessions"""
+        self._using_fallback = using_fallback
+        self._backend = self._storage if self._storage and not using_fallback else None
+
     async def initialize_storage(self) -> None:
         """Initialize storage backend"""
         if self.storage:
             try:
                 await self.storage.connect()
                 logger.info("✅ 会话存储初始化成功")
-                self._using_fallback = False
+                self._set_fallback(False)
             except Exception as e:
                 logger.error(f"❌ 会话存储初始化失败: {e}")
                 logger.warning("⚠️  降级到内存存储")
-                self._using_fallback = True
+                self._set_fallback(True)
 
     async def start_cleanup_task(self):
         """Start session cleanup task (runs in background)"""
@@ -153,16 +202,28 @@ class SessionManager:
             logger.info("会话清理任务已停止")
 
     async def _cleanup_loop(self):
-        """Session cleanup loop (check every minute)"""
+        """Session cleanup loop (wakes at the earliest expiry, at least every minute)"""
         while self._cleanup_running:
             try:
-                await asyncio.sleep(60)  # Check every minute
+                await asyncio.sleep(self._next_cleanup_delay())
                 await self.cleanup_expired_sessions()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"会话清理失败: {e}")
 
+    def _next_cleanup_delay(self) -> float:
+        """
+        Seconds until the earliest expiry deadline, clamped to [1, 60]
+
+        New sessions and activity only add later deadlines, so a sleep never
+        needs to be cut short; the 60s cap covers sessions created while
+        the heap was empty.
+        """
+        if not self._expiry_heap:
+            return 60.0
+        return max(1.0, min(60.0, self._expiry_heap[0][0] - time.time()))
+
     async def cleanup_expired_sessions(self) -> int:
         """
         Cleanup expired sessions
@@ -171,20 +232,31 @@ class SessionManager:
             Number of cleaned sessions
         """
         timeout = self.settings.SESSION_TIMEOUT
-        expired_sessions = [
-            session_id
-            for session_id, session in self.sessions.items()
-            if session.is_expired(timeout)
-        ]
-
-        for session_id in expired_sessions:
-            await self.delete_session(session_id)
-            logger.info(f"清理过期会话: {session_id}")
+        now = time.time()
+        heap = self._expiry_heap
+        sessions = self.sessions
+        cleaned = 0
+
+        # Only entries whose deadline has passed are touched; expired
+        # sessions are removed in the same pass
+        while heap and heap[0][0] < now:
+            _, session_id = heapq.heappop(heap)
+            session = sessions.get(session_id)
+            if session is None:
+                continue  # Already deleted
+            deadline = session.last_active + timeout
+            if deadline < now:
+                del sessions[session_id]
+                self._unindex_user_session(session)
+                cleaned += 1
+                logger.debug(f"清理过期会话: {session_id}")
+            else:
+                heapq.heappush(heap, (deadline, session_id))
 
-        if expired_sessions:
-            logger.info(f"已清理 {len(expired_sessions)} 个过期会话")
+        if cleaned:
+            logger.info(f"已清理 {cleaned} 个过期会话")
 
-        return len(expired_sessions)
+        return cleaned
 
     # ===== Original methods (backward compatible) =====
 
@@ -203,15 +275,22 @@ class SessionManager:
         Returns:
             Newly created session object
         """
-        session_id = str(uuid.uuid4())
+        session_id = _new_id()
+        now = time.time()
         session = Session(
             session_id=session_id,
             user_id=user_id,
+            created_at=now,
+            last_active=now,
             metadata=metadata or {}
         )
 
         self.sessions[session_id] = session
-        logger.info(f"创建新会话: {session_id} (用户: {user_id or 'anonymous'})")
+        if user_id:
+            self._sessions_by_user.setdefault(user_id, set()).add(session_id)
+        heapq.heappush(self._expiry_heap, (session.last_active + self.settings.SESSION_TIMEOUT, session_id))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"创建新会话: {session_id} (用户: {user_id or 'anonymous'})")
 
         return session
 
@@ -226,13 +305,26 @@ class SessionManager:
             Whether successfully deleted
         """
         if session_id in self.sessions:
-            del self.sessions[session_id]
-            logger.info(f"删除会话: {session_id}")
+            self._remove_session(session_id)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"删除会话: {session_id}")
             return True
         else:
             logger.warning(f"会话不存在: {session_id}")
             return False
 
+    def _remove_session(self, session_id: str) -> None:
+        """Drop a session and its reverse index entry (expiry heap entry is dropped lazily)"""
+        self._unindex_user_session(self.sessions.pop(session_id))
+
+    def _unindex_user_session(self, session: Session) -> None:
+        """Remove a session from the user_id reverse index"""
+        user_session_ids = self._sessions_by_user.get(session.user_id)
+        if user_session_ids is not None:
+            user_session_ids.discard(session.session_id)
+            if not user_session_ids:
+                del self._sessions_by_user[session.user_id]
+
     def get_session(self, session_id: str) -> Optional[Session]:
         """
         Get session
@@ -241,20 +333,38 @@ class SessionManager:
             session_id: Session ID
 
         Returns:
-            Session object, None if not exists
+            Session object, None if not exists (or expired)
         """
         session = self.sessions.get(session_id)
 
         if session:
+            # Lazy expiry: reclaim an idle session on access instead of
+            # waiting for the next cleanup sweep
+            if session.is_expired(self.settings.SESSION_TIMEOUT):
+                self._remove_session(session_id)
+                logger.info(f"清理过期会话: {session_id}")
+                return None
+
             # Update active time
             session.update_activity()
 
         return session
 
-    def get_all_sessions(self) -> Dict[str, Session]:
+    def get_all_sessions(self) -> Mapping[str, Session]:
         """
         Get all sessions
 
+        Returns:
+            Read-only live view of the session dictionary (no copy); it
+            reflects later changes, so use snapshot_sessions() to keep a
+            stable copy or to iterate across an await
+        """
+        return MappingProxyType(self.sessions)
+
+    def snapshot_sessions(self) -> Dict[str, Session]:
+        """
+        Get a copy of all sessions
+
         Returns:
             Session dictionary
         """
@@ -279,11 +389,8 @@ class SessionManager:
         Returns:
             Session dictionary for this user
         """
-        return {
-            sid: session
-            for sid, session in self.sessions.items()
-            if session.user_id == user_id
-        }
+        sessions = self.sessions
+        return {sid: sessions[sid] for sid in self._sessions_by_user.get(user_id, ())}
 
     def session_exists(self, session_id: str) -> bool:
         """
@@ -326,14 +433,17 @@ class SessionManager:
         Returns:
             Statistics dictionary
         """
+        # Single pass; one clock read: mean age = now - mean(created_at)
         total = len(self.sessions)
-        with_user = sum(1 for s in self.sessions.values() if s.user_id)
+        with_user = 0
+        created_sum = 0.0
+        for s in self.sessions.values():
+            if s.user_id:
+                with_user += 1
+            created_sum += s.created_at
         anonymous = total - with_user
 
-        if total > 0:
-            avg_age = sum(s.get_age() for s in self.sessions.values()) / total
-        else:
-            avg_age = 0
+        avg_age = time.time() - created_sum / total if total > 0 else 0
 
         user_session_count = len(self._user_sessions_memory) if self._using_fallback else 0
 
@@ -349,6 +459,59 @@ class SessionManager:
 
     # ===== New methods (user_id based persistence) =====
 
+    async def _get_active_session_cached(self, user_id: str) -> Optional[SessionRecord]:
+        """Storage get_active_session behind the short-lived write-through cache"""
+        cached = self._session_cache.get(user_id)
+        if cached is not None:
+            if time.monotonic() - cached[0] < _SESSION_CACHE_TTL_SECONDS:
+                self._session_cache.move_to_end(user_id)
+                return cached[1]
+            del self._session_cache[user_id]
+
+        session = await self._backend.get_active_session(user_id)
+        if session is not None:
+            self._cache_session(session)
+        return session
+
+    def _cache_session(self, session: SessionRecord) -> None:
+        """Store a record just read from / written to storage"""
+        self._session_cache[session.user_id] = (time.monotonic(), session)
+        self._session_cache.move_to_end(session.user_id)
+        if len(self._session_cache) > _SESSION_CACHE_MAX:
+            self._session_cache.popitem(last=False)
+
+    def _get_fallback_session(self, user_id: str) -> Optional[SessionRecord]:
+        """Look up a fallback-mode session, marking it most recently used"""
+        session = self._user_sessions_memory.get(user_id)
+        if session is not None:
+            self._user_sessions_memory.move_to_end(user_id)
+        return session
+
+    def _store_fallback_session(self, session: SessionRecord) -> None:
+        """Store a fallback-mode session, evicting the least recently used one when full"""
+        self._user_sessions_memory[session.user_id] = session
+        self._user_sessions_memory.move_to_end(session.user_id)
+        if len(self._user_sessions_memory) > _FALLBACK_SESSIONS_MAX:
+            evicted_user_id, _ = self._user_sessions_memory.popitem(last=False)
+            logger.warning(f"[内存] 会话数超过上限 {_FALLBACK_SESSIONS_MAX}，淘汰用户 {evicted_user_id} 的会话")
+
+    async def _patch_active_session(self, user_id: str, **fields) -> bool:
+        """Patch storage fields and apply the same change to the cached record"""
+        try:
+            updated = await self._backend.update_active_session_fields(user_id, **fields)
+        except Exception:
+            self._session_cache.pop(user_id, None)
+            raise
+
+        cached = self._session_cache.get(user_id)
+        if cached is not None:
+            if updated:
+                for name, value in fields.items():
+                    setattr(cached[1], name, value)
+            else:
+                del self._session_cache[user_id]
+        return updated
+
     async def get_or_create_user_session(self, user_id: str) -> Optional[str]:
         """
         Get or create user session, return SDK session ID (for resume)
@@ -366,26 +529,29 @@ class SessionManager:
                            - str: Existing session, can resume
         """
         # Try to get from Redis/storage backend
-        if self.storage and not self._using_fallback:
+        backend = self._backend
+        if backend is not None:
             try:
-                session = await self.storage.get_active_session(user_id)
+                session = await self._get_active_session_cached(user_id)
 
                 if session is None:
                     # Create new session (sdk_session_id is None)
                     session = SessionRecord(
                         user_id=user_id,
-                        internal_session_id=str(uuid.uuid4()),
+                        internal_session_id=_new_id(),
                         sdk_session_id=None  # Wait for SDK to return
                     )
-                    await self.storage.save_active_session(session)
+                    await backend.save_active_session(session)
+                    self._cache_session(session)
                     logger.info(f"为用户 {user_id} 创建新会话: internal={session.internal_session_id}")
                     return None  # New session, no resume
                 else:
                     # Reuse existing session
                     if session.sdk_session_id:
-                        logger.info(
-                            f"用户 {user_id} 复用已有会话: sdk={session.sdk_session_id}"
-                        )
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info(
+                                f"用户 {user_id} 复用已有会话: sdk={session.sdk_session_id}"
+                            )
                         return session.sdk_session_id  # Return SDK session ID for resume
                     else:
                         logger.info(
@@ -395,11 +561,11 @@ class SessionManager:
 
             except (RedisError, RedisConnectionError, RuntimeError) as e:
                 logger.error(f"Redis 操作失败: {e}，降级到内存存储")
-                self._using_fallback = True
+                self._set_fallback(True)
 
         # Fallback to memory storage
-        if user_id in self._user_sessions_memory:
-            session = self._user_sessions_memory[user_id]
+        session = self._get_fallback_session(user_id)
+        if session is not None:
             if session.sdk_session_id:
                 logger.info(f"[内存] 用户 {user_id} 复用会话: sdk={session.sdk_session_id}")
                 return session.sdk_session_id
@@ -409,10 +575,10 @@ class SessionManager:
         else:
             session = SessionRecord(
                 user_id=user_id,
-                internal_session_id=str(uuid.uuid4()),
+                internal_session_id=_new_id(),
                 sdk_session_id=None
             )
-            self._user_sessions_memory[user_id] = session
+            self._store_fallback_session(session)
             logger.info(f"[内存] 为用户 {user_id} 创建新会话: internal={session.internal_session_id}")
             return None  # 新会话不 resume
 
@@ -428,23 +594,22 @@ class SessionManager:
             user_id: User identifier
             turn_count: Conversation turn count (optional)
         """
-        if self.storage and not self._using_fallback:
+        backend = self._backend
+        if backend is not None:
             try:
-                session = await self.storage.get_active_session(user_id)
-                if session:
-                    session.last_active = datetime.now()
-                    if turn_count is not None:
-                        session.turn_count = turn_count
-                    await self.storage.save_active_session(session)
+                fields = {"last_active": datetime.now()}
+                if turn_count is not None:
+                    fields["turn_count"] = turn_count
+                if await self._patch_active_session(user_id, **fields):
                     logger.debug(f"更新用户 {user_id} 会话活跃度")
                 return
             except (RedisError, RedisConnectionError, RuntimeError) as e:
                 logger.error(f"Redis 更新失败: {e}，降级到内存存储")
-                self._using_fallback = True
+                self._set_fallback(True)
 
         # Fallback to memory
-        if user_id in self._user_sessions_memory:
-            session = self._user_sessions_memory[user_id]
+        session = self._get_fallback_session(user_id)
+        if session is not None:
             session.last_active = datetime.now()
             if turn_count is not None:
                 session.turn_count = turn_count
@@ -461,24 +626,26 @@ class SessionManager:
             user_id: User identifier
             sdk_session_id: Real session ID returned by SDK
         """
-        if self.storage and not self._using_fallback:
+        backend = self._backend
+        if backend is not None:
             try:
-                session = await self.storage.get_active_session(user_id)
-                if session:
-                    session.sdk_session_id = sdk_session_id
-                    session.last_active = datetime.now()
-                    await self.storage.save_active_session(session)
+                updated = await self._patch_active_session(
+                    user_id,
+                    sdk_session_id=sdk_session_id,
+                    last_active=datetime.now()
+                )
+                if updated:
                     logger.info(f"保存用户 {user_id} 的 SDK session ID: {sdk_session_id}")
                 else:
                     logger.warning(f"用户 {user_id} 没有活跃会话，无法保存 SDK session ID")
                 return
             except (RedisError, RedisConnectionError, RuntimeError) as e:
                 logger.error(f"Redis 保存 SDK session ID 失败: {e}，降级到内存存储")
-                self._using_fallback = True
+                self._set_fallback(True)
 
         # Fallback to memory
-        if user_id in self._user_sessions_memory:
-            session = self._user_sessions_memory[user_id]
+        session = self._get_fallback_session(user_id)
+        if session is not None:
             session.sdk_session_id = sdk_session_id
             session.last_active = datetime.now()
             logger.info(f"[内存] 保存用户 {user_id} 的 SDK session ID: {sdk_session_id}")
@@ -494,27 +661,30 @@ class SessionManager:
         Args:
             user_id: User identifier
         """
-        if self.storage and not self._using_fallback:
+        backend = self._backend
+        if backend is not None:
+            self._session_cache.pop(user_id, None)
             try:
                 # Archive old session (PostgreSQL archiving not implemented yet)
-                old_session = await self.storage.get_active_session(user_id)
+                old_session = await backend.get_active_session(user_id)
                 if old_session:
-                    await self.storage.delete_active_session(user_id)
+                    await backend.delete_active_session(user_id)
                     logger.info(f"用户 {user_id} 归档旧会话: internal={old_session.internal_session_id}")
 
                 # Create new session (sdk_session_id is None)
                 new_session = SessionRecord(
                     user_id=user_id,
-                    internal_session_id=str(uuid.uuid4()),
+                    internal_session_id=_new_id(),
                     sdk_session_id=None
                 )
-                await self.storage.save_active_session(new_session)
+                await backend.save_active_session(new_session)
+                self._cache_session(new_session)
                 logger.info(f"用户 {user_id} 创建新会话: internal={new_session.internal_session_id}")
                 return
 
             except (RedisError, RedisConnectionError, RuntimeError) as e:
                 logger.error(f"Redis 操作失败: {e}，降级到内存存储")
-                self._using_fallback = True
+                self._set_fallback(True)
 
         # Fallback to memory
         old_session = self._user_sessions_memory.get(user_id)
@@ -523,10 +693,10 @@ class SessionManager:
 
         new_session = SessionRecord(
             user_id=user_id,
-            internal_session_id=str(uuid.uuid4()),
+            internal_session_id=_new_id(),
             sdk_session_id=None
         )
-        self._user_sessions_memory[user_id] = new_session
+        self._store_fallback_session(new_session)
         logger.info(f"[内存] 用户 {user_id} 创建新会话: internal={new_session.internal_session_id}")
 
     async def __aenter__(self):
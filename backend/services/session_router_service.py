@@ -154,8 +154,8 @@ class SessionRouterService:
             # Convert to dict (Session objects need serialization)
             return {
                 "user_id": result.user_id,
-                "as_user": [s.dict() for s in result.as_user],
-                "as_expert": [s.dict() for s in result.as_expert],
+                "as_user": [s.to_router_view() for s in result.as_user],
+                "as_expert": [s.to_router_view() for s in result.as_expert],
                 "total_count": result.total_count
             }
 
@@ -239,12 +239,12 @@ class SessionRouterService:
             "current_time": datetime.now().isoformat(),  # Current timestamp for time window judgment
             "user_info": user_info,
             "candidate_sessions": {
-                "as_user": [s.dict() for s in sessions.as_user],
-                "as_expert": [s.dict() for s in sessions.as_expert]
+                "as_user": [s.to_router_view() for s in sessions.as_user],
+                "as_expert": [s.to_router_view() for s in sessions.as_expert]
             }
         }
 
-        logger.info(f"Routing message for user {user_id}: {new_message[:50]}...")
+        logger.info("Routing message for user %s: %.50s...", user_id, new_message)
         logger.info(f"  Candidate sessions: {sessions.total_count} ({len(sessions.as_user)} user, {len(sessions.as_expert)} expert)")
 
         try:
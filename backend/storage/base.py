@@ -99,6 +99,28 @@ class SessionStorage(ABC):
         """
         pass
 
+    async def update_active_session_fields(self, user_id: str, **fields) -> bool:
+        """
+        Patch fields of user's active session
+
+        Default implementation is get + save; backends override it with a
+        single atomic operation.
+
+        Args:
+            user_id: User identifier
+            **fields: SessionRecord fields to set (e.g. last_active, turn_count)
+
+        Returns:
+            Whether the session existed (nothing is created otherwise)
+        """
+        session = await self.get_active_session(user_id)
+        if session is None:
+            return False
+        for name, value in fields.items():
+            setattr(session, name, value)
+        await self.save_active_session(session)
+        return True
+
     @abstractmethod
     async def delete_active_session(self, user_id: str) -> bool:
         """
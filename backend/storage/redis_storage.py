@@ -15,6 +15,19 @@ from .base import SessionStorage, SessionRecord
 
 logger = logging.getLogger(__name__)
 
+# Patch some fields of an existing session hash and renew its TTL, without
+# creating it when absent
+# KEYS[1] = session key, ARGV[1] = TTL (seconds), ARGV[2..] = field, value, ...
+# Returns 1 if the session existed, 0 otherwise
+_PATCH_SESSION_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
 
 class RedisSessionStorage(SessionStorage):
     """
@@ -34,7 +47,8 @@ class RedisSessionStorage(SessionStorage):
         key_prefix: str = "kb_session:",
         max_connections: int = 10,
         username: Optional[str] = None,
-        password: Optional[str] = None
+        password: Optional[str] = None,
+        health_check_interval: int = 30
     ):
         """
         Initialize Redis storage
@@ -46,6 +60,9 @@ class RedisSessionStorage(SessionStorage):
             max_connections: Maximum number of connections
             username: Redis ACL username (optional)
             password: Redis password (optional)
+            health_check_interval: PING a pooled connection idle for longer
+                than this (seconds) before reusing it, so connections left
+                stale by a failover/restart are replaced instead of stalling
         """
         self.redis_url = redis_url
         self.ttl_seconds = ttl_seconds
@@ -53,7 +70,9 @@ class RedisSessionStorage(SessionStorage):
         self.max_connections = max_connections
         self.username = username
         self.password = password
+        self.health_check_interval = health_check_interval
         self.redis: Optional[aioredis.Redis] = None
+        self._patch_session = None  # Registered _PATCH_SESSION_LUA (EVALSHA)
         self._connected = False
 
         auth_status = "enabled" if password else "disabled"
@@ -73,7 +92,10 @@ class RedisSessionStorage(SessionStorage):
             connection_kwargs = {
                 "encoding": "utf-8",
                 "decode_responses": True,
-                "max_connections": self.max_connections
+                "max_connections": self.max_connections,
+                "health_check_interval": self.health_check_interval,
+                "socket_keepalive": True,
+                "retry_on_timeout": True
             }
             if self.username:
                 connection_kwargs["username"] = self.username
@@ -86,6 +108,7 @@ class RedisSessionStorage(SessionStorage):
             )
             # Test connection
             await self.redis.ping()
+            self._patch_session = self.redis.register_script(_PATCH_SESSION_LUA)
             self._connected = True
             logger.info("✅ Redis connection successful")
         except RedisConnectionError as e:
@@ -130,21 +153,7 @@ class RedisSessionStorage(SessionStorage):
                 logger.debug(f"User {user_id} has no active session")
                 return None
 
-            # Deserialize (compatible with old data format)
-            # New format: internal_session_id + sdk_session_id
-            # Old format: claude_session_id
-            internal_id = data.get("internal_session_id") or data.get("claude_session_id")
-            sdk_id = data.get("sdk_session_id")  # May be None or empty string
-
-            session = SessionRecord(
-                user_id=user_id,
-                internal_session_id=internal_id,
-                sdk_session_id=sdk_id if sdk_id else None,
-                created_at=datetime.fromisoformat(data["created_at"]),
-                last_active=datetime.fromisoformat(data["last_active"]),
-                turn_count=int(data.get("turn_count", 0)),
-                metadata=json.loads(data.get("metadata", "{}"))
-            )
+            session = self._deserialize(user_id, data)
 
             logger.debug(
                 f"Loaded session from Redis: {user_id} -> internal={session.internal_session_id}, "
@@ -159,6 +168,27 @@ class RedisSessionStorage(SessionStorage):
             logger.error(f"Session deserialization failed: {e}")
             raise
 
+    @staticmethod
+    def _deserialize(user_id: str, data: Dict[str, str]) -> SessionRecord:
+        """
+        Build a SessionRecord from a session hash (compatible with old data format)
+
+        New format: internal_session_id + sdk_session_id
+        Old format: claude_session_id
+        """
+        internal_id = data.get("internal_session_id") or data.get("claude_session_id")
+        sdk_id = data.get("sdk_session_id")  # May be None or empty string
+
+        return SessionRecord(
+            user_id=user_id,
+            internal_session_id=internal_id,
+            sdk_session_id=sdk_id if sdk_id else None,
+            created_at=datetime.fromisoformat(data["created_at"]),
+            last_active=datetime.fromisoformat(data["last_active"]),
+            turn_count=int(data.get("turn_count", 0)),
+            metadata=json.loads(data.get("metadata", "{}"))
+        )
+
     async def save_active_session(self, session: SessionRecord) -> None:
         """
         Save active session
@@ -202,6 +232,47 @@ class RedisSessionStorage(SessionStorage):
             logger.error(f"Session serialization failed: {e}")
             raise
 
+    async def update_active_session_fields(self, user_id: str, **fields) -> bool:
+        """
+        Patch fields of user's active session in one round-trip
+
+        Only the given hash fields are written (EVALSHA), and the TTL is
+        renewed as by save_active_session; no read-modify-write on the client.
+
+        Args:
+            user_id: User identifier
+            **fields: SessionRecord fields to set (e.g. last_active, turn_count)
+
+        Returns:
+            Whether the session existed (nothing is created otherwise)
+        """
+        if not self._connected or not self.redis:
+            raise RuntimeError("Redis not connected")
+
+        args = [self.ttl_seconds]
+        for name, value in fields.items():
+            args.extend((name, self._serialize_field(name, value)))
+
+        try:
+            result = await self._patch_session(keys=[self._make_key(user_id)], args=args)
+        except RedisError as e:
+            logger.error(f"Redis write failed: {e}")
+            raise
+
+        logger.debug(f"Patched session fields {list(fields)} for {user_id} (exists={bool(result)})")
+        return bool(result)
+
+    @staticmethod
+    def _serialize_field(name: str, value) -> str:
+        """Serialize one SessionRecord field as stored in the session hash"""
+        if name in ("created_at", "last_active"):
+            return value.isoformat()
+        if name == "metadata":
+            return json.dumps(value, ensure_ascii=False)
+        if value is None:
+            return ""  # Redis doesn't support None
+        return str(value)
+
     async def delete_active_session(self, user_id: str) -> bool:
         """
         Delete active session
@@ -241,16 +312,27 @@ class RedisSessionStorage(SessionStorage):
             raise RuntimeError("Redis not connected")
 
         try:
-            # Use SCAN to iterate all keys (avoid KEYS blocking)
+            # Use SCAN to iterate all keys (avoid KEYS blocking); the hashes of
+            # each SCAN batch are fetched with one pipelined HGETALL round-trip
             sessions = {}
             pattern = f"{self.key_prefix}*"
-
-            async for key in self.redis.scan_iter(match=pattern, count=100):
-                # Extract user_id
-                user_id = key[len(self.key_prefix):]
-                session = await self.get_active_session(user_id)
-                if session:
-                    sessions[user_id] = session
+            cursor = 0
+
+            while True:
+                cursor, keys = await self.redis.scan(cursor=cursor, match=pattern, count=100)
+                if keys:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for key in keys:
+                            pipe.hgetall(key)
+                        results = await pipe.execute()
+
+                    for key, data in zip(keys, results):
+                        if not data:
+                            continue  # Expired between SCAN and HGETALL
+                        user_id = key[len(self.key_prefix):]
+                        sessions[user_id] = self._deserialize(user_id, data)
+                if cursor == 0:
+                    break
 
             logger.debug(f"Loaded {len(sessions)} active session(s)")
             return sessions
@@ -6,10 +6,12 @@ from .wework_crypto import (
     verify_url,
     parse_message
 )
+from .event_loop import install_event_loop_policy
 
 __all__ = [
     'compute_signature',
     'decrypt_message',
     'verify_url',
-    'parse_message'
+    'parse_message',
+    'install_event_loop_policy'
 ]
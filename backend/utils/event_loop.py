@@ -0,0 +1,45 @@
+"""
+Event loop policy helper for standalone asyncio entrypoints
+
+The FastAPI service runs under uvicorn, which already picks uvloop when it is
+installed (uvicorn[standard]). The IM callback servers (Flask) create their own
+event loops with asyncio.new_event_loop(), so they install the policy here.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def install_event_loop_policy() -> str:
+    """
+    Install the best available asyncio event loop policy
+
+    - Windows: Proactor event loop (Flask + asyncio compatibility)
+    - Others: uvloop if installed, unless EFKA_DISABLE_UVLOOP=1
+
+    Must be called before any event loop is created.
+
+    Returns:
+        Name of the installed policy ("proactor", "uvloop" or "asyncio")
+    """
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        return "proactor"
+
+    if os.getenv("EFKA_DISABLE_UVLOOP", "").lower() in ("1", "true", "yes"):
+        logger.info("uvloop disabled via EFKA_DISABLE_UVLOOP, using default asyncio")
+        return "asyncio"
+
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not available, using default asyncio")
+        return "asyncio"
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("uvloop event loop policy installed")
+    return "uvloop"
@@ -14,9 +14,9 @@ import threading
 from pathlib import Path
 import sys
 
-# Set event loop policy (solves Flask + asyncio compatibility issue)
-if sys.platform == 'win32':
-    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+# Set event loop policy (Flask + asyncio compatibility on Windows, uvloop elsewhere)
+from backend.utils.event_loop import install_event_loop_policy
+install_event_loop_policy()
 
 # Import config (must load environment variables before importing other modules)
 import os
@@ -27,6 +27,7 @@ from backend.api.wework_callback import app, init_services
 from backend.services.kb_service_factory import KBServiceFactory, get_user_service
 from backend.services.conversation_state_manager import get_conversation_state_manager
 from backend.services.session_manager import get_session_manager
+from backend.services.routing_session_manager import get_routing_session_manager
 from backend.storage.redis_storage import RedisSessionStorage
 from backend.config.settings import get_settings
 
@@ -143,6 +144,13 @@ def main():
     finally:
         # Cleanup
         if _event_loop:
+            # Drain buffered user session index writes before stopping the loop
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    get_routing_session_manager().flush(), _event_loop
+                ).result(timeout=5)
+            except Exception as e:
+                logger.error(f"Failed to flush routing session index: {e}")
             _event_loop.call_soon_threadsafe(_event_loop.stop)
         logger.info("✅ WeWork server stopped")
 
@@ -0,0 +1,159 @@
+"""
+SDKClientPool单元测试
+
+测试 backend/services/client_pool.py 中的:
+- 并发控制（信号量）
+- acquire 路径不被慢 connect 阻塞
+- resume 失败后的降级重连
+- 启动预热
+"""
+
+import pytest
+import asyncio
+from unittest.mock import patch
+
+from backend.services import client_pool as client_pool_module
+from backend.services.client_pool import SDKClientPool
+
+
+class FakeClient:
+    """用于测试的 Mock ClaudeSDKClient"""
+
+    connect_delays = {}
+    fail_resume = False
+
+    def __init__(self, options=None):
+        self.options = options
+        self.connected = False
+        self.disconnected = False
+
+    async def connect(self):
+        await asyncio.sleep(FakeClient.connect_delays.get(self.options, 0))
+        if FakeClient.fail_resume and self.options is not None:
+            raise RuntimeError("resume failed")
+        self.connected = True
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+@pytest.fixture
+def fake_client():
+    FakeClient.connect_delays = {}
+    FakeClient.fail_resume = False
+    with patch.object(client_pool_module, "ClaudeSDKClient", FakeClient):
+        yield FakeClient
+
+
+@pytest.mark.asyncio
+async def test_acquire_release_updates_stats(fake_client):
+    """测试acquire/release后统计信息正确"""
+    pool = SDKClientPool(pool_size=2, options_factory=lambda sid: sid)
+
+    async with pool.acquire() as client:
+        assert client.connected
+        assert pool.get_stats()["active_clients"] == 1
+
+    stats = pool.get_stats()
+    assert stats["active_clients"] == 0
+    assert stats["total_requests"] == 1
+    assert client.disconnected
+
+
+@pytest.mark.asyncio
+async def test_slow_connect_does_not_block_other_acquire(fake_client):
+    """测试慢connect不会阻塞其他请求的acquire（无队头阻塞）"""
+    fake_client.connect_delays = {"slow": 0.2}
+    pool = SDKClientPool(pool_size=2, options_factory=lambda sid: sid)
+
+    async def use(session_id):
+        async with pool.acquire(session_id=session_id):
+            return asyncio.get_running_loop().time()
+
+    start = asyncio.get_running_loop().time()
+    slow_task = asyncio.create_task(use("slow"))
+    await asyncio.sleep(0)
+    fast_done = await use(None)
+
+    assert fast_done - start < 0.1
+    await slow_task
+
+
+@pytest.mark.asyncio
+async def test_resume_failure_falls_back_to_new_session(fake_client):
+    """测试resume连接失败时降级为新会话"""
+    fake_client.fail_resume = True
+    pool = SDKClientPool(pool_size=1, options_factory=lambda sid: sid)
+
+    async with pool.acquire(session_id="stale-session") as client:
+        assert client.options is None
+        assert client.connected
+
+    assert pool.get_stats()["active_clients"] == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_timeout_when_pool_exhausted(fake_client):
+    """测试连接池耗尽时acquire超时"""
+    pool = SDKClientPool(pool_size=1, options_factory=lambda sid: sid, max_wait_time=0.05)
+
+    async with pool.acquire():
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.acquire():
+                pass
+
+    stats = pool.get_stats()
+    assert stats["active_clients"] == 0
+    assert stats["acquire_timeouts"] == 1
+    assert stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_gets_slot_after_release(fake_client):
+    """测试连接池满时等待者在释放后获得槽位"""
+    pool = SDKClientPool(pool_size=1, options_factory=lambda sid: sid, max_wait_time=1.0)
+    order = []
+
+    async def hold():
+        async with pool.acquire():
+            order.append("first")
+            await asyncio.sleep(0.05)
+
+    async def wait_for_slot():
+        async with pool.acquire():
+            order.append("second")
+
+    await asyncio.gather(hold(), wait_for_slot())
+
+    assert order == ["first", "second"]
+    stats = pool.get_stats()
+    assert stats["active_clients"] == 0
+    assert stats["waiting"] == 0
+    assert stats["peak_waiting"] == 1
+    assert stats["acquire_wait_ms"]["max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_connects_clients_concurrently(fake_client):
+    """测试预热并发连接客户端，且不计入请求统计"""
+    fake_client.connect_delays = {None: 0.05}
+    pool = SDKClientPool(pool_size=3, options_factory=lambda sid: sid)
+
+    start = asyncio.get_running_loop().time()
+    warmed = await pool.warmup(5)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert warmed == 3
+    assert elapsed < 0.1
+    stats = pool.get_stats()
+    assert stats["total_requests"] == 0
+    assert stats["active_clients"] == 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_failures_are_reported_not_raised(fake_client):
+    """测试预热失败只记录，不抛出"""
+    pool = SDKClientPool(pool_size=2, options_factory=lambda sid: "resume")
+    fake_client.fail_resume = True
+
+    assert await pool.warmup(2) == 0
@@ -0,0 +1,269 @@
+"""
+KB服务工厂单元测试
+
+测试 backend/services/kb_service_factory.py 中的:
+- 瞬时上游错误重试（有上限的退避 + 抖动）
+- 非瞬时错误直接抛出
+"""
+
+import os
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+# Settings require an API key at import time
+os.environ.setdefault("CLAUDE_API_KEY", "test-key")
+
+from backend.services import kb_service_factory as factory_module
+from backend.services.client_pool import PoolManager
+from backend.services.kb_service_factory import (
+    KBUserService,
+    KBAdminService,
+    _retry_backoff_seconds,
+)
+
+
+class FakeClient:
+    """用于测试的 Mock ClaudeSDKClient"""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def query(self, message):
+        self.sent = message
+
+    async def receive_response(self):
+        for message in self.messages:
+            yield message
+
+
+class FakePool:
+    """按顺序返回错误或客户端的 Mock 连接池"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.acquired = 0
+        self.released = 0
+
+    @asynccontextmanager
+    async def acquire(self, session_id=None):
+        self.acquired += 1
+        outcome = self.outcomes.pop(0)
+        try:
+            if isinstance(outcome, Exception):
+                raise outcome
+            yield FakeClient(outcome)
+        finally:
+            self.released += 1
+
+
+def _make_service(service_cls, outcomes):
+    service = service_cls()
+    service.is_initialized = True
+    service._use_print_json = False
+    service.client_pool = FakePool(outcomes)
+    return service
+
+
+async def _no_sleep(_seconds):
+    return None
+
+
+def test_retry_backoff_is_capped_and_jittered():
+    """测试退避时间有上限且带抖动"""
+    for attempt in range(1, 20):
+        backoff = _retry_backoff_seconds(attempt, cap_seconds=8.0)
+        assert 0 < backoff <= 8.0 * 1.5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("service_cls", [KBUserService, KBAdminService])
+async def test_transient_error_is_retried(service_cls):
+    """测试首条消息前的瞬时错误会重试，且重试前已释放连接"""
+    service = _make_service(service_cls, [ConnectionError("connection error"), ["m1", "m2"]])
+
+    with patch.object(factory_module.asyncio, "sleep", _no_sleep):
+        messages = [m async for m in service.query("hello")]
+
+    assert messages == ["m1", "m2"]
+    assert service.client_pool.acquired == 2
+    assert service.client_pool.released == 2
+    assert service._transient_retries == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("service_cls", [KBUserService, KBAdminService])
+async def test_non_transient_error_is_raised(service_cls):
+    """测试非瞬时错误不重试"""
+    service = _make_service(service_cls, [ValueError("invalid api key"), ["unused"]])
+
+    with pytest.raises(ValueError):
+        async for _ in service.query("hello"):
+            pass
+
+    assert service.client_pool.acquired == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_skipped_when_deadline_exceeded():
+    """测试超过重试截止时间后不再重试"""
+    service = _make_service(KBUserService, [ConnectionError("connection error"), ["unused"]])
+    service.settings = service.settings.model_copy(update={"CLAUDE_RETRY_DEADLINE": 0.0})
+
+    with pytest.raises(ConnectionError):
+        async for _ in service.query("hello"):
+            pass
+
+    assert service.client_pool.acquired == 1
+
+
+@pytest.mark.asyncio
+async def test_create_options_reuses_template(tmp_path):
+    """测试Options模板只构建一次，新会话直接复用，resume通过复制设置"""
+    service = KBUserService()
+    service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+    service._use_print_json = False
+    await service.initialize()
+
+    new_options = service._create_options(None)
+    resumed_options = service._create_options("sdk-session-1")
+
+    assert new_options is service._options_template
+    assert service._create_options("") is service._options_template
+    assert new_options.resume is None
+    assert resumed_options.resume == "sdk-session-1"
+    assert service._options_template.resume is None
+    assert resumed_options.system_prompt is service._options_template.system_prompt
+    assert resumed_options.cwd == str(tmp_path)
+    assert resumed_options.env is service._options_template.env
+    with pytest.raises(TypeError):
+        new_options.env["KB_ROOT_PATH"] = "/elsewhere"
+
+
+@pytest.mark.asyncio
+async def test_allowed_tools_computed_once(tmp_path):
+    """测试工具列表只在initialize时计算一次"""
+    service = KBAdminService()
+    service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+    service._use_print_json = False
+
+    with patch.object(
+        factory_module, "_build_allowed_tools", wraps=factory_module._build_allowed_tools
+    ) as build_tools:
+        await service.initialize()
+        service._create_options(None)
+        service._create_options("sdk-session-1")
+
+    assert build_tools.call_count == 1
+    assert isinstance(service._get_allowed_tools(), tuple)
+    assert len(set(service._get_allowed_tools())) == len(service._get_allowed_tools())
+    assert "Read" in service._create_options(None).allowed_tools
+
+
+@pytest.mark.asyncio
+async def test_initialize_all_lazy_skips_initialize():
+    """测试启用延迟初始化时initialize_all不初始化服务"""
+    lazy_settings = factory_module.get_settings().model_copy(update={"KB_SERVICE_LAZY_INIT": True})
+    factory = factory_module.KBServiceFactory
+
+    with patch.object(factory_module, "get_settings", return_value=lazy_settings), \
+            patch.object(factory, "_user_service", None), \
+            patch.object(factory, "_admin_service", None):
+        await factory.initialize_all()
+
+        assert not factory.get_user_service().is_initialized
+        assert not factory.get_admin_service().is_initialized
+
+
+@pytest.mark.asyncio
+async def test_concurrent_initialize_creates_one_pool(tmp_path):
+    """测试并发initialize只创建一个连接池"""
+    service = KBUserService()
+    service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+    service._use_print_json = False
+
+    async def slow_health_check(cli_path):
+        await asyncio.sleep(0.01)
+
+    with patch.object(factory_module, "_check_claude_cli_health", slow_health_check), \
+            patch.object(
+                PoolManager, "get_or_create", wraps=PoolManager.get_or_create
+            ) as get_or_create:
+        await asyncio.gather(*(service.initialize() for _ in range(3)))
+
+    assert get_or_create.call_count == 1
+    assert service.is_initialized
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_queries_initialize_once():
+    """测试冷启动时并发query只初始化一次"""
+    service = KBUserService()
+    service._use_print_json = False
+    init_calls = 0
+
+    async def fake_initialize():
+        nonlocal init_calls
+        init_calls += 1
+        await asyncio.sleep(0.01)
+        service.client_pool = FakePool([["m"], ["m"], ["m"]])
+        service.is_initialized = True
+
+    service._initialize = fake_initialize
+
+    async def run_query():
+        return [m async for m in service.query("hello")]
+
+    results = await asyncio.gather(*(run_query() for _ in range(3)))
+
+    assert init_calls == 1
+    assert results == [["m"], ["m"], ["m"]]
+
+
+@pytest.mark.asyncio
+async def test_pool_shared_only_for_identical_services(tmp_path):
+    """测试配置完全相同的服务共享连接池，User/Admin互不共享"""
+    services = [KBUserService(), KBUserService(), KBAdminService()]
+    for service in services:
+        service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+        service._use_print_json = False
+        await service.initialize()
+
+    user_a, user_b, admin = services
+    assert user_a.client_pool is user_b.client_pool
+    assert admin.client_pool is not user_a.client_pool
+
+
+@pytest.mark.asyncio
+async def test_close_releases_pool_and_allows_reinitialize(tmp_path):
+    """测试close释放连接池，之后可重新初始化"""
+    service = KBUserService()
+    service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+    service._use_print_json = False
+    await service.initialize()
+
+    await service.close()
+    await service.close()
+
+    assert service.client_pool is None
+    assert not service.is_initialized
+    assert service.get_pool_stats() == {"status": "not_initialized"}
+
+    await service.initialize()
+    assert service.is_initialized
+
+
+@pytest.mark.asyncio
+async def test_image_vision_server_shared_across_services(tmp_path):
+    """测试User/Admin服务共享同一个image_vision MCP服务器实例"""
+    services = [KBUserService(), KBAdminService()]
+    for service in services:
+        service.settings = service.settings.model_copy(update={"KB_ROOT_PATH": str(tmp_path)})
+        service._use_print_json = False
+        await service.initialize()
+
+    user, admin = services
+    assert user._mcp_servers is not admin._mcp_servers
+    assert user._mcp_servers["image_vision"] is admin._mcp_servers["image_vision"]
+    assert user._create_options(None).mcp_servers["image_vision"] is factory_module._get_image_vision_server()
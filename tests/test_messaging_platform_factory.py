@@ -0,0 +1,192 @@
+"""
+MessagingPlatformFactory单元测试
+
+测试 backend/services/messaging_platform_factory.py 中的:
+- 注册时只保存元数据，完整配置按需解析
+- MCP配置与工具列表的缓存
+- 配置过期后的后台刷新（stale-while-revalidate）
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from backend.config.messaging_platforms import MessagingPlatformType
+from backend.services import messaging_platform_factory as factory_module
+from backend.services.messaging_platform_factory import MessagingPlatformFactory
+
+
+def test_register_does_not_resolve_config():
+    """测试注册平台时不解析完整配置，前缀查询也不触发解析"""
+    factory = MessagingPlatformFactory()
+
+    with patch.object(factory_module, "get_platform_config") as resolve:
+        factory.register_platform(MessagingPlatformType.WEWORK)
+        assert factory.is_registered(MessagingPlatformType.WEWORK)
+        assert factory.get_redis_key_prefix(MessagingPlatformType.WEWORK) == "wework"
+
+    resolve.assert_not_called()
+
+
+def test_config_resolved_once_on_first_use():
+    """测试完整配置在首次使用时解析一次"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+
+    with patch.object(
+        factory_module, "get_platform_config", wraps=factory_module.get_platform_config
+    ) as resolve:
+        servers = factory.get_mcp_servers_config()
+        tools = factory.get_tools([MessagingPlatformType.WEWORK])
+        config = factory.get_config(MessagingPlatformType.WEWORK)
+
+    assert resolve.call_count == 1
+    assert list(servers) == ["wework"]
+    assert "mcp__wework__wework_send_text_message" in tools
+    assert config.mcp_server_name == "wework"
+
+
+def test_unregister_drops_cached_config():
+    """测试注销平台后清除已解析的配置"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+    factory.get_config(MessagingPlatformType.WEWORK)
+
+    factory.unregister_platform(MessagingPlatformType.WEWORK)
+
+    assert not factory.is_registered(MessagingPlatformType.WEWORK)
+    assert factory.get_mcp_servers_config() == {}
+
+
+def test_built_results_memoized_and_invalidated():
+    """测试MCP配置/工具列表被缓存，返回副本，注册变更时失效"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+
+    servers = factory.get_mcp_servers_config()
+    servers["extra"] = {}
+    tools = factory.get_tools()
+    tools.append("Extra")
+
+    assert "extra" not in factory.get_mcp_servers_config()
+    assert "Extra" not in factory.get_tools()
+    assert factory.get_mcp_servers_config()["wework"] is factory.get_mcp_servers_config()["wework"]
+
+    factory.unregister_platform(MessagingPlatformType.WEWORK)
+    assert factory.get_mcp_servers_config() == {}
+    assert factory.get_tools() == ["Read", "Write", "Grep", "Glob", "Bash"]
+
+
+def _expire_cached_config(factory, platform):
+    config, _ = factory._config_cache[platform]
+    factory._config_cache[platform] = (config, time.monotonic() - 3600)
+
+
+def test_stale_config_kept_when_refresh_fails():
+    """测试配置过期后刷新失败时继续使用旧配置"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+    config = factory.get_config(MessagingPlatformType.WEWORK)
+    _expire_cached_config(factory, MessagingPlatformType.WEWORK)
+
+    with patch.object(factory_module, "get_platform_config", side_effect=RuntimeError("backend down")) as resolve:
+        assert factory.get_config(MessagingPlatformType.WEWORK) is config
+        assert "wework" in factory.get_mcp_servers_config()
+
+    assert resolve.call_count == 2
+    assert not factory._refreshing
+
+
+@pytest.mark.asyncio
+async def test_stale_config_refreshed_in_background():
+    """测试事件循环中配置过期时立即返回旧配置，后台刷新后生效"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+    stale = factory.get_config(MessagingPlatformType.WEWORK)
+    _expire_cached_config(factory, MessagingPlatformType.WEWORK)
+
+    fresh = factory_module.get_platform_config(MessagingPlatformType.WEWORK)
+    with patch.object(factory_module, "get_platform_config", return_value=fresh):
+        assert factory.get_config(MessagingPlatformType.WEWORK) is stale
+        for _ in range(100):
+            if not factory._refreshing:
+                break
+            await asyncio.sleep(0.01)
+
+    assert factory.get_config(MessagingPlatformType.WEWORK) is fresh
+
+
+def test_singleton_created_once_across_threads():
+    """测试多线程并发获取单例时只创建一个实例"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with patch.object(factory_module, "_messaging_platform_factory", None):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            instances = list(pool.map(lambda _: factory_module.get_messaging_platform_factory(), range(32)))
+
+    assert len({id(instance) for instance in instances}) == 1
+
+
+def test_registered_platforms_tuple_shared_until_change():
+    """测试已注册平台返回共享的不可变元组，注册变更时更新"""
+    factory = MessagingPlatformFactory()
+    assert factory.get_all_registered_platforms() == ()
+
+    factory.register_platform(MessagingPlatformType.WEWORK)
+    platforms = factory.get_all_registered_platforms()
+
+    assert platforms == (MessagingPlatformType.WEWORK,)
+    assert factory.get_all_registered_platforms() is platforms
+
+    factory.unregister_platform(MessagingPlatformType.WEWORK)
+    assert factory.get_all_registered_platforms() == ()
+
+
+def test_placeholder_platform_rejected_at_registration():
+    """测试未实现的占位平台在注册时被拒绝，不影响默认的工具/MCP配置"""
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+
+    with pytest.raises(NotImplementedError):
+        factory.register_platform(MessagingPlatformType.FEISHU)
+
+    assert not factory.is_registered(MessagingPlatformType.FEISHU)
+    assert list(factory.get_mcp_servers_config()) == ["wework"]
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_applied_on_event_loop_thread():
+    """测试后台刷新只在线程池中解析配置，缓存的更新与清理在事件循环线程完成"""
+    import threading
+
+    factory = MessagingPlatformFactory()
+    factory.register_platform(MessagingPlatformType.WEWORK)
+    factory.get_config(MessagingPlatformType.WEWORK)
+    _expire_cached_config(factory, MessagingPlatformType.WEWORK)
+
+    fresh = factory_module.get_platform_config(MessagingPlatformType.WEWORK)
+    threads = {}
+
+    def resolve(platform):
+        threads["resolve"] = threading.get_ident()
+        return fresh
+
+    original_clear = factory._clear_built_caches
+
+    def clear():
+        threads["clear"] = threading.get_ident()
+        original_clear()
+
+    factory._clear_built_caches = clear
+    with patch.object(factory_module, "get_platform_config", side_effect=resolve):
+        factory.get_tools()
+        for _ in range(100):
+            if not factory._refreshing:
+                break
+            await asyncio.sleep(0.01)
+
+    assert factory.get_config(MessagingPlatformType.WEWORK) is fresh
+    assert threads["resolve"] != threading.get_ident()
+    assert threads["clear"] == threading.get_ident()
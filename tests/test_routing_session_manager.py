@@ -4,10 +4,149 @@ RoutingSessionManager单元测试
 
 import pytest
 import asyncio
+import hashlib
+import json
+import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from redis.exceptions import NoScriptError, ResponseError
 from backend.services.routing_session_manager import RoutingSessionManager
-from backend.models.session import SessionRole, SessionStatus, MessageSnapshot
+from backend.models.session import Session, SessionRole, SessionStatus, MessageSnapshot
+
+
+class FakeRedis:
+    """用于测试的内存版 Redis 客户端（只实现用到的命令），记录命令调用次数"""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.zsets = {}
+        self.scripts = {}
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    async def ping(self):
+        self._count("ping")
+        return True
+
+    async def get(self, key):
+        self._count("get")
+        return self.data.get(key)
+
+    async def mget(self, *keys):
+        self._count("mget")
+        return [self.data.get(key) for key in keys]
+
+    async def setex(self, key, ttl, value):
+        self._count("setex")
+        self.data[key] = value
+
+    async def sadd(self, key, *members):
+        self._count("sadd")
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        self._count("smembers")
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, ttl):
+        self._count("expire")
+
+    async def lpush(self, key, *values):
+        self._count("lpush")
+        self.data[key] = list(reversed(values)) + self.data.get(key, [])
+
+    async def delete(self, key):
+        self._count("delete")
+        self.data.pop(key, None)
+        self.sets.pop(key, None)
+        self.zsets.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self._count("zadd")
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def script_load(self, script):
+        self._count("script_load")
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        self.scripts[sha] = script
+        return sha
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        self._count("evalsha")
+        if sha not in self.scripts:
+            raise NoScriptError("No matching script. Please use EVAL.")
+        return await self.eval(self.scripts[sha], numkeys, *keys_and_args)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        self._count("eval")
+        return await self.run_script(script, list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    async def run_script(self, script, keys, args):
+        """子类覆盖以模拟脚本执行结果"""
+        raise ResponseError("scripting is not supported by FakeRedis")
+
+    def pipeline(self):
+        self._count("pipeline")
+        return FakePipeline(self)
+
+    async def zrevrange(self, key, start, stop):
+        self._count("zrevrange")
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1], reverse=True)
+        return [member for member, _ in members][start:stop + 1]
+
+
+@pytest.fixture
+def redis_py_client():
+    """真实的redis-py asyncio客户端，连接内存版Redis服务端（需要fakeredis）"""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture(params=["fakeredis", "redis"])
+def redis_py_lua_client(request):
+    """
+    能真正执行Lua脚本的redis-py客户端
+    - fakeredis: 需要fakeredis和lupa
+    - redis: 连接REDIS_TEST_URL指向的Redis（前后清空该库，只能指向测试专用库），未设置时跳过
+
+    注意：fakeredis的cjson把空表编码为[]，空列表的修正只有真实Redis能覆盖
+    """
+    if request.param == "fakeredis":
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        yield fakeredis.FakeAsyncRedis(decode_responses=True)
+        return
+
+    url = os.environ.get("REDIS_TEST_URL")
+    if not url:
+        pytest.skip("REDIS_TEST_URL not set")
+    import redis
+    import redis.asyncio as aioredis
+    admin = redis.Redis.from_url(url)
+    admin.flushdb()
+    yield aioredis.from_url(url, decode_responses=True)
+    admin.flushdb()
+    admin.close()
+
+
+class FakePipeline:
+    """排队命令，execute时一次性执行（模拟一次往返）"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.commands]
 
 
 @pytest.mark.asyncio
@@ -28,6 +167,9 @@ async def test_create_session():
     assert session.status == SessionStatus.ACTIVE
     assert session.summary.original_question == "测试问题"
     assert session.summary.version == 0
+    # 所有时间戳来自同一个时刻
+    assert session.created_at == session.last_active_at == session.summary.last_updated
+    assert session.expires_at - session.created_at == timedelta(days=7)
 
 
 @pytest.mark.asyncio
@@ -184,6 +326,7 @@ async def test_update_session_status():
     # 验证状态
     updated_session = await mgr.get_session(session.session_id)
     assert updated_session.status == SessionStatus.RESOLVED
+    assert updated_session.last_active_at == updated_session.summary.last_updated
 
 
 @pytest.mark.asyncio
@@ -216,3 +359,746 @@ async def test_session_not_found():
 
     session = await mgr.get_session("non-existent-id")
     assert session is None
+
+
+@pytest.mark.asyncio
+async def test_query_user_sessions_uses_single_mget():
+    """测试Lua脚本不可用时回退为一次MGET批量查询"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    for i in range(3):
+        await mgr.create_session(
+            user_id="emp006",
+            role=SessionRole.USER,
+            original_question=f"Q{i+1}"
+        )
+        await asyncio.sleep(0.01)
+
+    result = await mgr.query_user_sessions("emp006")
+
+    assert [s.summary.original_question for s in result.as_user] == ["Q3", "Q2", "Q1"]
+    assert redis.calls["mget"] == 1
+    assert "get" not in redis.calls
+
+
+@pytest.mark.asyncio
+async def test_query_user_sessions_server_side_script():
+    """测试Redis模式下优先使用Lua脚本在服务端过滤排序，只解析返回结果"""
+
+    class ScriptedRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            self.eval_args = (keys, args)
+            top_k = [
+                [self.data[args[2] + f"session:{sid}"] for sid in await self.zrevrange(key, 0, int(args[1]) - 1)]
+                for key in keys[:2]
+            ]
+            return top_k + [int(keys[2] in self.sets)]
+
+    redis = ScriptedRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    for i in range(3):
+        await mgr.create_session(
+            user_id="emp007",
+            role=SessionRole.USER,
+            original_question=f"Q{i+1}"
+        )
+        await asyncio.sleep(0.01)
+
+    result = await mgr.query_user_sessions("emp007", max_per_role=2)
+
+    assert [s.summary.original_question for s in result.as_user] == ["Q3", "Q2"]
+    assert result.total_count == 2
+    assert redis.eval_args == (
+        ["user_sessions:{emp007}:as_user", "user_sessions:{emp007}:as_expert", "user_sessions:emp007"],
+        ["0", 2, ""]
+    )
+    assert "mget" not in redis.calls
+
+
+@pytest.mark.asyncio
+async def test_update_rescores_user_session_index(redis_py_lua_client):
+    """测试更新摘要（标记RESOLVED）后Session在有序集合中移到最前"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis_py_lua_client)
+    await mgr.initialize()
+
+    s1 = await mgr.create_session(user_id="emp008", role=SessionRole.USER, original_question="Q1")
+    await asyncio.sleep(0.01)
+    await mgr.create_session(user_id="emp008", role=SessionRole.USER, original_question="Q2")
+    await asyncio.sleep(0.01)
+    assert await mgr.update_session_summary(s1.session_id, session_status=SessionStatus.RESOLVED)
+
+    result = await mgr.query_user_sessions("emp008", max_per_role=1)
+
+    assert [s.summary.original_question for s in result.as_user] == ["Q1"]
+    assert result.as_user[0].status == SessionStatus.RESOLVED
+
+
+@pytest.mark.asyncio
+async def test_legacy_user_sessions_set_is_migrated():
+    """测试旧版user_sessions集合在首次查询时迁移到按角色的有序集合"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    user_session = await mgr.create_session(user_id="emp009", role=SessionRole.USER, original_question="Q1")
+    expert_session = await mgr.create_session(
+        user_id="emp009", role=SessionRole.EXPERT, original_question="Q2", related_user_id="emp001"
+    )
+    # 模拟旧版数据：只存在于SET中
+    redis.zsets.clear()
+    redis.sets["user_sessions:emp009"] = {user_session.session_id, expert_session.session_id, "sess_gone"}
+
+    result = await mgr.query_user_sessions("emp009")
+
+    assert [s.session_id for s in result.as_user] == [user_session.session_id]
+    assert [s.session_id for s in result.as_expert] == [expert_session.session_id]
+    assert "user_sessions:emp009" not in redis.sets
+    assert set(redis.zsets["user_sessions:{emp009}:as_user"]) == {user_session.session_id}
+
+
+def test_session_json_round_trip_skips_validation():
+    """测试Session序列化往返结果与pydantic完整校验一致，旧格式数据回退到parse_raw"""
+    from backend.services.routing_session_manager import _dump_model, _load_session
+    from backend.models.session import SessionSummary
+
+    now = datetime.now()
+    session = Session(
+        session_id="sess_rt",
+        user_id="emp010",
+        role=SessionRole.EXPERT,
+        status=SessionStatus.WAITING_EXPERT,
+        summary=SessionSummary(
+            original_question="Q",
+            latest_exchange=MessageSnapshot(content="A", timestamp=now, role="agent"),
+            key_points=["k1"],
+            last_updated=now,
+            version=3
+        ),
+        full_context_key="session_history:sess_rt",
+        related_user_id="emp001",
+        expires_at=now,
+        tags=["t"]
+    )
+
+    raw = _dump_model(session)
+    loaded = _load_session(raw)
+
+    assert loaded == Session.parse_raw(raw) == session
+    assert loaded.role is SessionRole.EXPERT
+    assert loaded.summary.latest_exchange.timestamp == now
+
+    # 缺少带默认值的字段（模式变化）时走完整校验并补全默认值
+    legacy = json.loads(raw)
+    del legacy["tags"]
+    assert _load_session(json.dumps(legacy)).tags == []
+
+
+@pytest.mark.asyncio
+async def test_key_points_bounded_and_deduplicated():
+    """测试关键点去重且最多保留10个（淘汰最旧的）"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=None)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp011", role=SessionRole.USER, original_question="Q")
+
+    await mgr.update_session_summary(session.session_id, key_points=[f"p{i}" for i in range(8)])
+    await mgr.update_session_summary(session.session_id, key_points=["p7", "p8", "p8", "p9", "p10", "p0"])
+
+    updated = await mgr.get_session(session.session_id)
+    assert updated.summary.key_points == ["p2", "p3", "p4", "p5", "p6", "p7", "p8", "p9", "p10", "p0"]
+
+
+@pytest.mark.asyncio
+async def test_update_session_summary_single_round_trip():
+    """测试Redis模式下摘要更新通过一次Lua调用完成读-改-写（无客户端GET）"""
+
+    class ScriptedRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            self.eval_args = (keys, args)
+            return [4, "emp012", "user"] if keys[0] in self.data else 0
+
+    redis = ScriptedRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp012", role=SessionRole.USER, original_question="Q")
+    success = await mgr.update_session_summary(
+        session.session_id,
+        new_message=MessageSnapshot(content="答复", timestamp=datetime.now(), role="agent"),
+        key_points=["要点"],
+        session_status=SessionStatus.RESOLVED
+    )
+
+    assert success
+    assert redis.calls["eval"] == 1
+    assert "get" not in redis.calls
+    keys, args = redis.eval_args
+    assert keys == [f"session:{session.session_id}"]
+    assert json.loads(args[0])["content"] == "答复"
+    assert json.loads(args[1]) == ["要点"]
+    assert args[2] == "resolved"
+
+    assert not await mgr.update_session_summary("sess_missing", key_points=["x"])
+    await mgr.flush()
+
+
+@pytest.mark.asyncio
+async def test_paired_writes_are_pipelined():
+    """测试索引写入与历史追加各自通过一个pipeline完成"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp013", role=SessionRole.USER, original_question="Q")
+    await mgr.append_message_to_history(session.session_id, {"role": "user", "content": "你好"})
+    await mgr.flush()
+
+    assert redis.calls["pipeline"] == 2
+    assert redis.zsets["user_sessions:{emp013}:as_user"] == {session.session_id: session.last_active_at.timestamp()}
+    assert json.loads(redis.data[f"session_history:{session.session_id}"][0])["content"] == "你好"
+
+
+@pytest.mark.asyncio
+async def test_key_prefix_and_user_hash_tag():
+    """测试Redis键带租户前缀，用户索引使用{user_id}哈希标签"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis, key_prefix="wework:")
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp014", role=SessionRole.EXPERT, original_question="Q")
+    await mgr.flush()
+
+    assert f"wework:session:{session.session_id}" in redis.data
+    assert session.full_context_key == f"wework:session_history:{session.session_id}"
+    assert set(redis.zsets) == {"wework:user_sessions:{emp014}:as_expert"}
+
+    result = await mgr.query_user_sessions("emp014")
+    assert [s.session_id for s in result.as_expert] == [session.session_id]
+
+
+@pytest.mark.asyncio
+async def test_history_append_single_script_call():
+    """测试历史追加通过一次Lua调用完成（LPUSH + 按需续期 + 长度上限）"""
+
+    class ScriptedRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            self.eval_args = (keys, args)
+            return 1
+
+    redis = ScriptedRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    await mgr.append_message_to_history("sess_h", {"role": "user", "content": "你好"})
+
+    keys, args = redis.eval_args
+    assert keys == ["session_history:sess_h"]
+    assert json.loads(args[0])["content"] == "你好"
+    assert args[1:] == [7 * 86400, 6 * 86400 * 1000, 10_000]
+    assert "pipeline" not in redis.calls
+
+
+@pytest.mark.asyncio
+async def test_repeated_get_session_served_from_recent_cache():
+    """测试短时间内重复读取同一Session只访问一次Redis，写入后失效"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp015", role=SessionRole.USER, original_question="Q")
+
+    first = await mgr.get_session(session.session_id)
+    first.summary.key_points.append("调用方修改")
+    second = await mgr.get_session(session.session_id)
+
+    assert redis.calls["get"] == 1
+    assert second.summary.key_points == []
+
+    await mgr._save_session(second, ttl_seconds=60)
+    await mgr.get_session(session.session_id)
+    assert redis.calls["get"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_fallback_dedup_and_cas():
+    """测试内存模式下用户索引去重，CAS拒绝过期版本的副本"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=None)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp016", role=SessionRole.USER, original_question="Q")
+    await mgr._add_to_user_sessions(session)
+    assert mgr._memory_user_sessions["emp016"] == {session.session_id}
+
+    stale = session.model_copy(deep=True)
+    assert await mgr.update_session_summary(session.session_id, key_points=["k"])
+    stale.summary.version += 1
+    assert not await mgr._cas_update_session(stale, expected_version=0)
+    assert await mgr._cas_update_session(stale, expected_version=1)
+
+
+@pytest.mark.asyncio
+async def test_scripts_run_by_sha_with_noscript_fallback():
+    """测试Lua脚本在初始化时预加载并通过EVALSHA调用，NOSCRIPT时回退到EVAL"""
+
+    class ScriptedRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            return 1
+
+    redis = ScriptedRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+    assert redis.calls["script_load"] == len(redis.scripts) == 4
+
+    await mgr.append_message_to_history("sess_sha", {"role": "user", "content": "a"})
+    assert redis.calls["evalsha"] == 1
+
+    # 模拟Redis重启后脚本缓存丢失
+    redis.scripts.clear()
+    await mgr.append_message_to_history("sess_sha", {"role": "user", "content": "b"})
+    assert redis.calls["evalsha"] == 2
+    assert redis.calls["eval"] == 2
+
+
+@pytest.mark.asyncio
+async def test_user_index_writes_batched():
+    """测试连续的索引写入合并为一个pipeline，查询前先写入"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    sessions = [
+        await mgr.create_session(user_id="emp017", role=SessionRole.USER, original_question=f"Q{i+1}")
+        for i in range(5)
+    ]
+    redis.zsets.clear()
+    redis.calls.clear()
+    for session in sessions:
+        await mgr._add_to_user_sessions(session)
+
+    assert "pipeline" not in redis.calls
+    result = await mgr.query_user_sessions("emp017")
+
+    assert redis.calls["pipeline"] == 1
+    assert redis.calls["zadd"] == 1
+    assert redis.calls["expire"] == 1
+    assert len(result.as_user) == 5
+
+
+@pytest.mark.asyncio
+async def test_user_index_flushed_after_delay():
+    """测试缓冲的索引写入在短暂延迟后自动写入"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp018", role=SessionRole.USER, original_question="Q")
+    redis.zsets.clear()
+    await mgr._add_to_user_sessions(session)
+    assert "user_sessions:{emp018}:as_user" not in redis.zsets
+    await asyncio.sleep(0.05)
+
+    assert set(redis.zsets["user_sessions:{emp018}:as_user"]) == {session.session_id}
+
+
+@pytest.mark.asyncio
+async def test_memory_fallback_returns_independent_sessions():
+    """测试内存模式返回独立的Session副本，调用方修改不影响存储"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=None)
+    await mgr.initialize()
+
+    created = await mgr.create_session(user_id="emp019", role=SessionRole.USER, original_question="Q")
+
+    fetched = await mgr.get_session(created.session_id)
+    fetched.summary.key_points.append("未保存的修改")
+    fetched.tags.append("t")
+
+    again = await mgr.get_session(created.session_id)
+    assert again == created
+    assert again.summary.key_points == [] and again.tags == []
+    assert (await mgr.query_user_sessions("emp019")).as_user == [created]
+
+
+@pytest.mark.asyncio
+async def test_create_session_single_pipeline():
+    """测试创建Session时SETEX与用户索引写入（含缓冲中的写入）通过一个pipeline完成"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    first = await mgr.create_session(user_id="emp020", role=SessionRole.USER, original_question="Q1")
+    await mgr._add_to_user_sessions(first)  # 缓冲中的索引写入
+    second = await mgr.create_session(user_id="emp020", role=SessionRole.EXPERT, original_question="Q2")
+
+    assert redis.calls["pipeline"] == 2
+    assert redis.calls["setex"] == 2
+    assert redis.calls["zadd"] == 3
+    assert "user_sessions:{emp020}:as_expert" in redis.zsets
+    assert not mgr._pending_index
+    assert json.loads(redis.data[f"session:{second.session_id}"])["session_id"] == second.session_id
+
+
+@pytest.mark.asyncio
+async def test_history_messages_round_trip():
+    """测试历史消息序列化往返（非字符串键、datetime、中文）"""
+
+    class ListRedis(FakeRedis):
+        async def lrange(self, key, start, stop):
+            return list(reversed(self.data.get(key, [])))
+
+    redis = ListRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    sent_at = datetime(2025, 1, 1, 12, 0, 0)
+    await mgr.append_message_to_history("sess_rt", {"role": "user", "content": "你好", "at": sent_at, 1: "x"})
+
+    [message] = await mgr.get_session_history("sess_rt")
+    assert datetime.fromisoformat(message.pop("at")) == sent_at
+    assert message == {"role": "user", "content": "你好", "1": "x"}
+
+
+@pytest.mark.asyncio
+async def test_resolve_goes_through_cas():
+    """测试标记RESOLVED与普通摘要更新一样经过CAS，不绕过版本检查直接覆盖"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=None)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp021", role=SessionRole.USER, original_question="Q")
+
+    cas_calls = []
+    original_cas = mgr._cas_update_session
+
+    async def recording_cas(updated, expected_version, reset_ttl=True):
+        cas_calls.append((updated.status, expected_version, reset_ttl))
+        return await original_cas(updated, expected_version, reset_ttl)
+
+    mgr._cas_update_session = recording_cas
+    assert await mgr.update_session_summary(session.session_id, session_status=SessionStatus.RESOLVED)
+
+    assert cas_calls == [(SessionStatus.RESOLVED, 0, True)]
+    resolved = await mgr.get_session(session.session_id)
+    assert resolved.status == SessionStatus.RESOLVED
+    assert resolved.summary.version == 1
+
+
+@pytest.mark.asyncio
+async def test_cas_success_served_from_recent_cache():
+    """测试CAS成功后写入的Session直接进入读缓存，后续读取无需访问Redis"""
+    from backend.services.routing_session_manager import _CAS_UPDATE_SESSION_LUA
+
+    class CasOnlyRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            if script != _CAS_UPDATE_SESSION_LUA:
+                raise Exception("script unavailable")
+            self.data[keys[0]] = args[1]
+            self.cas_ttl = args[2]
+            return 1
+
+    redis = CasOnlyRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp022", role=SessionRole.USER, original_question="Q")
+    assert await mgr.update_session_summary(session.session_id, key_points=["要点"])
+    assert redis.calls["get"] == 1
+    assert redis.cas_ttl == 0  # 状态未变，保留原TTL
+
+    updated = await mgr.get_session(session.session_id)
+    assert redis.calls["get"] == 1
+    assert updated.summary.key_points == ["要点"]
+    assert updated.summary.version == 1
+    await mgr.flush()
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_not_masked_by_memory_copy():
+    """测试Redis模式下读写失败直接抛出，不写入读路径不会访问的内存副本"""
+
+    class BrokenRedis(FakeRedis):
+        def pipeline(self):
+            raise ConnectionError("redis down")
+
+        async def setex(self, key, ttl, value):
+            raise ConnectionError("redis down")
+
+        async def get(self, key):
+            raise ConnectionError("redis down")
+
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=BrokenRedis())
+    await mgr.initialize()
+
+    with pytest.raises(ConnectionError):
+        await mgr.create_session(user_id="emp023", role=SessionRole.USER, original_question="Q")
+    assert not mgr._memory_sessions
+
+    with pytest.raises(ConnectionError):
+        await mgr.get_session("sess_any")
+
+
+@pytest.mark.asyncio
+async def test_user_index_written_with_redis_py(redis_py_client):
+    """测试使用真实redis-py客户端时，创建Session与缓冲的索引写入能正确写入有序集合"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis_py_client)
+    await mgr.initialize()
+
+    first = await mgr.create_session(user_id="emp024", role=SessionRole.USER, original_question="Q1")
+    await asyncio.sleep(0.01)
+    second = await mgr.create_session(user_id="emp024", role=SessionRole.USER, original_question="Q2")
+    await mgr._add_to_user_sessions(first)
+    await mgr.flush()
+
+    index = await redis_py_client.zrevrange("user_sessions:{emp024}:as_user", 0, -1, withscores=True)
+    assert [sid for sid, _ in index] == [second.session_id, first.session_id]
+    assert index[1][1] == pytest.approx(first.last_active_at.timestamp())
+    assert await redis_py_client.ttl("user_sessions:{emp024}:as_user") > 0
+
+
+@pytest.mark.asyncio
+async def test_scripts_called_with_redis_py_signature(redis_py_lua_client):
+    """测试通过真实redis-py客户端调用EVALSHA，脚本缓存被清空后回退到EVAL"""
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis_py_lua_client)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp025", role=SessionRole.USER, original_question="Q")
+    assert await mgr._rmw_update_session(session.session_id, None, ["k1"], None) == 1
+
+    await redis_py_lua_client.script_flush()
+    assert await mgr._rmw_update_session(session.session_id, None, ["k2"], None) == 2
+    assert await mgr._rmw_update_session("sess_missing", None, [], None) == 0
+    await mgr.flush()
+
+
+@pytest.mark.asyncio
+async def test_update_script_runs_in_redis(redis_py_lua_client):
+    """测试摘要更新Lua脚本真实执行：空列表编码、关键点去重淘汰、KEEPTTL与状态变化时的SETEX、索引重新计分"""
+    from backend.services.routing_session_manager import _load_session
+
+    client = redis_py_lua_client
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=client)
+    await mgr.initialize()
+
+    session = await mgr.create_session(
+        user_id="emp026", role=SessionRole.EXPERT, original_question="Q", related_user_id="emp001"
+    )
+    key = f"session:{session.session_id}"
+    await client.expire(key, 1000)
+
+    # 没有关键点与标签时仍保持为JSON数组
+    assert await mgr.update_session_summary(
+        session.session_id,
+        new_message=MessageSnapshot(content="答复", timestamp=datetime.now(), role="agent")
+    )
+    raw = await client.get(key)
+    assert json.loads(raw)["summary"]["key_points"] == []
+    assert json.loads(raw)["tags"] == []
+    assert _load_session(raw) == Session.parse_raw(raw)
+    assert 0 < await client.ttl(key) <= 1000
+
+    await mgr.update_session_summary(session.session_id, key_points=[f"p{i}" for i in range(8)])
+    await mgr.update_session_summary(
+        session.session_id,
+        key_points=["p7", "p8", "p8", "p9", "p10", "p0"],
+        session_status=SessionStatus.RESOLVED
+    )
+
+    updated = await mgr.get_session(session.session_id)
+    assert updated.summary.key_points == ["p2", "p3", "p4", "p5", "p6", "p7", "p8", "p9", "p10", "p0"]
+    assert updated.summary.latest_exchange.content == "答复"
+    assert updated.summary.version == updated.message_count == 3
+    assert updated.status == SessionStatus.RESOLVED
+    assert 1000 < await client.ttl(key) <= 24 * 3600
+
+    await mgr.flush()
+    assert await client.keys("user_sessions:*") == ["user_sessions:{emp026}:as_expert"]
+    assert await client.zrange("user_sessions:{emp026}:as_expert", 0, -1, withscores=True) == [
+        (session.session_id, pytest.approx(updated.last_active_at.timestamp()))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_query_script_runs_in_redis(redis_py_lua_client):
+    """测试查询Lua脚本真实执行：跳过过期Session（含带空格的旧格式JSON），清理已不存在的Session"""
+    client = redis_py_lua_client
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=client)
+    await mgr.initialize()
+
+    s1 = await mgr.create_session(user_id="emp027", role=SessionRole.USER, original_question="Q1")
+    await asyncio.sleep(0.01)
+    s2 = await mgr.create_session(user_id="emp027", role=SessionRole.USER, original_question="Q2")
+    await asyncio.sleep(0.01)
+    s3 = await mgr.create_session(user_id="emp027", role=SessionRole.USER, original_question="Q3")
+    await asyncio.sleep(0.01)
+    s4 = await mgr.create_session(user_id="emp027", role=SessionRole.USER, original_question="Q4")
+
+    assert await mgr.update_session_summary(s2.session_id, session_status=SessionStatus.EXPIRED)
+    await mgr.flush()
+    await client.delete(f"session:{s3.session_id}")
+    legacy = json.loads(await client.get(f"session:{s4.session_id}"))
+    legacy["status"] = "expired"
+    await client.set(f"session:{s4.session_id}", json.dumps(legacy))  # 带空格的旧格式
+
+    result = await mgr._query_user_sessions_server_side("emp027", include_expired=False, max_per_role=1)
+    assert [s.session_id for s in result.as_user] == [s1.session_id]
+
+    result = await mgr._query_user_sessions_server_side("emp027", include_expired=True, max_per_role=10)
+    assert [s.session_id for s in result.as_user] == [s2.session_id, s4.session_id, s1.session_id]
+    assert not await client.zscore("user_sessions:{emp027}:as_user", s3.session_id)
+
+
+@pytest.mark.asyncio
+async def test_cas_script_runs_in_redis(redis_py_lua_client):
+    """测试CAS Lua脚本真实执行：匹配旧格式JSON中的版本号，版本冲突与Session不存在时拒绝，按需保留TTL"""
+    client = redis_py_lua_client
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=client)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp028", role=SessionRole.USER, original_question="Q")
+    key = f"session:{session.session_id}"
+    await client.setex(key, 1000, json.dumps(json.loads(await client.get(key))))  # 带空格的旧格式
+
+    updated = session.model_copy(deep=True)
+    updated.summary.version = 1
+    assert await mgr._cas_update_session(updated, expected_version=0, reset_ttl=False)
+    assert 0 < await client.ttl(key) <= 1000
+
+    stale = session.model_copy(deep=True)
+    stale.summary.version = 1
+    assert not await mgr._cas_update_session(stale, expected_version=0)
+
+    updated.summary.version = 2
+    updated.status = SessionStatus.RESOLVED
+    assert await mgr._cas_update_session(updated, expected_version=1)
+    assert 1000 < await client.ttl(key) <= 24 * 3600
+    assert (await mgr.get_session(session.session_id)).summary.version == 2
+
+    missing = session.model_copy(update={"session_id": "sess_missing"}, deep=True)
+    assert not await mgr._cas_update_session(missing, expected_version=0)
+
+
+@pytest.mark.asyncio
+async def test_history_script_runs_in_redis(redis_py_lua_client, monkeypatch):
+    """测试历史追加Lua脚本真实执行：长度上限，TTL只在剩余不足阈值时续期"""
+    from backend.services import routing_session_manager
+
+    monkeypatch.setattr(routing_session_manager, "_HISTORY_MAX_LENGTH", 3)
+    client = redis_py_lua_client
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=client)
+    await mgr.initialize()
+
+    for i in range(5):
+        await mgr.append_message_to_history("sess_h", {"role": "user", "content": f"m{i}"})
+
+    key = "session_history:sess_h"
+    assert [json.loads(m)["content"] for m in await client.lrange(key, 0, -1)] == ["m4", "m3", "m2"]
+    assert await client.ttl(key) > 6 * 86400
+
+    await client.expire(key, int(6.5 * 86400))
+    await mgr.append_message_to_history("sess_h", {"role": "user", "content": "m5"})
+    assert await client.ttl(key) <= 6.5 * 86400
+
+    await client.expire(key, 100)
+    await mgr.append_message_to_history("sess_h", {"role": "user", "content": "m6"})
+    assert await client.ttl(key) > 6 * 86400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_read_during_update_not_cached():
+    """测试摘要更新脚本执行期间并发读取的旧Session不会在更新后继续从读缓存返回"""
+
+    class SlowScriptRedis(FakeRedis):
+        async def run_script(self, script, keys, args):
+            # 脚本执行期间另一个协程读取了更新前的Session
+            await mgr.get_session(session.session_id)
+            data = json.loads(self.data[keys[0]])
+            data["summary"]["version"] += 1
+            self.data[keys[0]] = json.dumps(data)
+            return [data["summary"]["version"], data["user_id"], data["role"]]
+
+    redis = SlowScriptRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    session = await mgr.create_session(user_id="emp029", role=SessionRole.USER, original_question="Q")
+    assert await mgr.update_session_summary(session.session_id, key_points=["要点"])
+
+    assert (await mgr.get_session(session.session_id)).summary.version == 1
+    assert redis.calls["get"] == 2
+    await mgr.flush()
+
+
+@pytest.mark.asyncio
+async def test_failed_index_flush_is_retried():
+    """测试索引批量写入失败时条目放回缓冲区，下次flush重试且不覆盖更新的分数"""
+
+    class FlakyPipelineRedis(FakeRedis):
+        fail = True
+
+        def pipeline(self):
+            pipe = super().pipeline()
+            if self.fail:
+                async def execute():
+                    raise ConnectionError("redis down")
+                pipe.execute = execute
+            return pipe
+
+    redis = FlakyPipelineRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    await mgr.initialize()
+
+    redis.fail = False
+    s1 = await mgr.create_session(user_id="emp030", role=SessionRole.USER, original_question="Q1")
+    s2 = await mgr.create_session(user_id="emp030", role=SessionRole.USER, original_question="Q2")
+    redis.zsets.clear()
+
+    redis.fail = True
+    await mgr._add_to_user_sessions(s1)
+    await mgr.flush()
+    assert mgr._pending_index == {"user_sessions:{emp030}:as_user": {s1.session_id: s1.last_active_at.timestamp()}}
+
+    # 失败期间s1有了更新的分数
+    s1.last_active_at += timedelta(seconds=5)
+    await mgr._add_to_user_sessions(s1)
+    await mgr._add_to_user_sessions(s2)
+    await mgr.flush()
+
+    redis.fail = False
+    await mgr.flush()
+    assert redis.zsets["user_sessions:{emp030}:as_user"] == {
+        s1.session_id: s1.last_active_at.timestamp(),
+        s2.session_id: s2.last_active_at.timestamp(),
+    }
+    assert not mgr._pending_index and mgr._pending_count == 0
+
+
+@pytest.mark.asyncio
+async def test_initialize_loads_scripts_once():
+    """测试重复调用initialize（每条消息都会检查）时只PING并加载脚本一次"""
+    redis = FakeRedis()
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=redis)
+    assert not mgr.is_initialized
+
+    await mgr.initialize()
+    await mgr.initialize()
+
+    assert mgr.is_initialized
+    assert redis.calls["ping"] == 1
+    assert redis.calls["script_load"] == len(redis.scripts)  # 每个脚本只加载一次
+
+
+@pytest.mark.asyncio
+async def test_memory_fallback_not_marked_initialized():
+    """测试Redis不可用而降级到内存时不标记为已初始化"""
+
+    class DownRedis(FakeRedis):
+        async def ping(self):
+            raise ConnectionError("redis down")
+
+    mgr = RoutingSessionManager(kb_root=Path("."), redis_client=DownRedis())
+    await mgr.initialize()
+
+    assert not mgr.is_initialized
+    assert mgr._using_fallback
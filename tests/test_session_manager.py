@@ -0,0 +1,303 @@
+"""
+SessionManager单元测试
+
+测试 backend/services/session_manager.py 中的内存会话管理
+"""
+
+import os
+import pytest
+from datetime import datetime
+
+# Settings require an API key at import time
+os.environ.setdefault("CLAUDE_API_KEY", "test-key")
+
+from backend.services.session_manager import SessionManager
+from backend.storage.base import SessionStorage, SessionRecord
+
+
+class MemoryStorage(SessionStorage):
+    """用于测试的内存存储后端，记录调用的方法"""
+
+    def __init__(self):
+        self.records = {}
+        self.calls = []
+
+    async def connect(self):
+        pass
+
+    async def get_active_session(self, user_id):
+        self.calls.append("get")
+        return self.records.get(user_id)
+
+    async def save_active_session(self, session):
+        self.calls.append("save")
+        self.records[session.user_id] = session
+
+    async def delete_active_session(self, user_id):
+        return self.records.pop(user_id, None) is not None
+
+    async def get_all_active_sessions(self):
+        return dict(self.records)
+
+    async def health_check(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+def make_manager(timeout=60):
+    """创建使用指定超时时间的SessionManager"""
+    mgr = SessionManager()
+    mgr.settings = mgr.settings.model_copy(update={"SESSION_TIMEOUT": timeout})
+    return mgr
+
+
+@pytest.mark.asyncio
+async def test_cleanup_removes_only_expired_sessions():
+    """测试清理只删除过期会话，期间有活动的会话重新入堆"""
+    mgr = make_manager(timeout=60)
+
+    idle = mgr.create_session(user_id="u1")
+    active = mgr.create_session(user_id="u2")
+    fresh = mgr.create_session(user_id="u3")
+
+    idle.last_active -= 120
+    active.last_active -= 120
+    # 模拟API层直接更新活跃时间（不经过SessionManager）
+    active.update_activity()
+    # 让两个旧会话的堆条目到期
+    mgr._expiry_heap = [
+        (deadline if sid == fresh.session_id else deadline - 120, sid)
+        for deadline, sid in mgr._expiry_heap
+    ]
+
+    assert await mgr.cleanup_expired_sessions() == 1
+
+    assert set(mgr.sessions) == {active.session_id, fresh.session_id}
+    assert "u1" not in mgr._sessions_by_user
+    assert sorted(sid for _, sid in mgr._expiry_heap) == sorted([active.session_id, fresh.session_id])
+
+
+@pytest.mark.asyncio
+async def test_cleanup_skips_deleted_sessions():
+    """测试已删除会话的堆条目在到期时被丢弃"""
+    mgr = make_manager(timeout=60)
+
+    session = mgr.create_session()
+    await mgr.delete_session(session.session_id)
+    mgr._expiry_heap = [(deadline - 120, sid) for deadline, sid in mgr._expiry_heap]
+
+    assert await mgr.cleanup_expired_sessions() == 0
+    assert mgr._expiry_heap == []
+
+
+def test_get_session_lazily_expires():
+    """测试访问过期会话时直接回收并返回None"""
+    mgr = make_manager(timeout=60)
+
+    session = mgr.create_session()
+    assert mgr.get_session(session.session_id) is session
+
+    session.last_active -= 120
+    assert mgr.get_session(session.session_id) is None
+    assert not mgr.session_exists(session.session_id)
+
+
+def test_session_is_slotted_and_timestamped_once():
+    """测试Session为slots数据类，创建时间与活跃时间来自同一时刻"""
+    mgr = make_manager()
+
+    session = mgr.create_session(user_id="u1", metadata={"k": "v"})
+
+    assert not hasattr(session, "__dict__")
+    assert session.created_at == session.last_active
+    assert session.to_dict()["metadata"] == {"k": "v"}
+
+
+@pytest.mark.asyncio
+async def test_session_ids_are_random_hex():
+    """测试会话ID为32位随机十六进制串且互不重复"""
+    mgr = make_manager()
+
+    ids = {mgr.create_session().session_id for _ in range(100)}
+    await mgr.clear_user_context("u1")
+
+    assert len(ids) == 100
+    assert all(len(sid) == 32 and int(sid, 16) >= 0 for sid in ids)
+    assert len(mgr._user_sessions_memory["u1"].internal_session_id) == 32
+
+
+@pytest.mark.asyncio
+async def test_get_user_sessions_uses_reverse_index():
+    """测试按用户查询会话，删除与过期回收后索引同步更新"""
+    mgr = make_manager(timeout=60)
+
+    first = mgr.create_session(user_id="u1")
+    second = mgr.create_session(user_id="u1")
+    mgr.create_session(user_id="u2")
+    mgr.create_session()
+
+    assert mgr.get_user_sessions("u1") == {first.session_id: first, second.session_id: second}
+
+    await mgr.delete_session(first.session_id)
+    second.last_active -= 120
+    assert mgr.get_session(second.session_id) is None
+
+    assert mgr.get_user_sessions("u1") == {}
+    assert "u1" not in mgr._sessions_by_user
+    assert len(mgr.get_user_sessions("u2")) == 1
+
+
+def test_statistics_average_age():
+    """测试统计信息中的平均会话时长"""
+    mgr = make_manager()
+
+    first = mgr.create_session(user_id="u1")
+    second = mgr.create_session()
+    first.created_at -= 100
+    second.created_at -= 300
+
+    stats = mgr.get_statistics()
+
+    assert stats["total_sessions"] == 2
+    assert stats["authenticated_sessions"] == 1
+    assert stats["anonymous_sessions"] == 1
+    assert 200 <= stats["average_age_seconds"] < 201
+
+
+@pytest.mark.asyncio
+async def test_update_active_session_fields_default_implementation():
+    """测试存储基类的字段更新：会话存在时读-改-写，不存在时不创建"""
+    storage = MemoryStorage()
+    storage.records["u1"] = SessionRecord(user_id="u1", internal_session_id="i1")
+
+    assert await storage.update_active_session_fields("u1", sdk_session_id="sdk1", turn_count=3)
+    assert not await storage.update_active_session_fields("u2", turn_count=1)
+
+    assert storage.records["u1"].sdk_session_id == "sdk1"
+    assert storage.records["u1"].turn_count == 3
+    assert "u2" not in storage.records
+
+
+@pytest.mark.asyncio
+async def test_activity_and_sdk_id_updates_patch_storage_once():
+    """测试更新活跃度与保存SDK会话ID各只调用一次字段更新（无读-改-写往返）"""
+
+    class PatchingStorage(MemoryStorage):
+        async def update_active_session_fields(self, user_id, **fields):
+            self.calls.append(("patch", user_id, sorted(fields)))
+            return True
+
+    storage = PatchingStorage()
+    mgr = make_manager()
+    mgr.storage = storage
+
+    await mgr.update_session_activity("u1", turn_count=2)
+    await mgr.save_sdk_session_id("u1", "sdk1")
+
+    assert storage.calls == [
+        ("patch", "u1", ["last_active", "turn_count"]),
+        ("patch", "u1", ["last_active", "sdk_session_id"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_user_session_reads_served_from_write_through_cache():
+    """测试同一用户连续请求只读取一次存储，写入同步更新缓存，清空上下文后重新创建"""
+    storage = MemoryStorage()
+    mgr = make_manager()
+    mgr.storage = storage
+
+    assert await mgr.get_or_create_user_session("u1") is None
+    await mgr.save_sdk_session_id("u1", "sdk1")
+    assert await mgr.get_or_create_user_session("u1") == "sdk1"
+    assert await mgr.get_or_create_user_session("u1") == "sdk1"
+    assert storage.calls.count("get") == 2  # 创建时一次，基类字段更新一次
+
+    await mgr.clear_user_context("u1")
+    assert await mgr.get_or_create_user_session("u1") is None
+    assert storage.records["u1"].sdk_session_id is None
+
+
+def test_cleanup_delay_follows_earliest_expiry():
+    """测试清理任务的休眠时间跟随最早到期时间，限制在1~60秒之间"""
+    mgr = make_manager(timeout=30)
+    assert mgr._next_cleanup_delay() == 60.0
+
+    mgr.create_session()
+    assert 29 < mgr._next_cleanup_delay() <= 30
+
+    mgr._expiry_heap[0] = (mgr._expiry_heap[0][0] - 100, mgr._expiry_heap[0][1])
+    assert mgr._next_cleanup_delay() == 1.0
+
+    long_mgr = make_manager(timeout=3600)
+    long_mgr.create_session()
+    assert long_mgr._next_cleanup_delay() == 60.0
+
+
+def test_session_to_dict_timestamps():
+    """测试Session.to_dict输出本地时间的ISO-8601字符串（秒精度）"""
+    mgr = make_manager()
+
+    session = mgr.create_session(user_id="u1")
+    session.created_at = datetime(2025, 1, 10, 10, 20, 0, 123456).timestamp()
+
+    data = session.to_dict()
+
+    assert data["created_at"] == "2025-01-10T10:20:00"
+    assert datetime.fromisoformat(data["last_active"]) == datetime.fromtimestamp(int(session.last_active))
+
+
+@pytest.mark.asyncio
+async def test_storage_error_switches_to_memory_fallback():
+    """测试存储出错后切换到内存降级，之后的请求不再访问存储"""
+    from redis.exceptions import ConnectionError as RedisConnectionError
+
+    class BrokenStorage(MemoryStorage):
+        async def get_active_session(self, user_id):
+            self.calls.append("get")
+            raise RedisConnectionError("redis down")
+
+    storage = BrokenStorage()
+    mgr = make_manager()
+    mgr.storage = storage
+    await mgr.initialize_storage()
+
+    assert await mgr.get_or_create_user_session("u1") is None
+    await mgr.save_sdk_session_id("u1", "sdk1")
+    assert await mgr.get_or_create_user_session("u1") == "sdk1"
+
+    assert storage.calls == ["get"]
+    assert mgr.get_statistics()["using_redis_fallback"]
+
+
+@pytest.mark.asyncio
+async def test_fallback_memory_is_lru_bounded(monkeypatch):
+    """测试降级模式下内存会话数有上限，按最近使用顺序淘汰"""
+    from backend.services import session_manager
+
+    monkeypatch.setattr(session_manager, "_FALLBACK_SESSIONS_MAX", 2)
+    mgr = make_manager()
+
+    await mgr.get_or_create_user_session("u1")
+    await mgr.get_or_create_user_session("u2")
+    await mgr.update_session_activity("u1")  # u1 变为最近使用
+    await mgr.get_or_create_user_session("u3")
+
+    assert list(mgr._user_sessions_memory) == ["u1", "u3"]
+
+
+def test_get_all_sessions_is_read_only_view():
+    """测试get_all_sessions返回只读视图，snapshot_sessions返回独立副本"""
+    mgr = make_manager()
+    first = mgr.create_session()
+
+    view = mgr.get_all_sessions()
+    snapshot = mgr.snapshot_sessions()
+    second = mgr.create_session()
+
+    with pytest.raises(TypeError):
+        view["x"] = first
+    assert set(view) == {first.session_id, second.session_id}
+    assert set(snapshot) == {first.session_id}
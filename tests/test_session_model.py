@@ -2,6 +2,7 @@
 Session数据模型单元测试
 """
 
+import json
 import pytest
 from datetime import datetime
 from backend.models.session import (
@@ -137,6 +138,43 @@ def test_session_serialization():
     assert "test-456" in session_json
 
 
+def test_session_router_view():
+    """测试Router输入投影只保留路由字段且可直接JSON序列化"""
+    now = datetime(2025, 1, 10, 10, 25, 0)
+    session = Session(
+        session_id="test-789",
+        user_id="emp003",
+        role=SessionRole.USER,
+        status=SessionStatus.ACTIVE,
+        summary=SessionSummary(
+            original_question="如何申请年假？",
+            latest_exchange=MessageSnapshot(content="在OA系统提交", timestamp=now, role="agent"),
+            key_points=["年假申请"],
+            last_updated=now,
+            version=3
+        ),
+        full_context_key="session_history:test-789",
+        last_active_at=now,
+        created_at=now,
+        expires_at=datetime(2025, 12, 31)
+    )
+
+    view = session.to_router_view()
+
+    assert view == {
+        "session_id": "test-789",
+        "status": "active",
+        "summary": {
+            "original_question": "如何申请年假？",
+            "latest_exchange": {"content": "在OA系统提交", "timestamp": "2025-01-10T10:25:00", "role": "agent"},
+            "key_points": ["年假申请"]
+        },
+        "created_at": "2025-01-10T10:25:00",
+        "last_active_at": "2025-01-10T10:25:00"
+    }
+    json.dumps(view, ensure_ascii=False)
+
+
 def test_session_key_points_limit():
     """测试key_points列表"""
     summary = SessionSummary(
@@ -0,0 +1,113 @@
+"""
+SSE流式工具单元测试
+
+测试 backend/api/streaming_utils.py 中的:
+- 心跳注释
+- 小事件合并为大帧
+- SSE帧编码
+"""
+
+import os
+import json
+import pytest
+import asyncio
+
+# Settings require an API key at import time
+os.environ.setdefault("CLAUDE_API_KEY", "test-key")
+
+from backend.api.streaming_utils import (
+    _with_sse_heartbeat,
+    create_sse_response,
+    format_sse_event,
+    sse_message_event,
+)
+
+
+async def _events(count, delay_after=0.0, tail=None):
+    for i in range(count):
+        yield f"data: {i}\n\n".encode()
+    if delay_after:
+        await asyncio.sleep(delay_after)
+    if tail:
+        yield tail
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_without_coalescing_forwards_events():
+    """测试未启用合并时逐条转发事件"""
+    chunks = [c async for c in _with_sse_heartbeat(_events(3))]
+    assert chunks == [b"data: 0\n\n", b"data: 1\n\n", b"data: 2\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_burst_events_are_coalesced():
+    """测试突发的小事件被合并为一个帧，延迟到达的事件单独发送"""
+    chunks = [
+        c async for c in _with_sse_heartbeat(
+            _events(5, delay_after=0.05, tail=b"data: late\n\n"),
+            coalesce_size=4096,
+            coalesce_seconds=0.01
+        )
+    ]
+    assert chunks == [
+        b"data: 0\n\ndata: 1\n\ndata: 2\n\ndata: 3\n\ndata: 4\n\n",
+        b"data: late\n\n",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalescing_flushes_at_size_limit():
+    """测试缓冲达到大小上限时立即发送"""
+    chunks = [
+        c async for c in _with_sse_heartbeat(
+            _events(4),
+            coalesce_size=len("data: 0\n\n") * 2,
+            coalesce_seconds=1.0
+        )
+    ]
+    assert chunks == [b"data: 0\n\ndata: 1\n\n", b"data: 2\n\ndata: 3\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_buffered_frames_delivered_before_error():
+    """测试内部生成器出错时，已缓冲的事件先发送再抛出异常"""
+
+    async def failing():
+        yield b"data: 0\n\n"
+        raise RuntimeError("upstream failed")
+
+    chunks = []
+    with pytest.raises(RuntimeError):
+        async for chunk in _with_sse_heartbeat(failing(), coalesce_size=4096, coalesce_seconds=1.0):
+            chunks.append(chunk)
+
+    assert chunks == [b"data: 0\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_emitted_when_idle():
+    """测试空闲时发送心跳注释"""
+    chunks = [
+        c async for c in _with_sse_heartbeat(
+            _events(0, delay_after=0.05, tail=b"data: done\n\n"),
+            interval_seconds=0.02
+        )
+    ]
+    assert b":\n\n" in chunks
+    assert chunks[-1] == b"data: done\n\n"
+
+
+def test_create_sse_response_rejects_sync_iterator():
+    """测试同步迭代器被拒绝（避免线程池转发）"""
+    with pytest.raises(TypeError):
+        create_sse_response(iter(["data: x\n\n"]))
+
+
+def test_format_sse_event_encodes_utf8_bytes():
+    """测试SSE帧直接编码为UTF-8字节"""
+    frame = sse_message_event("你好")
+    assert isinstance(frame, bytes)
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert json.loads(frame[len(b"data: "):-2]) == {"type": "message", "content": "你好"}
+    assert "你好".encode("utf-8") in frame
+    assert json.loads(format_sse_event({"a": 1})[len(b"data: "):]) == {"a": 1}